@@ -0,0 +1,341 @@
+"""Harness de benchmarks offline contra o stub local do DataJUD.
+
+Cenários: `client` (DataJudClient.execute_tool no processo), `cli` (um processo
+`mcp-datajud execute` por chamada) e `server` (uvicorn + POST /execute concorrente).
+Cada carga registra vazão, latências p50/p95/p99, pico de RSS e chamadas ao stub.
+O resultado é gravado em JSON para comparar execuções:
+
+    python benchmarks/run.py --label antes
+    python benchmarks/run.py --label depois --scenarios client,server --requests 500
+    python benchmarks/run.py --compare benchmarks/results/antes.json benchmarks/results/depois.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from stub_server import StubConfig, StubDataJud  # noqa: E402
+from workloads import TRIBUNAIS, WORKLOADS  # noqa: E402
+
+SCENARIOS = ("client", "cli", "server")
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    # Nearest-rank sobre a amostra ordenada
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_load(call: Callable[[int], bool], total: int, concurrency: int) -> Tuple[List[float], int, float]:
+    """Executa `call(i)` para i = 1..total em `concurrency` threads; devolve latências (ms), erros e duração (s)."""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = iter(range(1, total + 1))
+
+    def worker() -> None:
+        nonlocal errors
+        while True:
+            with lock:
+                index = next(remaining, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = call(index)
+            except Exception:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+                errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for _ in range(max(1, concurrency)):
+            executor.submit(worker)
+    return latencies, errors, time.perf_counter() - started
+
+
+def _peak_rss_kb(who: int) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _process_peak_rss_kb(pid: int) -> Optional[int]:
+    # VmHWM: pico de RSS do processo (Linux); indisponível em outros sistemas
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def measure(
+    scenario: str,
+    name: str,
+    call: Callable[[int], bool],
+    stub: StubDataJud,
+    args: argparse.Namespace,
+    peak_rss: Callable[[], Optional[int]],
+) -> Dict[str, Any]:
+    call(0)  # aquecimento: conexões, spec e caches de import fora da medição
+    stub.reset_calls()
+    total = args.cli_requests if scenario == "cli" else args.requests
+    latencies, errors, duration = run_load(call, total, args.concurrency)
+    latencies.sort()
+    upstream = stub.stats()
+    result = {
+        "scenario": scenario,
+        "workload": name,
+        "requests": total,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "throughput_rps": round(total / duration, 2) if duration else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "mean": _round(sum(latencies) / len(latencies)) if latencies else None,
+            "max": _round(latencies[-1]) if latencies else None,
+        },
+        "peak_rss_kb": peak_rss(),
+        "upstream_calls": sum(upstream.values()),
+        "upstream_calls_per_request": round(sum(upstream.values()) / total, 3) if total else None,
+        "upstream_by_route": upstream,
+    }
+    print(
+        f"{scenario:>6} {name:<22} {result['throughput_rps']:>9} req/s  "
+        f"p50 {result['latency_ms']['p50']} ms  p95 {result['latency_ms']['p95']} ms  "
+        f"p99 {result['latency_ms']['p99']} ms  upstream {result['upstream_calls']}  erros {errors}",
+        flush=True,
+    )
+    return result
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def bench_env(stub_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "DATAJUD_API_KEY": "benchmark",
+        "DATAJUD_BASE_URL": stub_url,
+        "DATAJUD_TRIBUNAIS": TRIBUNAIS,
+    })
+    # Sem throttling artificial, salvo se o ambiente pedir outro orçamento
+    env.setdefault("DATAJUD_RATE_LIMIT_PER_SEC", "100000")
+    env.setdefault("DATAJUD_RATE_LIMIT_BURST", "100000")
+    return env
+
+
+def scenario_client(workloads: List[str], stub: StubDataJud, args: argparse.Namespace, env: Dict[str, str]) -> List[Dict[str, Any]]:
+    os.environ.update(env)
+    from mcp_datajud.client import DataJudClient
+
+    client = DataJudClient()
+    results = []
+    for name in workloads:
+        workload = WORKLOADS[name]
+
+        def call(index: int, workload: Dict[str, Any] = workload) -> bool:
+            result = client.execute_tool(workload["tool"], **workload["params"](index))
+            return "error" not in result
+
+        results.append(measure("client", name, call, stub, args, lambda: _peak_rss_kb(resource.RUSAGE_SELF)))
+    return results
+
+
+def scenario_cli(workloads: List[str], stub: StubDataJud, args: argparse.Namespace, env: Dict[str, str]) -> List[Dict[str, Any]]:
+    results = []
+    for name in workloads:
+        workload = WORKLOADS[name]
+
+        def call(index: int, workload: Dict[str, Any] = workload) -> bool:
+            command = [sys.executable, "-m", "mcp_datajud.cli", "execute", workload["tool"], "--params", json.dumps(workload["params"](index))]
+            completed = subprocess.run(command, env=env, capture_output=True)
+            if completed.returncode != 0:
+                return False
+            output = json.loads(completed.stdout)
+            return not (isinstance(output, dict) and "error" in output)
+
+        # RUSAGE_CHILDREN: maior pico entre os processos da CLI já encerrados
+        results.append(measure("cli", name, call, stub, args, lambda: _peak_rss_kb(resource.RUSAGE_CHILDREN)))
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor encerrou durante a inicialização (código {process.returncode})")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Servidor não respondeu em {timeout}s")
+
+
+def scenario_server(workloads: List[str], stub: StubDataJud, args: argparse.Namespace, env: Dict[str, str]) -> List[Dict[str, Any]]:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "uvicorn", "mcp_datajud.server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen(command, env=env)
+    local = threading.local()
+    results = []
+    try:
+        _wait_ready(url, process)
+        for name in workloads:
+            workload = WORKLOADS[name]
+
+            def call(index: int, workload: Dict[str, Any] = workload) -> bool:
+                # Uma sessão keep-alive por thread de carga
+                session = getattr(local, "session", None)
+                if session is None:
+                    session = local.session = requests.Session()
+                response = session.post(f"{url}/execute", json={"tool_name": workload["tool"], "params": workload["params"](index)}, timeout=120)
+                return response.status_code == 200 and '"error"' not in response.text[:64]
+
+            results.append(measure("server", name, call, stub, args, lambda: _process_peak_rss_kb(process.pid)))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return results
+
+
+RUNNERS = {"client": scenario_client, "cli": scenario_cli, "server": scenario_server}
+
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    from mcp_datajud import json_backend
+    from mcp_datajud.http_client import is_async_available
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_commit": commit,
+        "json_backend": json_backend.BACKEND_NAME,
+        "async_transport": is_async_available(),
+    }
+
+
+def compare(base_path: str, new_path: str) -> None:
+    """Tabela de variação (vazão e p95) por cenário/carga entre duas execuções."""
+    base = json.loads(Path(base_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    previous = {(r["scenario"], r["workload"]): r for r in base["results"]}
+    print(f"{'cenário':>8} {'carga':<22} {'req/s':>22} {'p95 ms':>24} {'upstream/req':>16}")
+    for result in new["results"]:
+        old = previous.get((result["scenario"], result["workload"]))
+        if old is None:
+            continue
+        print(
+            f"{result['scenario']:>8} {result['workload']:<22} "
+            f"{_delta(old['throughput_rps'], result['throughput_rps']):>22} "
+            f"{_delta(old['latency_ms']['p95'], result['latency_ms']['p95']):>24} "
+            f"{_delta(old['upstream_calls_per_request'], result['upstream_calls_per_request']):>16}"
+        )
+
+
+def _delta(old: Optional[float], new: Optional[float]) -> str:
+    if old is None or new is None:
+        return f"{old} -> {new}"
+    change = f" ({(new - old) / old * 100:+.1f}%)" if old else ""
+    return f"{old} -> {new}{change}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks offline do MCP DataJUD contra o stub local")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Cenários (CSV): client, cli, server")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="Cargas (CSV), ver benchmarks/workloads.py")
+    parser.add_argument("--requests", type=int, default=200, help="Chamadas por carga (client/server)")
+    parser.add_argument("--cli-requests", type=int, default=10, help="Chamadas por carga na CLI (um processo cada)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--label", default=None, help="Nome do arquivo de resultado")
+    parser.add_argument("--output", default=None, help="Caminho do JSON (padrão: benchmarks/results/<data>-<label>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NOVO"), help="Compara dois resultados e sai")
+    defaults = StubConfig()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value, help=f"Stub: {name}")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    workloads = [w.strip() for w in args.workloads.split(",") if w.strip()]
+    unknown = [s for s in scenarios if s not in RUNNERS] + [w for w in workloads if w not in WORKLOADS]
+    if unknown:
+        parser.error(f"Cenário/carga desconhecido: {', '.join(unknown)}")
+
+    config = StubConfig(**{name: getattr(args, name) for name in asdict(defaults)})
+    stub = StubDataJud(config).start()
+    env = bench_env(stub.url)
+    results: List[Dict[str, Any]] = []
+    try:
+        for scenario in scenarios:
+            results.extend(RUNNERS[scenario](workloads, stub, args, env))
+    finally:
+        stub.stop()
+
+    started = datetime.now(timezone.utc)
+    label = args.label or "run"
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{started:%Y%m%dT%H%M%S}-{label}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "label": label,
+        "timestamp": started.isoformat(),
+        "environment": environment_info(),
+        "stub": asdict(config),
+        "results": results,
+    }
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""Stub local da API DataJUD para benchmarks offline.
+
+Imita `/api_publica_{tribunal}/_search` (size/from, search_after, filtros `term`/`terms`/`range`/`exists`
+em bool.filter, track_total_hits, filter_path, aggs `terms`/`date_histogram`/`composite`), `_mapping` e point-in-time. Latência, tamanho do
+payload, injeção de 429/5xx e `max_result_window` são configuráveis.
+
+Uso avulso:
+
+    python benchmarks/stub_server.py --port 9200 --latency-ms 20 --error-429-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+_EPOCH = datetime(2024, 1, 1)
+_INDEX_PATH = re.compile(r"^/(api_publica_[\w-]+)/(_search|_mapping|_pit)$")
+
+MAPPING = {
+    "numeroProcesso": {"type": "keyword"},
+    "classe": {"properties": {"codigo": {"type": "long"}, "nome": {"type": "text", "fields": {"keyword": {"type": "keyword"}}}}},
+    "orgaoJulgador": {"properties": {"codigo": {"type": "long"}, "nome": {"type": "text"}}},
+    "assuntos": {"type": "nested", "properties": {"codigo": {"type": "long"}}},
+    "grau": {"type": "keyword"},
+    "dataAjuizamento": {"type": "date"},
+    "dataHoraUltimaAtualizacao": {"type": "date"},
+    "movimentos": {"properties": {"codigo": {"type": "long"}, "nome": {"type": "text"}}},
+}
+
+
+@dataclass
+class StubConfig:
+    docs: int = 5000
+    # Bytes aproximados de `movimentos` por documento (payload típico do DataJUD: 2-20 KB)
+    payload_bytes: int = 2048
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_429_rate: float = 0.0
+    error_5xx_rate: float = 0.0
+    # Como no Elasticsearch: from + size acima disso é rejeitado com 400 (search_after não tem limite)
+    max_result_window: int = 10000
+    seed: int = 42
+
+
+def _make_docs(config: StubConfig) -> List[Dict[str, Any]]:
+    rng = random.Random(config.seed)
+    movimento = {"codigo": 123, "nome": "Juntada de Petição", "dataHora": "2024-01-01T00:00:00"}
+    per_movimento = len(json.dumps(movimento))
+    docs = []
+    for i in range(config.docs):
+        docs.append({
+            "id": f"TJSP_G1_{i:07d}",
+            # Números CNJ da Justiça Estadual de SP (J.TR = 8.26): roteáveis pelo lote
+            "numeroProcesso": f"{i:07d}0220238260100",
+            "grau": "G1",
+            "classe": {"codigo": rng.choice((7, 12, 156, 1116)), "nome": "Procedimento Comum Cível"},
+            "orgaoJulgador": {"codigo": rng.randint(1, 50), "nome": "Vara Cível"},
+            "dataAjuizamento": f"2023-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00",
+            # Crescente com o índice: a ordem da lista é a ordem do sort determinístico
+            "dataHoraUltimaAtualizacao": (_EPOCH + timedelta(seconds=i)).isoformat(),
+            "movimentos": [movimento] * max(0, config.payload_bytes // per_movimento),
+        })
+    return docs
+
+
+def _doc_filter(clause: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    for op in ("term", "terms"):
+        if op in clause:
+            field, value = next(iter(clause[op].items()))
+            values = set(value if isinstance(value, list) else [value])
+            return lambda doc: _field(doc, field) in values
+    if "range" in clause:
+        # Datas ISO comparadas como texto (os documentos do stub usam o mesmo formato)
+        field, bounds = next(iter(clause["range"].items()))
+        gte, lte, lt = bounds.get("gte"), bounds.get("lte"), bounds.get("lt")
+        return lambda doc: _field(doc, field) is not None and (gte is None or str(_field(doc, field)) >= str(gte)) and (lte is None or str(_field(doc, field)) <= str(lte)) and (lt is None or str(_field(doc, field)) < str(lt))
+    if "exists" in clause:
+        return lambda doc: _field(doc, clause["exists"]["field"]) is not None
+    if "bool" in clause:
+        # Só o must_not usado pelas fatias de exportação (documentos sem o campo)
+        negated = [_doc_filter(inner) for inner in clause["bool"].get("must_not") or []]
+        return lambda doc: not any(matches(doc) for matches in negated if matches)
+    return None
+
+
+def _field(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _project(doc: Dict[str, Any], source: Any) -> Any:
+    # _source simplificado: includes/excludes pelo campo de primeiro nível (classe.nome -> classe)
+    if source is None or source is True:
+        return doc
+    if source is False:
+        return None
+    if isinstance(source, (str, list)):
+        source = {"includes": source}
+    includes = source.get("includes") or []
+    excludes = source.get("excludes") or []
+    includes = {path.split(".")[0] for path in ([includes] if isinstance(includes, str) else includes)}
+    excludes = {path.split(".")[0] for path in ([excludes] if isinstance(excludes, str) else excludes)}
+    return {key: value for key, value in doc.items() if (not includes or key in includes) and key not in excludes}
+
+
+def _filter_path(value: Any, paths: List[List[str]]) -> Any:
+    # filter_path do Elasticsearch simplificado: caminhos pontuados, `*` casa um nível; listas são atravessadas
+    if isinstance(value, list):
+        return [item for item in (_filter_path(item, paths) for item in value) if item not in (None, {})]
+    if not isinstance(value, dict):
+        return value if any(not path for path in paths) else None
+    if any(not path for path in paths):
+        return value
+    kept: Dict[str, Any] = {}
+    for key, child in value.items():
+        rest = [path[1:] for path in paths if path[0] in ("*", key)]
+        if rest:
+            filtered = _filter_path(child, rest)
+            if filtered not in (None, {}, []):
+                kept[key] = filtered
+    return kept
+
+
+def _bucket_key(doc: Dict[str, Any], source: Dict[str, Any]) -> Any:
+    kind, conf = next(iter(source.items()))
+    value = _field(doc, conf["field"])
+    if value is None or kind != "date_histogram":
+        return value
+    # Simplificação: a chave é o prefixo da data ISO no tamanho do formato (week/quarter viram dia/mês)
+    return str(value)[:len(conf.get("format") or "yyyy-MM-dd")]
+
+
+def _composite(docs: List[Dict[str, Any]], conf: Dict[str, Any]) -> Dict[str, Any]:
+    names = [next(iter(source)) for source in conf["sources"]]
+    groups: Counter = Counter()
+    for doc in docs:
+        key = tuple(_bucket_key(doc, source[name]) for name, source in zip(names, conf["sources"]))
+        if None not in key:
+            groups[key] += 1
+    ordered = sorted(groups.items())
+    if conf.get("after"):
+        after = tuple(conf["after"][name] for name in names)
+        ordered = [item for item in ordered if item[0] > after]
+    buckets = [{"key": dict(zip(names, key)), "doc_count": count} for key, count in ordered[:conf.get("size", 10)]]
+    result: Dict[str, Any] = {"buckets": buckets}
+    if buckets:
+        result["after_key"] = buckets[-1]["key"]
+    return result
+
+
+def _aggregate(docs: List[Dict[str, Any]], aggs: Dict[str, Any]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, spec in aggs.items():
+        if "composite" in spec:
+            results[name] = _composite(docs, spec["composite"])
+            continue
+        kind = "terms" if "terms" in spec else "date_histogram"
+        groups: Dict[Any, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            key = _bucket_key(doc, {kind: spec[kind]})
+            if key is not None:
+                groups.setdefault(key, []).append(doc)
+        if kind == "terms":
+            ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+            listed = ordered[:spec[kind].get("size", 10)]
+        else:
+            ordered = listed = sorted(groups.items())
+        buckets = []
+        for key, members in listed:
+            bucket: Dict[str, Any] = {"key": key, "doc_count": len(members)}
+            if kind == "date_histogram":
+                bucket["key_as_string"] = key
+            if spec.get("aggs"):
+                bucket.update(_aggregate(members, spec["aggs"]))
+            buckets.append(bucket)
+        results[name] = {"buckets": buckets}
+        if kind == "terms":
+            results[name]["sum_other_doc_count"] = sum(len(members) for _, members in ordered[len(listed):])
+    return results
+
+
+class StubDataJud:
+    """Servidor HTTP em thread; `calls` conta requisições por (rota, status)."""
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or StubConfig()
+        self.docs = _make_docs(self.config)
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._pits: Dict[str, str] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubDataJud":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{route} {status}": count for (route, status), count in sorted(self.calls.items())}
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def _record(self, route: str, status: int) -> None:
+        with self._lock:
+            self.calls[(route, status)] += 1
+
+    def _injected_error(self) -> Optional[int]:
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.config.error_429_rate:
+            return 429
+        if draw < self.config.error_429_rate + self.config.error_5xx_rate:
+            return 503
+        return None
+
+    def _sleep(self) -> None:
+        delay = self.config.latency_ms
+        if self.config.jitter_ms:
+            with self._lock:
+                delay += self._rng.uniform(0, self.config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        docs = self.docs
+        query = body.get("query") or {}
+        for clause in (query.get("bool") or {}).get("filter") or []:
+            matches = _doc_filter(clause)
+            if matches:
+                docs = [doc for doc in docs if matches(doc)]
+        total = len(docs)
+        matched = docs
+        start = int(body.get("from", 0))
+        if body.get("search_after"):
+            # Ordem natural dos documentos = (dataHoraUltimaAtualizacao, id), como o sort determinístico
+            cursor = tuple(body["search_after"][:2])
+            docs = [doc for doc in docs if (doc["dataHoraUltimaAtualizacao"], doc["id"]) > cursor]
+            start = 0
+        page = docs[start:start + int(body.get("size", 10))]
+        response: Dict[str, Any] = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {
+                "hits": [
+                    {"_index": "stub", "_id": doc["id"], "_score": None, "_source": _project(doc, body.get("_source")), "sort": [doc["dataHoraUltimaAtualizacao"], doc["id"]]}
+                    for doc in page
+                ],
+            },
+        }
+        if body.get("track_total_hits", True) is not False:
+            response["hits"]["total"] = {"value": total, "relation": "eq"}
+        if body.get("aggs"):
+            response["aggregations"] = _aggregate(matched, body["aggs"])
+        if body.get("pit"):
+            response["pit_id"] = body["pit"]["id"]
+        return response
+
+    def _handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeçalho e corpo saem em escritas separadas; sem isso, Nagle + ACK atrasado somam ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _reply(self, route: str, status: int, payload: Any, headers: Dict[str, str] | None = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                stub._record(route, status)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else {}
+                url = urlsplit(self.path)
+                path = url.path
+                match = _INDEX_PATH.match(path)
+                route = match.group(2) if match else path
+                stub._sleep()
+
+                if route in ("_search", "/_search"):
+                    status = stub._injected_error()
+                    if status == 429:
+                        self._reply(route, 429, {"error": "too many requests"}, {"Retry-After": "0"})
+                        return
+                    if status:
+                        self._reply(route, status, {"error": "service unavailable"})
+                        return
+                    if int(body.get("from", 0)) + int(body.get("size", 10)) > stub.config.max_result_window:
+                        self._reply(route, 400, {"error": {"type": "illegal_argument_exception", "reason": "Result window is too large"}})
+                        return
+                    response = stub.search(body)
+                    filter_path = parse_qs(url.query).get("filter_path")
+                    if filter_path:
+                        response = _filter_path(response, [entry.split(".") for entry in ",".join(filter_path).split(",")]) or {}
+                    self._reply(route, 200, response)
+                elif route == "_mapping" and match:
+                    self._reply(route, 200, {f"{match.group(1)}_v1": {"mappings": {"properties": MAPPING}}})
+                elif route == "_pit" and match:
+                    pit_id = f"pit-{match.group(1)}-{time.monotonic_ns()}"
+                    stub._pits[pit_id] = match.group(1)
+                    self._reply(route, 200, {"id": pit_id})
+                elif path == "/_pit":
+                    stub._pits.pop(body.get("id"), None)
+                    self._reply("/_pit", 200, {"succeeded": True})
+                else:
+                    self._reply(route, 404, {"error": f"rota desconhecida: {path}"})
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub local da API DataJUD")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    defaults = StubConfig()
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+    config = StubConfig(**{name: getattr(args, name) for name in asdict(defaults)})
+    stub = StubDataJud(config, host=args.host, port=args.port)
+    print(f"Stub DataJUD em {stub.url} ({config.docs} documentos)", flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cargas de trabalho dos benchmarks: ferramenta MCP + parâmetros, iguais nos três cenários.
+
+`params(i)` recebe o índice da chamada e varia a consulta entre chamadas, como no tráfego
+real; chamadas idênticas e simultâneas seriam coalescidas pelo single-flight e a medição
+passaria a refletir só a coalescência. Os números CNJ seguem os documentos do stub
+(`NNNNNNN-02.2023.8.26.0100`, tribunal TJSP).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+# Tribunais configurados no cliente durante os benchmarks (DATAJUD_TRIBUNAIS)
+TRIBUNAIS = "tjsp,tjmg,trt2"
+
+
+def numero_cnj(sequencial: int) -> str:
+    return f"{sequencial:07d}-02.2023.8.26.0100"
+
+
+WORKLOADS: Dict[str, Dict[str, Any]] = {
+    "pagina": {
+        "tool": "tjsp.buscar_processos",
+        "params": lambda i: {"query": {"match_all": {}}, "size": 10, "from": (i % 100) * 10},
+        "description": "Uma página com _source completo",
+    },
+    "pagina_projetada": {
+        "tool": "tjsp.buscar_processos",
+        "params": lambda i: {
+            "size": 100,
+            "from": (i % 20) * 100,
+            "_source": ["numeroProcesso", "classe.nome"],
+            "track_total_hits": False,
+            "compacto": True,
+        },
+        "description": "Página de 100 hits com _source reduzido e linhas compactas",
+    },
+    "todas_paginas": {
+        "tool": "tjsp.buscar_processos",
+        # Tamanho de página variável: corpos distintos, mesmo percurso completo do índice
+        "params": lambda i: {"size": 900 + i % 100, "buscar_todas_paginas": True, "_source": ["numeroProcesso"]},
+        "description": "Loop search_after sobre o índice inteiro",
+    },
+    "por_numero": {
+        "tool": "tjsp.buscar_por_numero",
+        "params": lambda i: {"numeroProcesso": numero_cnj(i)},
+        "description": "Construtor de consulta: term em numeroProcesso",
+    },
+    "por_classe_e_periodo": {
+        "tool": "tjsp.buscar_por_classe_e_periodo",
+        "params": lambda i: {"classe_codigo": [7, 12], "data_inicio": f"2023-01-{1 + i % 28:02d}", "data_fim": "2023-06-30", "size": 100},
+        "description": "Construtor de consulta: terms + range em bool.filter",
+    },
+    "por_orgao": {
+        "tool": "tjsp.buscar_por_orgao",
+        "params": lambda i: {"orgaoJulgador_codigo": [1 + i % 50, 1 + (i + 1) % 50], "size": 100, "compacto": True},
+        "description": "Construtor de consulta: terms em orgaoJulgador.codigo",
+    },
+    "contagem": {
+        "tool": "tjsp.contar_processos",
+        "params": lambda i: {"classe_codigo": [7, 12], "data_inicio": f"2023-01-{1 + i % 28:02d}"},
+        "description": "size 0: só hits.total",
+    },
+    "agregacao": {
+        "tool": "tjsp.agregar_processos",
+        "params": lambda i: {"agrupar_por": ["classe", "periodo"], "data_inicio": f"2023-01-{1 + i % 28:02d}"},
+        "description": "size 0 + terms/date_histogram aninhados (compare com todas_paginas)",
+    },
+    "agregacao_composite": {
+        "tool": "tjsp.agregar_processos",
+        "params": lambda i: {"agrupar_por": ["orgao", "periodo"], "todos_os_buckets": True, "data_inicio": f"2023-01-{1 + i % 28:02d}"},
+        "description": "Todos os buckets via composite paginado (after_key)",
+    },
+    "lote_numeros": {
+        "tool": "todos.buscar_numeros_em_lote",
+        "params": lambda i: {"numerosProcesso": [numero_cnj(n) for n in range(i % 2, 2000, 2)], "tamanho_lote": 500 - i % 10, "_source": ["classe.codigo"]},
+        "description": "1000 números CNJ em lotes terms de ~500",
+    },
+    "fanout": {
+        "tool": "todos.buscar_processos",
+        "params": lambda i: {"size": 10, "from": (i % 100) * 10, "track_total_hits": False},
+        "description": "Mesma consulta em todos os tribunais configurados",
+    },
+}
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import query_builder
+from .http_client import AsyncDataJudSession, DataJudSession
+
+
+# Dimensões com nome curto; qualquer outro valor de `agrupar_por` é usado como campo keyword/numérico
+DIMENSOES: Dict[str, str] = {
+    "classe": "classe.codigo",
+    "orgao": "orgaoJulgador.codigo",
+    "grau": "grau",
+}
+PERIODO = "periodo"
+TRIBUNAL = "tribunal"
+
+# calendar_interval -> formato da chave (key_as_string)
+INTERVALOS: Dict[str, str] = {
+    "day": "yyyy-MM-dd",
+    "week": "yyyy-MM-dd",
+    "month": "yyyy-MM",
+    "quarter": "yyyy-MM",
+    "year": "yyyy",
+}
+
+DEFAULT_LIMIT = 10
+COMPOSITE_PAGE_SIZE = 1000
+# Teto de linhas com todos_os_buckets: a tabela continua em memória (e na resposta MCP)
+MAX_COMPOSITE_ROWS = 100_000
+
+COUNT_COLUMN = "quantidade"
+
+
+def filter_query(params: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Consome os filtros comuns de contar/agregar; devolve a query (bool.filter + `query` livre em must) e o campo de data."""
+    campo_data = params.pop("campo_data", None) or "dataAjuizamento"
+    if campo_data not in query_builder.DATE_FIELDS:
+        raise ValueError(f"campo_data inválido: {campo_data} (use {' ou '.join(query_builder.DATE_FIELDS)})")
+    clauses = [
+        query_builder.term(field, values)
+        for field, values in (
+            ("classe.codigo", params.pop("classe_codigo", None)),
+            ("orgaoJulgador.codigo", params.pop("orgaoJulgador_codigo", None)),
+            ("grau", params.pop("grau", None)),
+        )
+        if query_builder.as_list(values)
+    ]
+    clauses.append(query_builder.range_(campo_data, params.pop("data_inicio", None), params.pop("data_fim", None)))
+    return query_builder.bool_filter(clauses, must=params.pop("query", None)), campo_data
+
+
+def count_body(params: Dict[str, Any]) -> Dict[str, Any]:
+    # size 0: só hits.total volta do DataJUD
+    return {"query": filter_query(params)[0], "size": 0, "track_total_hits": True}
+
+
+def plan_aggregation(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Consome os parâmetros de agregar_processos e monta o plano (corpo base + dimensões)."""
+    agrupar_por = query_builder.as_list(params.pop("agrupar_por", None))
+    if not agrupar_por:
+        raise ValueError(f"Informe agrupar_por (ex.: [\"classe\", \"{PERIODO}\"]; dimensões: {', '.join([*DIMENSOES, PERIODO, TRIBUNAL])} ou um campo).")
+    query, campo_data = filter_query(params)
+    intervalo = params.pop("intervalo", None) or "month"
+    if intervalo not in INTERVALOS:
+        raise ValueError(f"intervalo inválido: {intervalo} (use {', '.join(INTERVALOS)})")
+    limite = int(params.pop("limite", None) or DEFAULT_LIMIT)
+
+    dimensions: List[Tuple[str, Dict[str, Any]]] = []
+    for name in agrupar_por:
+        name = str(name)
+        if name == TRIBUNAL:
+            continue
+        if name == PERIODO:
+            source = {"date_histogram": {"field": campo_data, "calendar_interval": intervalo, "format": INTERVALOS[intervalo]}}
+        else:
+            source = {"terms": {"field": DIMENSOES.get(name, name)}}
+        dimensions.append((name, source))
+    return {
+        "query": query,
+        "dimensions": dimensions,
+        "por_tribunal": TRIBUNAL in agrupar_por,
+        "limite": max(1, limite),
+        "completo": bool(params.pop("todos_os_buckets", False)),
+    }
+
+
+def _nested_aggs(plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # terms/date_histogram aninhados, um nível por dimensão (top-N por contagem em cada terms)
+    aggs: Optional[Dict[str, Any]] = None
+    for index in range(len(plan["dimensions"]) - 1, -1, -1):
+        kind, conf = next(iter(plan["dimensions"][index][1].items()))
+        conf = {**conf, "size": plan["limite"]} if kind == "terms" else {**conf, "min_doc_count": 1}
+        node: Dict[str, Any] = {kind: conf}
+        if aggs:
+            node["aggs"] = aggs
+        aggs = {f"d{index}": node}
+    return aggs
+
+
+def nested_body(plan: Dict[str, Any]) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"query": plan["query"], "size": 0, "track_total_hits": True}
+    aggs = _nested_aggs(plan)
+    if aggs:
+        body["aggs"] = aggs
+    return body
+
+
+def composite_body(plan: Dict[str, Any], after: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    composite: Dict[str, Any] = {
+        "size": COMPOSITE_PAGE_SIZE,
+        "sources": [{f"d{index}": source} for index, (_, source) in enumerate(plan["dimensions"])],
+    }
+    if after:
+        composite["after"] = after
+    # Total exato só na primeira página; as seguintes só avançam o cursor
+    return {"query": plan["query"], "size": 0, "track_total_hits": after is None, "aggs": {"tabela": {"composite": composite}}}
+
+
+def _total(resp: Any) -> Optional[int]:
+    total = resp.get("hits", {}).get("total") if isinstance(resp, dict) else None
+    return total.get("value") if isinstance(total, dict) else total
+
+
+def _flatten(agg: Dict[str, Any], depth: int, prefix: List[Any], rows: List[List[Any]]) -> int:
+    # Percorre os buckets aninhados; devolve quantos documentos ficaram fora do top-N
+    outside = int(agg.get("sum_other_doc_count") or 0)
+    for bucket in agg.get("buckets") or []:
+        key = [*prefix, bucket.get("key_as_string", bucket.get("key"))]
+        child = bucket.get(f"d{depth + 1}")
+        if isinstance(child, dict):
+            outside += _flatten(child, depth + 1, key, rows)
+        else:
+            rows.append([*key, bucket.get("doc_count", 0)])
+    return outside
+
+
+def _columns(plan: Dict[str, Any]) -> List[str]:
+    return [name for name, _ in plan["dimensions"]] + [COUNT_COLUMN]
+
+
+def nested_table(plan: Dict[str, Any], resp: Any) -> Dict[str, Any]:
+    rows: List[List[Any]] = []
+    outside = 0
+    aggregations = resp.get("aggregations") if isinstance(resp, dict) else None
+    if isinstance(aggregations, dict) and isinstance(aggregations.get("d0"), dict):
+        outside = _flatten(aggregations["d0"], 0, [], rows)
+    return {"colunas": _columns(plan), "linhas": rows, "total": _total(resp), "fora_da_tabela": outside, "completo": outside == 0}
+
+
+def _absorb_composite(plan: Dict[str, Any], resp: Any, rows: List[List[Any]]) -> Optional[Dict[str, Any]]:
+    # Acrescenta as linhas da página; devolve o after_key (None = fim)
+    tabela = (resp.get("aggregations") or {}).get("tabela") if isinstance(resp, dict) else None
+    buckets = (tabela or {}).get("buckets") or []
+    for bucket in buckets:
+        key = bucket.get("key") or {}
+        rows.append([key.get(f"d{index}") for index in range(len(plan["dimensions"]))] + [bucket.get("doc_count", 0)])
+    return (tabela or {}).get("after_key") if buckets else None
+
+
+def _composite_table(plan: Dict[str, Any], rows: List[List[Any]], total: Optional[int], truncated: bool) -> Dict[str, Any]:
+    return {"colunas": _columns(plan), "linhas": rows[:MAX_COMPOSITE_ROWS], "total": total, "fora_da_tabela": None, "completo": not truncated}
+
+
+def count(session: DataJudSession, path: str, body: Dict[str, Any]) -> Optional[int]:
+    return _total(session.request(method="POST", path=path, json_body=body))
+
+
+async def acount(session: AsyncDataJudSession, path: str, body: Dict[str, Any]) -> Optional[int]:
+    return _total(await session.request(method="POST", path=path, json_body=body))
+
+
+def aggregate(session: DataJudSession, path: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Tabela de buckets de um índice: top-N aninhado, ou todos os buckets via composite + after_key."""
+    if not plan["dimensions"]:
+        total = count(session, path, nested_body(plan))
+        return {"colunas": [COUNT_COLUMN], "linhas": [[total]], "total": total, "fora_da_tabela": 0, "completo": True}
+    if not plan["completo"]:
+        return nested_table(plan, session.request(method="POST", path=path, json_body=nested_body(plan)))
+    rows: List[List[Any]] = []
+    total: Optional[int] = None
+    after: Optional[Dict[str, Any]] = None
+    while True:
+        resp = session.request(method="POST", path=path, json_body=composite_body(plan, after))
+        if after is None:
+            total = _total(resp)
+        after = _absorb_composite(plan, resp, rows)
+        if after is None or len(rows) >= MAX_COMPOSITE_ROWS:
+            return _composite_table(plan, rows, total, after is not None)
+
+
+async def aaggregate(session: AsyncDataJudSession, path: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Variante assíncrona de `aggregate`."""
+    if not plan["dimensions"]:
+        total = await acount(session, path, nested_body(plan))
+        return {"colunas": [COUNT_COLUMN], "linhas": [[total]], "total": total, "fora_da_tabela": 0, "completo": True}
+    if not plan["completo"]:
+        return nested_table(plan, await session.request(method="POST", path=path, json_body=nested_body(plan)))
+    rows: List[List[Any]] = []
+    total: Optional[int] = None
+    after: Optional[Dict[str, Any]] = None
+    while True:
+        resp = await session.request(method="POST", path=path, json_body=composite_body(plan, after))
+        if after is None:
+            total = _total(resp)
+        after = _absorb_composite(plan, resp, rows)
+        if after is None or len(rows) >= MAX_COMPOSITE_ROWS:
+            return _composite_table(plan, rows, total, after is not None)
+
+
+def with_tribunal(tribunal: str, table: Dict[str, Any]) -> Dict[str, Any]:
+    return {**table, "colunas": [TRIBUNAL, *table["colunas"]], "linhas": [[tribunal, *row] for row in table["linhas"]]}
+
+
+def merge_counts(results: Dict[str, Any], errors: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "total": sum(value or 0 for value in results.values()),
+        "tribunais": results,
+        "errors": errors,
+    }
+
+
+def merge_tables(plan: Dict[str, Any], results: Dict[str, Dict[str, Any]], errors: Dict[str, str]) -> Dict[str, Any]:
+    """Uma tabela para vários tribunais: coluna `tribunal` (se pedida) ou contagens somadas por chave.
+
+    Somas são exatas quando todas as tabelas estão completas; com top-N (`completo: false`), uma
+    chave fora do top-N de algum tribunal fica subcontada.
+    """
+    per_tribunal = {tribunal: {"total": table["total"], "linhas": len(table["linhas"]), "completo": table["completo"]} for tribunal, table in results.items()}
+    tables = list(results.values())
+    merged: Dict[str, Any] = {
+        "total": sum(table["total"] or 0 for table in tables),
+        "fora_da_tabela": None if plan["completo"] else sum(table["fora_da_tabela"] or 0 for table in tables),
+        "completo": all(table["completo"] for table in tables),
+    }
+    if plan["por_tribunal"]:
+        rows = [row for tribunal, table in results.items() for row in with_tribunal(tribunal, table)["linhas"]]
+        return {"colunas": [TRIBUNAL, *_columns(plan)], "linhas": rows, **merged, "tribunais": per_tribunal, "errors": errors}
+
+    sums: Dict[Tuple[Any, ...], int] = {}
+    for table in tables:
+        for row in table["linhas"]:
+            key = tuple(row[:-1])
+            sums[key] = sums.get(key, 0) + (row[-1] or 0)
+    rows = [[*key, quantidade] for key, quantidade in sums.items()]
+    if plan["dimensions"] and plan["dimensions"][0][0] == PERIODO:
+        rows.sort(key=lambda row: str(row[0]))
+    else:
+        rows.sort(key=lambda row: -row[-1])
+    return {"colunas": _columns(plan), "linhas": rows, **merged, "tribunais": per_tribunal, "errors": errors}
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import query_builder
+from .errors import describe_error
+from .fanout import MAX_FANOUT_WORKERS
+from .http_client import AsyncDataJudSession, DataJudSession
+from .pagination import aiter_search_hits, iter_search_hits
+from .projection import compact_hit
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Numeração única (Res. CNJ 65/2008): NNNNNNN-DD.AAAA.J.TR.OOOO -> J no dígito 14, TR nos dígitos 15-16.
+# Código TR das UFs na ordem da resolução (01 = AC ... 27 = TO); DF usa o alias "dft" no DataJUD.
+_UFS = [
+    "ac", "al", "ap", "am", "ba", "ce", "dft", "es", "go", "ma", "mt", "ms", "mg", "pa",
+    "pb", "pr", "pe", "pi", "rj", "rn", "rs", "ro", "rr", "sc", "se", "sp", "to",
+]
+_JUSTICA_MILITAR_ESTADUAL = {13: "tjmmg", 21: "tjmrs", 26: "tjmsp"}
+
+# Chunk: (tribunal, números normalizados)
+Chunk = Tuple[str, List[str]]
+
+
+def _uf(tr: int) -> Optional[str]:
+    return _UFS[tr - 1] if 1 <= tr <= len(_UFS) else None
+
+
+def tribunal_from_cnj(numero: str) -> Optional[str]:
+    """Alias do índice DataJUD a partir do segmento J.TR de um número CNJ normalizado (20 dígitos)."""
+    if len(numero) != 20 or not numero.isdigit():
+        return None
+    justica, tr = numero[13], int(numero[14:16])
+    if justica == "3":
+        return "stj"
+    if justica == "4":
+        return f"trf{tr}" if 1 <= tr <= 6 else None
+    if justica == "5":
+        return "tst" if tr == 0 else (f"trt{tr}" if 1 <= tr <= 24 else None)
+    if justica == "6":
+        return "tse" if tr == 0 else (f"tre-{_uf(tr)}" if _uf(tr) else None)
+    if justica == "7":
+        return "stm"
+    if justica == "8":
+        return f"tj{_uf(tr)}" if _uf(tr) else None
+    if justica == "9":
+        return _JUSTICA_MILITAR_ESTADUAL.get(tr)
+    # 1 (STF) e 2 (CNJ) não têm índice público no DataJUD
+    return None
+
+
+def plan_chunks(numeros: List[Any], paths: Dict[str, str], chunk_size: int) -> Tuple[List[Chunk], Dict[str, Dict[str, Any]]]:
+    """Agrupa os números por tribunal em chunks de até `chunk_size`; os não roteáveis já saem com erro."""
+    por_tribunal: Dict[str, List[str]] = {}
+    unrouted: Dict[str, Dict[str, Any]] = {}
+    for numero in dict.fromkeys(query_builder.normalize_numero_processo(n) for n in numeros):
+        tribunal = tribunal_from_cnj(numero)
+        if tribunal is None:
+            unrouted[numero] = _entry(None, [], "Número CNJ inválido ou de tribunal sem índice no DataJUD")
+        elif tribunal not in paths:
+            unrouted[numero] = _entry(tribunal, [], f"Tribunal não configurado: {tribunal}")
+        else:
+            por_tribunal.setdefault(tribunal, []).append(numero)
+    size = max(1, int(chunk_size))
+    chunks = [
+        (tribunal, membros[start:start + size])
+        for tribunal, membros in por_tribunal.items()
+        for start in range(0, len(membros), size)
+    ]
+    return chunks, unrouted
+
+
+def _entry(tribunal: Optional[str], hits: List[Any], error: Optional[str] = None) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"tribunal": tribunal, "encontrado": bool(hits), "hits": hits}
+    if error:
+        entry["erro"] = error
+    return entry
+
+
+def _with_numero(source: Any) -> Any:
+    # A resposta é agrupada por numeroProcesso: o campo precisa voltar no _source
+    if source is None or source is True:
+        return source
+    if source is False:
+        return ["numeroProcesso"]
+    if isinstance(source, str):
+        return [source, "numeroProcesso"]
+    if isinstance(source, list):
+        return source if "numeroProcesso" in source else [*source, "numeroProcesso"]
+    if isinstance(source, dict) and source.get("includes"):
+        includes = source["includes"] if isinstance(source["includes"], list) else [source["includes"]]
+        return {**source, "includes": includes if "numeroProcesso" in includes else [*includes, "numeroProcesso"]}
+    return source
+
+
+def chunk_body(numeros: List[str], source: Any = None) -> Dict[str, Any]:
+    body = query_builder.filter_search([query_builder.term("numeroProcesso", numeros)])
+    if source is not None:
+        body["_source"] = _with_numero(source)
+    return body
+
+
+def _page_size(numeros: List[str]) -> int:
+    # A folga por grau evita uma segunda página na maioria dos chunks
+    return query_builder.numero_page_size(len(numeros))
+
+
+def _assign(entries: Dict[str, Dict[str, Any]], tribunal: str, numeros: List[str], hits: List[Any], compacto: bool) -> None:
+    grouped: Dict[str, List[Any]] = {numero: [] for numero in numeros}
+    for hit in hits:
+        source = hit.get("_source") if isinstance(hit, dict) else None
+        numero = source.get("numeroProcesso") if isinstance(source, dict) else None
+        if numero in grouped:
+            grouped[numero].append(compact_hit(hit) if compacto else hit)
+    for numero, found in grouped.items():
+        entries[numero] = _entry(tribunal, found)
+
+
+def _assign_error(entries: Dict[str, Dict[str, Any]], tribunal: str, numeros: List[str], exc: Exception) -> None:
+    error = describe_error(exc)
+    for numero in numeros:
+        entries[numero] = _entry(tribunal, [], error)
+
+
+def build_result(numeros: List[Any], entries: Dict[str, Dict[str, Any]], chunks: int) -> Dict[str, Any]:
+    """Mapa número informado -> {tribunal, encontrado, hits[, erro]}, na ordem de entrada."""
+    data = {str(numero): entries[query_builder.normalize_numero_processo(numero)] for numero in numeros}
+    distinct = list(entries.values())
+    return {
+        "data": data,
+        "resumo": {
+            "numeros": len(distinct),
+            "encontrados": sum(1 for entry in distinct if entry["encontrado"]),
+            "nao_encontrados": sum(1 for entry in distinct if not entry["encontrado"] and "erro" not in entry),
+            "erros": sum(1 for entry in distinct if "erro" in entry),
+            "lotes": chunks,
+        },
+    }
+
+
+def batch_lookup(
+    session: DataJudSession,
+    paths: Dict[str, str],
+    numeros: List[Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    source: Any = None,
+    compacto: bool = False,
+    max_workers: int = MAX_FANOUT_WORKERS,
+) -> Dict[str, Any]:
+    """Busca muitos números CNJ com consultas `terms` por tribunal, em paralelo sob o rate limiter da sessão.
+
+    Cada chunk é paginado com search_after, então processos com vários documentos (um por grau)
+    voltam completos. Falhas de um chunk viram `erro` nas entradas dele (resultado parcial).
+    """
+    chunks, entries = plan_chunks(numeros, paths, chunk_size)
+
+    def run(chunk: Chunk) -> List[Any]:
+        tribunal, membros = chunk
+        return list(iter_search_hits(session, "POST", paths[tribunal], chunk_body(membros, source), _page_size(membros)))
+
+    if chunks:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            # copy_context: prazo da chamada (retry.deadline_scope) vale também nas threads
+            futures = [(chunk, executor.submit(contextvars.copy_context().run, run, chunk)) for chunk in chunks]
+            for (tribunal, membros), future in futures:
+                try:
+                    _assign(entries, tribunal, membros, future.result(), compacto)
+                except Exception as exc:
+                    _assign_error(entries, tribunal, membros, exc)
+    return build_result(numeros, entries, len(chunks))
+
+
+async def abatch_lookup(
+    session: AsyncDataJudSession,
+    paths: Dict[str, str],
+    numeros: List[Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    source: Any = None,
+    compacto: bool = False,
+    max_workers: int = MAX_FANOUT_WORKERS,
+) -> Dict[str, Any]:
+    """Variante asyncio de `batch_lookup` (uma corrotina por chunk, no máximo `max_workers` em andamento)."""
+    chunks, entries = plan_chunks(numeros, paths, chunk_size)
+    # Mesmo teto do threadpool síncrono: milhares de chunks não viram milhares de páginas em memória
+    slots = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(chunk: Chunk) -> List[Any]:
+        tribunal, membros = chunk
+        async with slots:
+            return [hit async for hit in aiter_search_hits(session, "POST", paths[tribunal], chunk_body(membros, source), _page_size(membros))]
+
+    outcomes = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    for (tribunal, membros), outcome in zip(chunks, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, Exception):
+            _assign_error(entries, tribunal, membros, outcome)
+        else:
+            _assign(entries, tribunal, membros, outcome, compacto)
+    return build_result(numeros, entries, len(chunks))
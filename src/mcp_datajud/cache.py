@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def make_request_key(method: str, path: str, params: Optional[Dict[str, Any]], json_body: Optional[Dict[str, Any]]) -> str:
+    # Chave = método + caminho do tribunal + query string + corpo ES canônico (chaves ordenadas);
+    # usada pelo cache e pelo single-flight
+    return f"{method.upper()} {path} {canonical_json(params or {})} {canonical_json(json_body or {})}"
+
+
+def is_idempotent_search(method: str, path: str, json_body: Optional[Dict[str, Any]]) -> bool:
+    # Apenas buscas idempotentes; consultas com PIT dependem de estado no servidor
+    if method.upper() not in ("GET", "POST") or not path.endswith("/_search"):
+        return False
+    return not (json_body and "pit" in json_body)
+
+
+class ResponseCache(abc.ABC):
+    """Cache de respostas (bytes) com contadores de hit/miss.
+
+    Misses concorrentes idênticos são coalescidos pela sessão (`SingleFlight`), não aqui.
+    """
+
+    # Backends com E/S (SQLite) rodam fora do event loop em `get_async`/`set_async`
+    blocking_io = False
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _load(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    def _store(self, key: str, payload: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def get(self, key: str) -> Optional[bytes]:
+        payload = self._load(key)
+        with self._stats_lock:
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return payload
+
+    def set(self, key: str, payload: bytes) -> None:
+        self._store(key, payload)
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        if self.blocking_io:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key: str, payload: bytes) -> None:
+        if self.blocking_io:
+            await asyncio.to_thread(self.set, key, payload)
+        else:
+            self.set(key, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class MemoryResponseCache(ResponseCache):
+    """LRU em memória limitado por número de entradas e bytes, com TTL."""
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024) -> None:
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(max_entries, 1)
+        self.max_bytes = max(max_bytes, 1)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _store(self, key: str, payload: bytes) -> None:
+        # Respostas maiores que o orçamento inteiro não são armazenadas
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats.update({"entries": len(self._entries), "bytes": self._bytes})
+        return stats
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache persistente em SQLite (WAL): sobrevive a reinícios e é compartilhado entre workers do pod."""
+
+    blocking_io = True
+    # last_access só é regravado após esta fração do TTL: hits seguidos não viram uma escrita cada
+    TOUCH_FRACTION = 0.1
+
+    def __init__(self, path: str, ttl_seconds: float = 300.0, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(max_entries, 1)
+        self.max_bytes = max(max_bytes, 1)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+
+    def _load(self, key: str) -> Optional[bytes]:
+        # Relógio de parede: o arquivo é compartilhado entre processos
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT payload, expires_at, last_access FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            if now - row[2] >= self.ttl_seconds * self.TOUCH_FRACTION:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return bytes(row[0])
+
+    def _store(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now + self.ttl_seconds, now),
+            )
+            self._evict(now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        stats.update({"entries": entries, "bytes": total_bytes})
+        return stats
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while entries > self.max_entries or total_bytes > self.max_bytes:
+            row = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 1").fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            entries -= 1
+            total_bytes -= row[1]
+
+
+def create_response_cache_from_env() -> Optional[ResponseCache]:
+    # DATAJUD_CACHE_TTL=0 (padrão) desativa o cache; DATAJUD_CACHE_PATH ativa o backend SQLite
+    ttl_seconds = float(os.getenv("DATAJUD_CACHE_TTL", "0") or 0)
+    if ttl_seconds <= 0:
+        return None
+    max_entries = int(os.getenv("DATAJUD_CACHE_MAX_ENTRIES", "1024"))
+    max_bytes = int(os.getenv("DATAJUD_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    path = os.getenv("DATAJUD_CACHE_PATH")
+    if path:
+        return SQLiteResponseCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
+    return MemoryResponseCache(ttl_seconds=ttl_seconds, max_entries=max_entries, max_bytes=max_bytes)
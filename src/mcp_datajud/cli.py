@@ -6,7 +6,12 @@ from typing import Any, Dict
 
 import click
 
-from .client import DataJudClient
+from . import json_backend
+from .client import DEFAULT_BASE_URL, DataJudClient
+from .export import DEFAULT_RECORDS_PER_FILE, DEFAULT_START, FORMATS, BulkExporter
+from .mirror import LocalMirror, default_mirror_dir
+from .parser import parse_tribunais
+from .query_builder import DATE_FIELDS
 
 
 @click.group()
@@ -16,23 +21,134 @@ def main() -> None:
 
 @main.command("list-tools")
 @click.option("--api-key", envvar="DATAJUD_API_KEY", help="Chave da API DataJUD")
-@click.option("--base-url", default="https://api-publica.datajud.cnj.jus.br", show_default=True)
-def list_tools_cmd(api_key: str | None, base_url: str) -> None:
+@click.option("--base-url", envvar="DATAJUD_BASE_URL", default=DEFAULT_BASE_URL, show_default=True)
+@click.option("--segment", default=None, help="Filtra por segmento (superiores, federal, estadual, trabalho, eleitoral, militar)")
+def list_tools_cmd(api_key: str | None, base_url: str, segment: str | None) -> None:
     client = DataJudClient(api_key=api_key, base_url=base_url)
-    tools = client.list_tools()
-    click.echo(json.dumps(tools, ensure_ascii=False, indent=2))
+    tools = client.list_tools(segment=segment)
+    click.echo(json_backend.dumps_pretty(tools))
 
 
 @main.command("execute")
 @click.argument("tool_name", type=str)
 @click.option("--params", type=str, default=None, help='JSON de parâmetros (ex.: {"query": {"match_all": {}}, "size": 5})')
 @click.option("--api-key", envvar="DATAJUD_API_KEY", help="Chave da API DataJUD")
-@click.option("--base-url", default="https://api-publica.datajud.cnj.jus.br", show_default=True)
-def execute_cmd(tool_name: str, params: str | None, api_key: str | None, base_url: str) -> None:
+@click.option("--base-url", envvar="DATAJUD_BASE_URL", default=DEFAULT_BASE_URL, show_default=True)
+@click.option("--stream", is_flag=True, default=False, help="Emite todos os hits como NDJSON (um por linha), sem acumular em memória")
+@click.option("--raw", is_flag=True, default=False, help="Escreve a resposta original do DataJUD (uma página), sem reformatar")
+def execute_cmd(tool_name: str, params: str | None, api_key: str | None, base_url: str, stream: bool, raw: bool) -> None:
     client = DataJudClient(api_key=api_key, base_url=base_url)
     kwargs: Dict[str, Any] = json.loads(params) if params else {}
+    if stream:
+        try:
+            for hit in client.iter_hits(tool_name, **kwargs):
+                click.echo(json_backend.dumps(hit))
+        except Exception as exc:
+            click.echo(json_backend.dumps(client.error_response(exc)), err=True)
+            raise SystemExit(1)
+        return
+    if raw:
+        try:
+            click.echo(client.execute_tool_raw(tool_name, **kwargs))
+        except Exception as exc:
+            click.echo(json_backend.dumps(client.error_response(exc)), err=True)
+            raise SystemExit(1)
+        return
     result = client.execute_tool(tool_name=tool_name, **kwargs)
-    click.echo(json.dumps(result, ensure_ascii=False, indent=2))
+    click.echo(json_backend.dumps_pretty(result))
+
+
+@main.group("mirror")
+def mirror_group() -> None:
+    """Espelho local incremental dos índices (um SQLite por tribunal)."""
+
+
+@mirror_group.command("sync")
+@click.argument("tribunais", nargs=-1, required=True)
+@click.option("--dir", "directory", envvar="DATAJUD_MIRROR_DIR", default=None, help="Diretório do espelho (padrão: ~/.cache/mcp-datajud/mirror)")
+@click.option("--page-size", type=int, default=1000, show_default=True, help="Hits por página do search_after")
+@click.option("--full", is_flag=True, default=False, help="Ignora o high-water mark e baixa o índice inteiro")
+@click.option("--api-key", envvar="DATAJUD_API_KEY", help="Chave da API DataJUD")
+@click.option("--base-url", envvar="DATAJUD_BASE_URL", default=DEFAULT_BASE_URL, show_default=True)
+def mirror_sync_cmd(tribunais: tuple[str, ...], directory: str | None, page_size: int, full: bool, api_key: str | None, base_url: str) -> None:
+    """Baixa o que mudou desde a última sincronização (aceita aliases e segmentos)."""
+    client = DataJudClient(api_key=api_key, base_url=base_url)
+    mirror = LocalMirror(directory or default_mirror_dir())
+    failed = False
+    for tribunal in parse_tribunais(",".join(tribunais)):
+        try:
+            click.echo(json_backend.dumps(mirror.sync(client.session, tribunal, page_size=page_size, full=full)))
+        except Exception as exc:
+            failed = True
+            click.echo(json_backend.dumps({"tribunal": tribunal, **client.error_response(exc)}), err=True)
+    mirror.close()
+    if failed:
+        raise SystemExit(1)
+
+
+@mirror_group.command("status")
+@click.option("--dir", "directory", envvar="DATAJUD_MIRROR_DIR", default=None, help="Diretório do espelho")
+@click.option("--max-age", type=float, envvar="DATAJUD_MIRROR_MAX_AGE", default=0, help="Idade máxima (s) para considerar a cópia fresca")
+def mirror_status_cmd(directory: str | None, max_age: float) -> None:
+    mirror = LocalMirror(directory or default_mirror_dir(), max_age_seconds=max_age)
+    click.echo(json_backend.dumps_pretty(mirror.status()))
+    mirror.close()
+
+
+@main.command("export")
+@click.argument("tribunais", nargs=-1, required=True)
+@click.option("--out", "directory", required=True, type=click.Path(file_okay=False), help="Diretório de saída (um subdiretório por tribunal)")
+@click.option("--format", "formato", type=click.Choice(FORMATS), default="ndjson", show_default=True, help="NDJSON gzip ou Parquet (extra `parquet`)")
+@click.option("--query", type=str, default=None, help="JSON da consulta Elasticsearch (padrão: índice inteiro)")
+@click.option("--source", type=str, default=None, help="Campos do _source, separados por vírgula (padrão: documento completo)")
+@click.option("--date-field", type=click.Choice(DATE_FIELDS), default="dataAjuizamento", show_default=True, help="Campo usado para fatiar o índice")
+@click.option("--start", type=click.DateTime(["%Y-%m-%d"]), default=DEFAULT_START.isoformat(), show_default=True, help="Início do período fatiado (datas anteriores caem na primeira fatia)")
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), default=None, help="Fim do período fatiado (padrão: amanhã)")
+@click.option("--slices", type=int, default=None, help="Fatias por tribunal (padrão: 4 x workers)")
+@click.option("--workers", type=int, default=4, show_default=True, help="Fatias baixadas em paralelo (sob o rate limiter)")
+@click.option("--page-size", type=int, default=1000, show_default=True, help="Hits por página do search_after")
+@click.option("--records-per-file", type=int, default=DEFAULT_RECORDS_PER_FILE, show_default=True, help="Registros por arquivo antes de rotacionar")
+@click.option("--api-key", envvar="DATAJUD_API_KEY", help="Chave da API DataJUD")
+@click.option("--base-url", envvar="DATAJUD_BASE_URL", default=DEFAULT_BASE_URL, show_default=True)
+def export_cmd(
+    tribunais: tuple[str, ...],
+    directory: str,
+    formato: str,
+    query: str | None,
+    source: str | None,
+    date_field: str,
+    start: Any,
+    end: Any,
+    slices: int | None,
+    workers: int,
+    page_size: int,
+    records_per_file: int,
+    api_key: str | None,
+    base_url: str,
+) -> None:
+    """Exporta índices inteiros em fatias paralelas; rodar de novo no mesmo --out retoma do checkpoint.
+
+    NDJSON retoma da última página gravada; Parquet, do início do arquivo que estava aberto.
+    """
+    client = DataJudClient(api_key=api_key, base_url=base_url)
+    try:
+        exporter = BulkExporter(client.session, directory, formato=formato, workers=workers, page_size=page_size, records_per_file=records_per_file)
+        summaries = exporter.export(
+            parse_tribunais(",".join(tribunais)),
+            query=json.loads(query) if query else None,
+            source=[field.strip() for field in source.split(",") if field.strip()] if source else None,
+            date_field=date_field,
+            start=start.date() if start else DEFAULT_START,
+            end=end.date() if end else None,
+            slices=slices,
+        )
+    except (ValueError, ImportError) as exc:
+        click.echo(json_backend.dumps(client.error_response(exc)), err=True)
+        raise SystemExit(1)
+    for summary in summaries:
+        click.echo(json_backend.dumps(summary))
+    if any(summary["erros"] for summary in summaries):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -1,32 +1,120 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any, Dict, List
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
 
-from .errors import APIError, APIRateLimitError, AuthenticationError, NotFoundError
+from . import metrics, tracing
+from .cache import ResponseCache, create_response_cache_from_env
+from .errors import describe_error
 from .generator import build_dynamic_client
-from .http_client import DataJudSession
-from .logging_config import get_json_logger
+from .http_client import AsyncDataJudSession, DataJudSession, is_async_available
+from .logging_config import Lazy, get_json_logger
+from .mapping import MappingIntrospector, create_mapping_introspector_from_env
+from .mirror import LocalMirror, create_mirror_from_env
 from .parser import APIParser
+from .rate_limiter import create_rate_limiter_from_env
+from .retry import deadline_scope
+
+
+DEFAULT_BASE_URL = "https://api-publica.datajud.cnj.jus.br"
 
 
 class DataJudClient:
     def __init__(
         self,
         api_key: str | None = None,
-        base_url: str = "https://api-publica.datajud.cnj.jus.br",
+        base_url: str | None = None,
+        cache: ResponseCache | None = None,
     ) -> None:
         api_key = api_key or os.getenv("DATAJUD_API_KEY")
+        # DATAJUD_BASE_URL aponta o cliente para outro host (ex.: stub local dos benchmarks)
+        base_url = base_url or os.getenv("DATAJUD_BASE_URL") or DEFAULT_BASE_URL
         if not api_key:
             raise ValueError("É necessário fornecer a chave da API DataJUD via parâmetro ou variável de ambiente DATAJUD_API_KEY")
         self.logger = get_json_logger()
-        self.session = DataJudSession(api_key=api_key, base_url=base_url)
+        # Spans OpenTelemetry opcionais (DATAJUD_TRACING); no-op quando desativado
+        tracing.configure_tracing_from_env()
+        # Cache opcional (DATAJUD_CACHE_TTL) compartilhado pelos transportes síncrono e assíncrono
+        self.cache = cache if cache is not None else create_response_cache_from_env()
+        self.session = DataJudSession(
+            api_key=api_key,
+            base_url=base_url,
+            cache=self.cache,
+            rate_limiter=create_rate_limiter_from_env(),
+        )
+        self.singleflight = self.session.singleflight
+        # Orçamento total por chamada de ferramenta (0 = sem limite); não se aplica ao streaming
+        self.tool_deadline_seconds = float(os.getenv("DATAJUD_TOOL_DEADLINE_SECONDS", "0") or 0)
+        # Falhas de ferramenta em WARNING só com DATAJUD_LOG_TOOL_ERRORS=1 (padrão: saída inalterada)
+        self.log_tool_errors = os.getenv("DATAJUD_LOG_TOOL_ERRORS", "0").strip().lower() in ("1", "true", "yes", "on")
         self._parser = APIParser(self.session)
         self._api_spec: Dict[str, Any] = self._parser.load_spec()
         self._client = build_dynamic_client(self._api_spec, self.session)
 
-    # MCP: descobre ferramentas
-    def list_tools(self) -> List[Dict[str, Any]]:
+        # Transporte assíncrono (extra "async") criado no primeiro uso: a CLI nunca paga por ele
+        self.async_session: AsyncDataJudSession | None = None
+        self._async_dynamic_client: Any = None
+        self._tools: List[Dict[str, Any]] | None = None
+
+        # Espelho local opcional (DATAJUD_MIRROR_MAX_AGE): ferramentas de conveniência atendidas sem a API
+        self.mirror: LocalMirror | None = create_mirror_from_env()
+
+        # Introspecção opcional de _mapping (DATAJUD_MAPPING_INTROSPECTION) em segundo plano
+        self.mapping_introspector: MappingIntrospector | None = create_mapping_introspector_from_env(self.session)
+        if self.mapping_introspector is not None:
+            tribunais = [name for name, t_spec in self._api_spec["tribunais"].items() if not t_spec.get("fanout")]
+            self.mapping_introspector.start(tribunais, self._parser._default_input_schema(), self._apply_mapping_schema)
+
+    @property
+    def _async_client(self) -> Any:
+        if self._async_dynamic_client is None and is_async_available():
+            # Compartilha rate limiter, cache, single-flight e breakers com a sessão síncrona
+            self.async_session = AsyncDataJudSession(
+                api_key=self.session.api_key,
+                base_url=self.session.base_url,
+                rate_limiter=self.session.rate_limiter,
+                cache=self.cache,
+                singleflight=self.singleflight,
+                retry_policy=self.session.retry_policy,
+                circuit_breakers=self.session.circuit_breakers,
+            )
+            self._async_dynamic_client = build_dynamic_client(self._api_spec, self.async_session)
+        return self._async_dynamic_client
+
+    def _apply_mapping_schema(self, tribunal: str, input_schema: Dict[str, Any]) -> None:
+        # Chamado pela thread de introspecção: novo schema tipado para o tribunal
+        APIParser.apply_input_schema(self._api_spec, tribunal, input_schema)
+        self._client.invalidate(tribunal)
+        if self._async_dynamic_client is not None:
+            self._async_dynamic_client.invalidate(tribunal)
+        self._tools = None
+
+    def close(self) -> None:
+        self.session.close()
+        if self.mirror is not None:
+            self.mirror.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        if self.async_session is not None:
+            await self.async_session.aclose()
+
+    # Monitoramento: estado dos circuit breakers por endpoint de tribunal
+    def circuit_breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        return self.session.circuit_breakers.snapshot()
+
+    # MCP: descobre ferramentas (calculado uma vez; a spec não muda após a inicialização)
+    def list_tools(self, segment: str | None = None) -> List[Dict[str, Any]]:
+        if self._tools is None:
+            self._tools = self._build_tool_list()
+        if segment:
+            segment = segment.strip().lower()
+            return [tool for tool in self._tools if tool["segment"] == segment]
+        return list(self._tools)
+
+    def _build_tool_list(self) -> List[Dict[str, Any]]:
         tools: List[Dict[str, Any]] = []
         tribunais: Dict[str, Any] = self._api_spec.get("tribunais", {})
         for tribunal, t_spec in tribunais.items():
@@ -35,6 +123,7 @@ class DataJudClient:
                 tool_entry = {
                     "tool_name": method.get("tool_name"),
                     "category": category_name,
+                    "segment": t_spec.get("segment"),
                     "description": method.get("summary", "") + " - " + t_spec.get("description", ""),
                     "input_schema": method.get("parameters", {}),
                 }
@@ -43,29 +132,155 @@ class DataJudClient:
 
     # MCP: executa uma ferramenta
     def execute_tool(self, tool_name: str, **kwargs: Any) -> Dict[str, Any]:
-        try:
-            if "." not in tool_name:
-                return {"error": "Nome de ferramenta inválido. Use o formato categoria.metodo (ex.: tjsp.buscar_processos)."}
-            category, method = tool_name.split(".", 1)
-            category_obj = getattr(self._client, category, None)
-            if category_obj is None:
-                return {"error": f"Categoria '{category}' não encontrada."}
-            method_to_call = getattr(category_obj, method, None)
-            if method_to_call is None:
-                return {"error": f"Método '{method}' não encontrado em '{category}'."}
-
-            result = method_to_call(**kwargs)
-            return result if isinstance(result, dict) else {"data": result}
-
-        except APIRateLimitError:
-            return {"error": "A solicitação não pôde ser completada pois o limite de chamadas à API foi excedido. Por favor, tente novamente mais tarde."}
-        except AuthenticationError:
-            return {"error": "Falha na autenticação. Verifique se sua chave da API está correta e válida."}
-        except NotFoundError:
-            return {"error": "O recurso solicitado não foi encontrado. Verifique se os identificadores fornecidos estão corretos."}
-        except APIError as e:
-            return {"error": f"Erro da API: {e.message}"}
-        except TypeError as e:
-            return {"error": f"Parâmetros inválidos para a ferramenta: {e}"}
-        except Exception as e:
-            return {"error": f"Erro inesperado: {e}"}
+        start = time.perf_counter()
+        with tracing.span("mcp.execute_tool", {"mcp.tool_name": tool_name}) as span:
+            try:
+                local = self.mirror.serve(tool_name, kwargs) if self.mirror is not None else None
+                if local is not None:
+                    span.set_attribute("datajud.mirror", True)
+                    metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+                    return local
+
+                method_to_call, error = self._resolve_tool(self._client, tool_name)
+                if error:
+                    return error
+
+                with deadline_scope(self.tool_deadline_seconds):
+                    result = method_to_call(**kwargs)
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+                return result if isinstance(result, dict) else {"data": result}
+
+            except Exception as e:
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "error")
+                tracing.mark_error(span, e)
+                self._log_failure(tool_name, kwargs, e, start)
+                return self.error_response(e)
+
+    # MCP: executa uma ferramenta sem ocupar threads (extra "async"; senão delega ao threadpool)
+    async def execute_tool_async(self, tool_name: str, **kwargs: Any) -> Dict[str, Any]:
+        if self._async_client is None:
+            return await asyncio.to_thread(self.execute_tool, tool_name, **kwargs)
+        start = time.perf_counter()
+        with tracing.span("mcp.execute_tool", {"mcp.tool_name": tool_name}) as span:
+            try:
+                # SQLite fora do event loop
+                local = await asyncio.to_thread(self.mirror.serve, tool_name, kwargs) if self.mirror is not None else None
+                if local is not None:
+                    span.set_attribute("datajud.mirror", True)
+                    metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+                    return local
+
+                method_to_call, error = self._resolve_tool(self._async_client, tool_name)
+                if error:
+                    return error
+
+                with deadline_scope(self.tool_deadline_seconds):
+                    result = await method_to_call(**kwargs)
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+                return result if isinstance(result, dict) else {"data": result}
+
+            except Exception as e:
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "error")
+                tracing.mark_error(span, e)
+                self._log_failure(tool_name, kwargs, e, start)
+                return self.error_response(e)
+
+    # Repasse: página única com os bytes originais do DataJUD (sem parse/serialização); levanta exceções
+    def execute_tool_raw(self, tool_name: str, **kwargs: Any) -> bytes:
+        raw_method = self._resolve_raw(self._client, tool_name)
+        start = time.perf_counter()
+        with tracing.span("mcp.execute_tool", {"mcp.tool_name": tool_name, "mcp.raw": True}) as span:
+            try:
+                with deadline_scope(self.tool_deadline_seconds):
+                    payload = raw_method(**kwargs)
+            except Exception as e:
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "error")
+                tracing.mark_error(span, e)
+                raise
+        metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+        return payload
+
+    async def execute_tool_raw_async(self, tool_name: str, **kwargs: Any) -> bytes:
+        if self._async_client is None:
+            return await asyncio.to_thread(self.execute_tool_raw, tool_name, **kwargs)
+        raw_method = self._resolve_raw(self._async_client, tool_name)
+        start = time.perf_counter()
+        with tracing.span("mcp.execute_tool", {"mcp.tool_name": tool_name, "mcp.raw": True}) as span:
+            try:
+                with deadline_scope(self.tool_deadline_seconds):
+                    payload = await raw_method(**kwargs)
+            except Exception as e:
+                metrics.observe_tool(tool_name, time.perf_counter() - start, "error")
+                tracing.mark_error(span, e)
+                raise
+        metrics.observe_tool(tool_name, time.perf_counter() - start, "ok")
+        return payload
+
+    # Streaming: itera hits com search_after sem acumular o resultado em memória
+    def iter_hits(self, tool_name: str, **kwargs: Any) -> Iterator[Any]:
+        iter_method = self._resolve_iterator(self._client, tool_name)
+        return iter_method(**kwargs)
+
+    async def aiter_hits(self, tool_name: str, **kwargs: Any) -> AsyncIterator[Any]:
+        if self._async_client is None:
+            sync_iterator = self.iter_hits(tool_name, **kwargs)
+            sentinel = object()
+            while True:
+                hit = await asyncio.to_thread(next, sync_iterator, sentinel)
+                if hit is sentinel:
+                    return
+                yield hit
+        iter_method = self._resolve_iterator(self._async_client, tool_name)
+        async for hit in iter_method(**kwargs):
+            yield hit
+
+    @staticmethod
+    def _resolve_iterator(dynamic_client: Any, tool_name: str) -> Callable[..., Any]:
+        iter_method = dynamic_client.resolve(tool_name, "iter")
+        if iter_method is not None:
+            return iter_method
+        category = tool_name.partition(".")[0]
+        if category not in dynamic_client.__api_spec__.get("tribunais", {}):
+            raise ValueError(f"Categoria '{category}' não encontrada.")
+        raise ValueError(f"Ferramenta '{tool_name}' não suporta iteração (use tribunal.buscar_processos ou tribunal.buscar_por_*).")
+
+    @staticmethod
+    def _resolve_raw(dynamic_client: Any, tool_name: str) -> Callable[..., Any]:
+        raw_method = dynamic_client.resolve(tool_name, "raw")
+        if raw_method is not None:
+            return raw_method
+        category = tool_name.partition(".")[0]
+        if category not in dynamic_client.__api_spec__.get("tribunais", {}):
+            raise ValueError(f"Categoria '{category}' não encontrada.")
+        raise ValueError(f"Ferramenta '{tool_name}' não suporta modo raw (use tribunal.buscar_processos ou tribunal.buscar_por_*).")
+
+    @staticmethod
+    def _resolve_tool(dynamic_client: Any, tool_name: str) -> Tuple[Callable[..., Any] | None, Dict[str, Any] | None]:
+        # Caminho rápido: tabela de rotas (dict); o restante só monta a mensagem de erro
+        method_to_call = dynamic_client.resolve(tool_name)
+        if method_to_call is not None:
+            return method_to_call, None
+        if "." not in tool_name:
+            return None, {"error": "Nome de ferramenta inválido. Use o formato categoria.metodo (ex.: tjsp.buscar_processos)."}
+        category, method = tool_name.split(".", 1)
+        if category not in dynamic_client.__api_spec__.get("tribunais", {}):
+            return None, {"error": f"Categoria '{category}' não encontrada."}
+        return None, {"error": f"Método '{method}' não encontrado em '{category}'."}
+
+    def _log_failure(self, tool_name: str, kwargs: Dict[str, Any], exc: Exception, start: float) -> None:
+        if not self.log_tool_errors:
+            return
+        # Parâmetros completos (ex.: milhares de números CNJ) só são serializados se o registro sair
+        self.logger.warning(
+            "Falha na ferramenta DataJUD",
+            extra={
+                "tool_name": tool_name,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "params": Lazy(lambda: {"argumentos": kwargs, "erro": describe_error(exc)}),
+                "log_key": (tool_name, type(exc).__name__),
+            },
+        )
+
+    @staticmethod
+    def error_response(exc: Exception) -> Dict[str, Any]:
+        return {"error": describe_error(exc)}
@@ -18,3 +18,32 @@ class NotFoundError(APIError):
 
 class APIRateLimitError(APIError):
     pass
+
+
+class CircuitOpenError(APIError):
+    pass
+
+
+class DeadlineExceededError(APIError):
+    pass
+
+
+def describe_error(exc: Exception) -> str:
+    # Mensagens PT-BR estáveis expostas às LLMs (ver contrato MCP)
+    if isinstance(exc, APIRateLimitError):
+        return "A solicitação não pôde ser completada pois o limite de chamadas à API foi excedido. Por favor, tente novamente mais tarde."
+    if isinstance(exc, AuthenticationError):
+        return "Falha na autenticação. Verifique se sua chave da API está correta e válida."
+    if isinstance(exc, NotFoundError):
+        return "O recurso solicitado não foi encontrado. Verifique se os identificadores fornecidos estão corretos."
+    if isinstance(exc, CircuitOpenError):
+        return "O tribunal consultado está temporariamente indisponível no DataJUD. Tente novamente em instantes."
+    if isinstance(exc, DeadlineExceededError):
+        return "A consulta excedeu o tempo máximo permitido. Refine os filtros ou tente novamente mais tarde."
+    if isinstance(exc, APIError):
+        return f"Erro da API: {exc.message}"
+    if isinstance(exc, TypeError):
+        return f"Parâmetros inválidos para a ferramenta: {exc}"
+    if isinstance(exc, ValueError):
+        return str(exc)
+    return f"Erro inesperado: {exc}"
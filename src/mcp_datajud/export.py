@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import contextvars
+import gzip
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import json_backend, query_builder
+from .errors import describe_error
+from .http_client import DataJudSession
+from .logging_config import get_json_logger
+from .pagination import iter_search_pages
+
+try:  # Extra opcional: pip install mcp-datajud[parquet]
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:  # pragma: no cover - depende do ambiente
+    pyarrow = None
+    pyarrow_parquet = None
+
+
+FORMATS = ("ndjson", "parquet")
+DEFAULT_START = date(2000, 1, 1)
+DEFAULT_RECORDS_PER_FILE = 100_000
+
+_MANIFEST = "_export.json"
+_CHECKPOINT_DIR = "_checkpoints"
+
+# Colunas fixas do Parquet: o _source do DataJUD é aninhado e varia entre documentos, então
+# os campos de filtro mais usados saem como colunas e o documento completo vai em `source` (JSON)
+_PARQUET_COLUMNS = ("_id", "numeroProcesso", "classe_codigo", "orgaoJulgador_codigo", "dataAjuizamento", "dataHoraUltimaAtualizacao", "source")
+
+
+def plan_date_slices(start: date, end: date, slices: int) -> List[Dict[str, Any]]:
+    """Fatias disjuntas `[gte, lt)` de mesma largura entre `start` e `end`.
+
+    A primeira e a última ficam abertas nas pontas (nenhuma data fica de fora) e uma fatia
+    extra (`sem_data`) pega os documentos sem o campo de data.
+    """
+    if end <= start:
+        raise ValueError(f"Período inválido: {start.isoformat()} a {end.isoformat()}")
+    days = (end - start).days
+    count = max(1, min(int(slices), days))
+    bounds = [start + timedelta(days=days * i // count) for i in range(count + 1)]
+    planned: List[Dict[str, Any]] = []
+    for i in range(count):
+        entry: Dict[str, Any] = {"id": i}
+        if i > 0:
+            entry["gte"] = bounds[i].isoformat()
+        if i < count - 1:
+            entry["lt"] = bounds[i + 1].isoformat()
+        planned.append(entry)
+    planned.append({"id": count, "sem_data": True})
+    return planned
+
+
+def slice_clause(date_field: str, fatia: Dict[str, Any]) -> Dict[str, Any]:
+    if fatia.get("sem_data"):
+        return {"bool": {"must_not": [{"exists": {"field": date_field}}]}}
+    bounds = {op: fatia[op] for op in ("gte", "lt") if op in fatia}
+    if not bounds:
+        # Fatia única: todo documento com data
+        return {"exists": {"field": date_field}}
+    return {"range": {date_field: {**bounds, "format": "yyyy-MM-dd"}}}
+
+
+def slice_body(query: Optional[Dict[str, Any]], date_field: str, fatia: Dict[str, Any], source: Any = None) -> Dict[str, Any]:
+    """Consulta do usuário (must) restrita à fatia (filter), com o sort determinístico do search_after."""
+    must = None if not query or "match_all" in query else query
+    body: Dict[str, Any] = {
+        "query": query_builder.bool_filter([slice_clause(date_field, fatia)], must=must),
+        "sort": list(query_builder.DETERMINISTIC_SORT),
+        "track_total_hits": False,
+    }
+    if source is not None:
+        body["_source"] = source
+    return body
+
+
+def _codigo(source: Dict[str, Any], field: str) -> Any:
+    value = source.get(field)
+    return value.get("codigo") if isinstance(value, dict) else None
+
+
+class _NdjsonPart:
+    """Arquivo NDJSON gzip; escrito em `.tmp` e renomeado só em `commit` (partes visíveis estão completas).
+
+    Cada página vira um membro gzip próprio (o arquivo final continua um gzip válido), então o
+    `.tmp` pode ser truncado no fim da última página do checkpoint e continuado na retomada.
+    """
+
+    extension = ".ndjson.gz"
+    resumable = True
+
+    def __init__(self, path: str, compresslevel: int = 6, resume: Optional[Tuple[int, int]] = None) -> None:
+        self.path = path
+        self.records = 0
+        self.compresslevel = compresslevel
+        if resume is not None:
+            size, self.records = resume
+            self._file = open(path + ".tmp", "r+b")
+            self._file.truncate(size)
+            self._file.seek(size)
+        else:
+            self._file = open(path + ".tmp", "wb")
+
+    def write(self, hits: List[Any]) -> None:
+        lines = []
+        for hit in hits:
+            if isinstance(hit, dict):
+                lines.append(json_backend.dumps_bytes({"_id": hit.get("_id"), "_source": hit.get("_source")}))
+        self._file.write(gzip.compress(b"\n".join(lines) + b"\n", compresslevel=self.compresslevel))
+        self._file.flush()
+        self.records += len(lines)
+
+    def size(self) -> int:
+        return self._file.tell()
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def close(self) -> None:
+        # Mantém o `.tmp`: o checkpoint aponta para o fim da última página gravada
+        self._file.close()
+
+
+class _ParquetPart:
+    """Arquivo Parquet (zstd) com um row group por página de hits.
+
+    O rodapé só é escrito no `commit`, então um `.tmp` interrompido não pode ser continuado: a
+    retomada recomeça a parte inteira.
+    """
+
+    extension = ".parquet"
+    resumable = False
+
+    def __init__(self, path: str, compresslevel: int = 6) -> None:
+        self.path = path
+        self.records = 0
+        self._schema = pyarrow.schema([
+            ("_id", pyarrow.string()),
+            ("numeroProcesso", pyarrow.string()),
+            ("classe_codigo", pyarrow.int64()),
+            ("orgaoJulgador_codigo", pyarrow.int64()),
+            ("dataAjuizamento", pyarrow.string()),
+            ("dataHoraUltimaAtualizacao", pyarrow.string()),
+            ("source", pyarrow.string()),
+        ])
+        self._writer = pyarrow_parquet.ParquetWriter(path + ".tmp", self._schema, compression="zstd")
+
+    def write(self, hits: List[Any]) -> None:
+        columns: Dict[str, List[Any]] = {name: [] for name in _PARQUET_COLUMNS}
+        for hit in hits:
+            source = hit.get("_source") if isinstance(hit, dict) else None
+            if not isinstance(source, dict):
+                source = {}
+            columns["_id"].append(hit.get("_id") if isinstance(hit, dict) else None)
+            columns["numeroProcesso"].append(source.get("numeroProcesso"))
+            columns["classe_codigo"].append(_codigo(source, "classe"))
+            columns["orgaoJulgador_codigo"].append(_codigo(source, "orgaoJulgador"))
+            columns["dataAjuizamento"].append(source.get("dataAjuizamento"))
+            columns["dataHoraUltimaAtualizacao"].append(source.get("dataHoraUltimaAtualizacao"))
+            columns["source"].append(json_backend.dumps(source))
+        self._writer.write_table(pyarrow.table(columns, schema=self._schema))
+        self.records += len(hits)
+
+    def commit(self) -> None:
+        self._writer.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def close(self) -> None:
+        self._writer.close()
+        os.remove(self.path + ".tmp")
+
+
+_WRITERS = {"ndjson": _NdjsonPart, "parquet": _ParquetPart}
+
+
+def _write_json(path: str, value: Any) -> None:
+    # Escrita atômica: um checkpoint nunca fica pela metade
+    with open(path + ".tmp", "w", encoding="utf-8") as handle:
+        handle.write(json_backend.dumps(value))
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path: str) -> Any:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as handle:
+        return json_backend.loads(handle.read())
+
+
+class BulkExporter:
+    """Exporta índices inteiros (ou uma consulta) para arquivos rotativos NDJSON gzip ou Parquet.
+
+    Cada tribunal é dividido em fatias disjuntas por intervalo de `date_field`. As fatias de
+    todos os tribunais rodam num pool de `workers` threads sob o rate limiter da sessão, cada
+    uma paginando com search_after e escrevendo as próprias partes. Memória: uma página por
+    worker. Ao fechar cada parte, o checkpoint da fatia guarda o cursor (`search_after`) e o
+    número da próxima parte; no NDJSON, ele também é gravado a cada página, com o tamanho do
+    `.tmp` da parte aberta. Rodar de novo no mesmo diretório retoma de onde parou (NDJSON: da
+    última página; Parquet: do início da parte aberta).
+    """
+
+    def __init__(
+        self,
+        session: DataJudSession,
+        directory: str,
+        formato: str = "ndjson",
+        workers: int = 4,
+        page_size: int = 1000,
+        records_per_file: int = DEFAULT_RECORDS_PER_FILE,
+        compresslevel: int = 6,
+    ) -> None:
+        if formato not in FORMATS:
+            raise ValueError(f"Formato inválido: {formato} (use {' ou '.join(FORMATS)})")
+        if formato == "parquet" and pyarrow is None:
+            raise ImportError("Formato parquet requer pyarrow. Instale com: pip install 'mcp-datajud[parquet]'")
+        self.session = session
+        self.directory = directory
+        self.formato = formato
+        self.workers = max(1, int(workers))
+        self.page_size = page_size
+        self.records_per_file = max(1, int(records_per_file))
+        self.compresslevel = compresslevel
+        self.logger = get_json_logger()
+        self._stop = threading.Event()
+
+    def _tribunal_dir(self, tribunal: str) -> str:
+        return os.path.join(self.directory, tribunal)
+
+    def _checkpoint_path(self, tribunal: str, fatia: Dict[str, Any]) -> str:
+        return os.path.join(self._tribunal_dir(tribunal), _CHECKPOINT_DIR, f"s{fatia['id']:03d}.json")
+
+    def _manifest_end(self, tribunal: str) -> Optional[date]:
+        existing = _read_json(os.path.join(self._tribunal_dir(tribunal), _MANIFEST))
+        fim = existing.get("fim") if isinstance(existing, dict) else None
+        return date.fromisoformat(fim) if fim else None
+
+    def _prepare(self, tribunal: str, plan: Dict[str, Any]) -> None:
+        base = self._tribunal_dir(tribunal)
+        os.makedirs(os.path.join(base, _CHECKPOINT_DIR), exist_ok=True)
+        manifest_path = os.path.join(base, _MANIFEST)
+        existing = _read_json(manifest_path)
+        if existing is not None and existing != plan:
+            raise ValueError(
+                f"{base} contém checkpoints de outra exportação (consulta, fatias ou formato diferentes); "
+                "use outro diretório ou apague o anterior"
+            )
+        if existing is None:
+            _write_json(manifest_path, plan)
+
+    def _run_slice(self, tribunal: str, fatia: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+        checkpoint_path = self._checkpoint_path(tribunal, fatia)
+        state = _read_json(checkpoint_path) or {"parte": 0, "search_after": None, "documentos": 0, "concluida": False}
+        if state["concluida"]:
+            return {**state, "retomada": False}
+        writer_cls = _WRITERS[self.formato]
+
+        def part_path() -> str:
+            return os.path.join(self._tribunal_dir(tribunal), f"parte-s{fatia['id']:03d}-{state['parte']:05d}{writer_cls.extension}")
+
+        part = None
+        # Parte aberta no checkpoint (só NDJSON): continua do fim da última página gravada
+        aberta = state.get("parte_aberta")
+        if aberta:
+            tmp = part_path() + ".tmp"
+            if writer_cls.resumable and os.path.exists(tmp) and os.path.getsize(tmp) >= aberta["bytes"]:
+                part = writer_cls(part_path(), self.compresslevel, resume=(aberta["bytes"], aberta["registros"]))
+            else:
+                # Sem o `.tmp`, a parte é refeita desde o cursor em que começou
+                state = {**state, "search_after": aberta["search_after"], "parte_aberta": None}
+                aberta = None
+        resumed = state["search_after"] is not None
+        if resumed:
+            body = {**body, "search_after": state["search_after"]}
+
+        try:
+            for page in iter_search_pages(self.session, "POST", f"/api_publica_{tribunal}/_search", body, self.page_size):
+                if self._stop.is_set():
+                    raise InterruptedError("Exportação interrompida")
+                if part is None:
+                    part = writer_cls(part_path(), self.compresslevel)
+                    aberta = {"search_after": state["search_after"]}
+                part.write(page)
+                last = page[-1] if isinstance(page[-1], dict) else {}
+                if part.records >= self.records_per_file:
+                    part.commit()
+                    state = {
+                        "parte": state["parte"] + 1,
+                        "search_after": last.get("sort"),
+                        "documentos": state["documentos"] + part.records,
+                        "concluida": False,
+                    }
+                    _write_json(checkpoint_path, state)
+                    part = None
+                elif part.resumable:
+                    aberta = {**aberta, "bytes": part.size(), "registros": part.records}
+                    state = {**state, "search_after": last.get("sort"), "parte_aberta": aberta}
+                    _write_json(checkpoint_path, state)
+            if part is not None:
+                part.commit()
+                state = {**state, "parte": state["parte"] + 1, "documentos": state["documentos"] + part.records}
+                part = None
+            state = {**state, "search_after": None, "parte_aberta": None, "concluida": True}
+            _write_json(checkpoint_path, state)
+        finally:
+            # NDJSON mantém o `.tmp` até a última página do checkpoint; Parquet descarta a parte
+            if part is not None:
+                part.close()
+        return {**state, "retomada": resumed}
+
+    def export(
+        self,
+        tribunais: List[str],
+        query: Optional[Dict[str, Any]] = None,
+        source: Any = None,
+        date_field: str = "dataAjuizamento",
+        start: date = DEFAULT_START,
+        end: Optional[date] = None,
+        slices: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Exporta cada tribunal e devolve um resumo por tribunal (fatias com falha vão em `erros`)."""
+        if date_field not in query_builder.DATE_FIELDS:
+            raise ValueError(f"Campo de data inválido: {date_field} (use {' ou '.join(query_builder.DATE_FIELDS)})")
+        tasks: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+        for tribunal in tribunais:
+            # Sem `end`, a retomada usa o fim gravado no manifesto: o padrão (amanhã) muda a cada dia
+            fim = end or self._manifest_end(tribunal) or date.today() + timedelta(days=1)
+            # Mais fatias que workers: fatias curtas liberam a thread para as longas (períodos desiguais)
+            fatias = plan_date_slices(start, fim, slices or 4 * self.workers)
+            plan = {"tribunal": tribunal, "query": query, "_source": source, "campo_data": date_field, "fim": fim.isoformat(), "fatias": fatias, "formato": self.formato}
+            self._prepare(tribunal, plan)
+            tasks.extend((tribunal, fatia, slice_body(query, date_field, fatia, source)) for fatia in fatias)
+
+        started = time.perf_counter()
+        outcomes: Dict[str, List[Tuple[Dict[str, Any], Any]]] = {tribunal: [] for tribunal in tribunais}
+        self._stop.clear()
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(tasks))) as executor:
+            # copy_context: prazo da chamada (retry.deadline_scope) vale também nas threads
+            futures = [(tribunal, fatia, executor.submit(contextvars.copy_context().run, self._run_slice, tribunal, fatia, body)) for tribunal, fatia, body in tasks]
+            try:
+                for tribunal, fatia, future in futures:
+                    try:
+                        outcomes[tribunal].append((fatia, future.result()))
+                    except Exception as exc:
+                        outcomes[tribunal].append((fatia, exc))
+            except BaseException:
+                # Ctrl+C: as fatias param na próxima página; os checkpoints permitem retomar
+                self._stop.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+        duration = round(time.perf_counter() - started, 3)
+        summaries = []
+        for tribunal, results in outcomes.items():
+            done = [result for _, result in results if isinstance(result, dict)]
+            summary = {
+                "tribunal": tribunal,
+                "formato": self.formato,
+                "documentos": sum(result["documentos"] for result in done),
+                "arquivos": sum(result["parte"] for result in done),
+                "fatias": len(results),
+                "fatias_retomadas": sum(1 for result in done if result["retomada"]),
+                "erros": {f"s{fatia['id']:03d}": describe_error(result) for fatia, result in results if isinstance(result, Exception)},
+                "diretorio": self._tribunal_dir(tribunal),
+                "duracao_s": duration,
+            }
+            self.logger.info("Exportação DataJUD concluída", extra={"tool_name": "export", "params": summary})
+            summaries.append(summary)
+        return summaries
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from .errors import describe_error
+
+
+# Limite de threads no modo síncrono; o rate limiter compartilhado continua ditando o ritmo real
+MAX_FANOUT_WORKERS = 16
+
+
+def _result_hits(result: Any) -> Tuple[List[Any], Any]:
+    # Aceita a resposta ES crua, o formato agregado { data, pagination } e o compacto { data, total }
+    if not isinstance(result, dict):
+        return [], None
+    if "data" in result and isinstance(result["data"], list):
+        return result["data"], result.get("total", len(result["data"]))
+    hits = result.get("hits", {})
+    total = hits.get("total")
+    if isinstance(total, dict):
+        total = total.get("value")
+    return hits.get("hits", []), total
+
+
+def merge_results(results: Dict[str, Any], errors: Dict[str, str]) -> Dict[str, Any]:
+    """Intercala os hits por tribunal (round-robin) com atribuição em `tribunal`."""
+    per_tribunal: Dict[str, Dict[str, Any]] = {}
+    queues: List[Tuple[str, List[Any]]] = []
+    for tribunal, result in results.items():
+        hits, total = _result_hits(result)
+        per_tribunal[tribunal] = {"total": total, "fetched": len(hits)}
+        queues.append((tribunal, hits))
+
+    # Intercalar evita que um tribunal volumoso esconda os demais quando a lista é truncada
+    merged: List[Any] = []
+    longest = max((len(hits) for _, hits in queues), default=0)
+    for position in range(longest):
+        for tribunal, hits in queues:
+            if position < len(hits):
+                hit = hits[position]
+                merged.append({**hit, "tribunal": tribunal} if isinstance(hit, dict) else {"tribunal": tribunal, "hit": hit})
+
+    return {"data": merged, "tribunais": per_tribunal, "errors": errors}
+
+
+def fanout_map(
+    targets: List[str],
+    call: Callable[[str], Any],
+    max_workers: int = MAX_FANOUT_WORKERS,
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Executa `call(tribunal)` em paralelo; devolve (resultados, erros) por tribunal."""
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    if not targets:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as executor:
+        # copy_context: prazo da chamada (retry.deadline_scope) vale também nas threads
+        futures = {tribunal: executor.submit(contextvars.copy_context().run, call, tribunal) for tribunal in targets}
+        for tribunal, future in futures.items():
+            try:
+                results[tribunal] = future.result()
+            except Exception as exc:
+                errors[tribunal] = describe_error(exc)
+    return results, errors
+
+
+async def afanout_map(
+    targets: List[str],
+    call: Callable[[str], Awaitable[Any]],
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Variante asyncio de `fanout_map` (uma corrotina por tribunal)."""
+    outcomes = await asyncio.gather(*(call(tribunal) for tribunal in targets), return_exceptions=True)
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for tribunal, outcome in zip(targets, outcomes):
+        if isinstance(outcome, asyncio.CancelledError):
+            raise outcome
+        if isinstance(outcome, Exception):
+            errors[tribunal] = describe_error(outcome)
+        else:
+            results[tribunal] = outcome
+    return results, errors
+
+
+def fanout_search(
+    targets: List[str],
+    search: Callable[[str], Any],
+    max_workers: int = MAX_FANOUT_WORKERS,
+) -> Dict[str, Any]:
+    """Executa `search(tribunal)` em paralelo; falhas viram erros por tribunal (resultado parcial)."""
+    return merge_results(*fanout_map(targets, search, max_workers))
+
+
+async def afanout_search(
+    targets: List[str],
+    search: Callable[[str], Awaitable[Any]],
+) -> Dict[str, Any]:
+    """Variante asyncio de `fanout_search` (uma corrotina por tribunal)."""
+    return merge_results(*await afanout_map(targets, search))
@@ -3,19 +3,49 @@ from __future__ import annotations
 import inspect
 import types
 import keyword
-from typing import Any, Callable, Dict
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
 
-from .http_client import DataJudSession
+from . import aggregation, query_builder, tracing
+from .batch import DEFAULT_CHUNK_SIZE, abatch_lookup, batch_lookup
+from .fanout import afanout_map, afanout_search, fanout_map, fanout_search
+from .http_client import AsyncDataJudSession, DataJudSession
+from .mapping import combine_query, compile_filters, schema_filters
+from .pagination import aiter_search_hits, iter_search_hits
+from .projection import compact_hit, compact_hits, compact_result, normalize_filter_path
 
 
-def generate_docstring(tribunal: str, description: str, input_schema: Dict[str, Any]) -> str:
-    lines = [
-        f"Buscar processos no {tribunal.upper()} via API DataJUD.",
-        "",
-        description or "",
-        "",
-        "Args:",
-    ]
+class SchemaDerivations:
+    """Artefatos derivados do schema (assinatura, seção Args, filtros), calculados uma vez por objeto de schema.
+
+    Cada `DynamicClient` tem a sua instância: tribunais com o mesmo schema compartilham os
+    artefatos, que são liberados junto com o cliente. A entrada guarda o próprio schema para que
+    um id() reaproveitado após coleta não devolva o valor de outro schema.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, int], Tuple[Dict[str, Any], Any]] = {}
+
+    def get(self, kind: str, input_schema: Dict[str, Any], build: Callable[[Dict[str, Any]], Any]) -> Any:
+        key = (kind, id(input_schema))
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is input_schema:
+            return entry[1]
+        value = build(input_schema)
+        self._entries[key] = (input_schema, value)
+        return value
+
+    def signature(self, input_schema: Dict[str, Any]) -> inspect.Signature:
+        return self.get("signature", input_schema, build_signature_from_schema)
+
+    def filters(self, input_schema: Dict[str, Any] | None) -> Dict[str, Dict[str, Any]]:
+        return self.get("filters", input_schema, schema_filters) if input_schema else {}
+
+    def args_section(self, input_schema: Dict[str, Any]) -> str:
+        return self.get("args", input_schema, _args_section)
+
+
+def _args_section(input_schema: Dict[str, Any]) -> str:
+    lines = ["Args:"]
     properties: Dict[str, Any] = input_schema.get("properties", {})
     for name, meta in properties.items():
         t = meta.get("type", "any")
@@ -26,6 +56,11 @@ def generate_docstring(tribunal: str, description: str, input_schema: Dict[str,
     return "\n".join(lines)
 
 
+def generate_docstring(tribunal: str, description: str, input_schema: Dict[str, Any], derived: SchemaDerivations | None = None) -> str:
+    header = f"Buscar processos no {tribunal.upper()} via API DataJUD.\n\n{description or ''}\n\n"
+    return header + (derived.args_section(input_schema) if derived is not None else _args_section(input_schema))
+
+
 def _sanitize_param_name(name: str) -> str:
     if not name.isidentifier() or keyword.iskeyword(name):
         return f"{name}_"
@@ -83,76 +118,424 @@ def build_signature_from_schema(input_schema: Dict[str, Any]) -> inspect.Signatu
     return inspect.Signature(params)
 
 
-def create_api_method(session: DataJudSession, http_method: str, path: str, tribunal: str, input_schema: Dict[str, Any], description: str) -> Callable[..., Any]:
+def _variant_name(method: str, variant: str) -> str:
+    # buscar_processos -> iterar_processos / buscar_processos_raw (idem para buscar_por_*)
+    if variant == "iter":
+        return "iterar_" + method.removeprefix("buscar_")
+    return f"{method}_raw"
+
+
+def _build_search_body(kwargs: Dict[str, Any], filters: Dict[str, Dict[str, Any]] | None = None, builder: str | None = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # Ferramentas de conveniência: o construtor consome seus parâmetros e fixa query/sort/track_total_hits
+    built = query_builder.BUILDERS[builder](kwargs) if builder else None
+
+    # Parâmetros especiais de paginação do cliente
+    pagina = kwargs.pop("pagina", None)
+    controls = {
+        "buscar_todas_paginas": bool(kwargs.pop("buscar_todas_paginas", False)),
+        "usar_pit": bool(kwargs.pop("usar_pit", False)),
+        "compacto": bool(kwargs.pop("compacto", False)),
+        # filter_path vai na query string, não no corpo
+        "filter_path": normalize_filter_path(kwargs.pop("filter_path", None)),
+    }
+
+    # Montar corpo da requisição ES
+    body: Dict[str, Any] = {}
+    for key in ("query", "sort", "size", "from", "search_after", "_source", "track_total_hits"):
+        if key in kwargs and kwargs[key] is not None:
+            body[key] = kwargs[key]
+
+    # Filtros tipados (schema enriquecido pelo mapeamento): bool.filter com term/range
+    clauses = compile_filters(kwargs, filters) if filters else []
+    if clauses:
+        body["query"] = combine_query(body.get("query"), clauses)
+    if built:
+        body.update(built)
+
+    # Conveniência: se página for informada, ajustar 'from'
+    if pagina is not None:
+        size = int(body.get("size", 10))
+        page_index = max(int(pagina) - 1, 0)
+        body["from"] = page_index * size
+    return body, controls
+
+
+def _query_params(controls: Dict[str, Any]) -> Dict[str, Any] | None:
+    return {"filter_path": controls["filter_path"]} if controls["filter_path"] else None
+
+
+def _cursor_page_size(body: Dict[str, Any]) -> int:
+    return int(body.get("size", 1000))
+
+
+def _aggregated_result(hits: list[Any]) -> Dict[str, Any]:
+    return {"data": hits, "pagination": {"fetched": len(hits)}}
+
+
+def _run_search(session: DataJudSession, http_method: str, path: str, body: Dict[str, Any], controls: Dict[str, Any]) -> Dict[str, Any]:
+    # Execução simples (uma página)
+    if not controls["buscar_todas_paginas"]:
+        with tracing.span("datajud.page", {"url.path": path, "datajud.page": 1}):
+            result = session.request(method=http_method, path=path, params=_query_params(controls), json_body=body)
+        return compact_result(result) if controls["compacto"] else result
+
+    # Buscar todas as páginas: agregação sobre o iterador search_after (ignora from/pagina)
+    aggregated_hits = list(
+        iter_search_hits(session, http_method, path, body, _cursor_page_size(body), controls["usar_pit"], filter_path=controls["filter_path"])
+    )
+    return _aggregated_result(compact_hits(aggregated_hits) if controls["compacto"] else aggregated_hits)
+
+
+async def _arun_search(session: AsyncDataJudSession, http_method: str, path: str, body: Dict[str, Any], controls: Dict[str, Any]) -> Dict[str, Any]:
+    if not controls["buscar_todas_paginas"]:
+        with tracing.span("datajud.page", {"url.path": path, "datajud.page": 1}):
+            result = await session.request(method=http_method, path=path, params=_query_params(controls), json_body=body)
+        return compact_result(result) if controls["compacto"] else result
+
+    aggregated_hits = [
+        compact_hit(hit) if controls["compacto"] else hit
+        async for hit in aiter_search_hits(session, http_method, path, body, _cursor_page_size(body), controls["usar_pit"], filter_path=controls["filter_path"])
+    ]
+    return _aggregated_result(aggregated_hits)
+
+
+def _create_sync_search(session: DataJudSession, http_method: str, path: str, filters: Dict[str, Dict[str, Any]], builder: str | None = None) -> Callable[..., Any]:
     def api_call(self, **kwargs: Any) -> Dict[str, Any]:
-        # Parâmetros especiais de paginação do cliente
-        pagina = kwargs.pop("pagina", None)
-        buscar_todas = kwargs.pop("buscar_todas_paginas", False)
-
-        # Montar corpo da requisição ES
-        body: Dict[str, Any] = {}
-        for key in ("query", "sort", "size", "from", "search_after"):
-            if key in kwargs and kwargs[key] is not None:
-                body[key] = kwargs[key]
-
-        # Conveniência: se página for informada, ajustar 'from'
-        if pagina is not None:
-            size = int(body.get("size", 10))
-            page_index = max(int(pagina) - 1, 0)
-            body["from"] = page_index * size
-
-        # Execução simples (uma página)
-        if not buscar_todas:
-            return session.request(method=http_method, path=path, json_body=body)
-
-        # Buscar todas as páginas (ingênuo com from/size; para grandes volumes, preferir search_after)
-        size = int(body.get("size", 1000))
-        size = max(1, min(size, 10000))
-        from_offset = int(body.get("from", 0))
-        aggregated_hits: list[Any] = []
-
-        while True:
-            page_body = dict(body)
-            page_body["from"] = from_offset
-            page_body["size"] = size
-            resp = session.request(method=http_method, path=path, json_body=page_body)
-            hits = (
-                resp.get("hits", {}).get("hits", [])
-                if isinstance(resp, dict)
-                else []
+        body, controls = _build_search_body(kwargs, filters, builder)
+        return _run_search(session, http_method, path, body, controls)
+
+    return api_call
+
+
+def _create_async_search(session: AsyncDataJudSession, http_method: str, path: str, filters: Dict[str, Dict[str, Any]], builder: str | None = None) -> Callable[..., Any]:
+    async def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+        body, controls = _build_search_body(kwargs, filters, builder)
+        return await _arun_search(session, http_method, path, body, controls)
+
+    return api_call
+
+
+def _select_fanout_targets(paths: Dict[str, str], tribunais: Any) -> List[str]:
+    if not tribunais:
+        return list(paths)
+    requested = [str(t).strip().lower() for t in tribunais]
+    unknown = [t for t in requested if t not in paths]
+    if unknown:
+        raise ValueError(f"Tribunais não configurados: {', '.join(unknown)}")
+    return requested
+
+
+def create_fanout_method(session: DataJudSession | AsyncDataJudSession, http_method: str, paths: Dict[str, str], input_schema: Dict[str, Any], description: str, label: str = "todos os tribunais", derived: SchemaDerivations | None = None) -> Callable[..., Any]:
+    # Mesmo corpo ES enviado a vários índices em paralelo (tempo ~ tribunal mais lento)
+    derived = derived if derived is not None else SchemaDerivations()
+    filters = derived.filters(input_schema)
+    if isinstance(session, AsyncDataJudSession):
+        async def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            targets = _select_fanout_targets(paths, kwargs.pop("tribunais", None))
+            body, controls = _build_search_body(kwargs, filters)
+            return await afanout_search(
+                targets,
+                lambda tribunal: _arun_search(session, http_method, paths[tribunal], body, controls),
+            )
+    else:
+        def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            targets = _select_fanout_targets(paths, kwargs.pop("tribunais", None))
+            body, controls = _build_search_body(kwargs, filters)
+            return fanout_search(
+                targets,
+                lambda tribunal: _run_search(session, http_method, paths[tribunal], body, controls),
             )
-            aggregated_hits.extend(hits)
-            if len(hits) < size:
-                # Última página
-                return {"data": aggregated_hits, "pagination": {"fetched": len(aggregated_hits)}}
-            from_offset += size
-
-    api_call.__doc__ = generate_docstring(tribunal, description, input_schema)
-    api_call.__name__ = f"buscar_processos"
-    api_call.__signature__ = build_signature_from_schema(input_schema)
+
+    api_call.__doc__ = generate_docstring(label, description, input_schema, derived)
+    api_call.__name__ = "buscar_processos"
+    api_call.__signature__ = derived.signature(input_schema)
+    return api_call
+
+
+def create_batch_method(session: DataJudSession | AsyncDataJudSession, paths: Dict[str, str], input_schema: Dict[str, Any], description: str, derived: SchemaDerivations | None = None) -> Callable[..., Any]:
+    # N números -> ~N/tamanho_lote requisições `terms`, uma por lote e tribunal, em paralelo
+    derived = derived if derived is not None else SchemaDerivations()
+    def options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        numeros = kwargs.pop("numerosProcesso", None)
+        if not numeros or not isinstance(numeros, (list, tuple)):
+            raise ValueError("Informe numerosProcesso (lista de números CNJ).")
+        return {
+            "numeros": list(numeros),
+            "chunk_size": int(kwargs.pop("tamanho_lote", None) or DEFAULT_CHUNK_SIZE),
+            "source": kwargs.pop("_source", None),
+            "compacto": bool(kwargs.pop("compacto", False)),
+        }
+
+    if isinstance(session, AsyncDataJudSession):
+        async def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            return await abatch_lookup(session, paths, **options(kwargs))
+    else:
+        def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            return batch_lookup(session, paths, **options(kwargs))
+
+    api_call.__doc__ = generate_docstring("todos os tribunais", description, input_schema, derived)
+    api_call.__name__ = "buscar_numeros_em_lote"
+    api_call.__signature__ = derived.signature(input_schema)
+    return api_call
+
+
+def create_aggregation_method(
+    session: DataJudSession | AsyncDataJudSession,
+    kind: str,
+    paths: Dict[str, str],
+    input_schema: Dict[str, Any],
+    description: str,
+    label: str,
+    fanout: bool = False,
+    derived: SchemaDerivations | None = None,
+) -> Callable[..., Any]:
+    # size 0: o DataJUD devolve só o total ou os buckets (KB), nunca os hits
+    derived = derived if derived is not None else SchemaDerivations()
+    counting = kind == "contar"
+    prepare = aggregation.count_body if counting else aggregation.plan_aggregation
+
+    def single(tribunal: str, plan: Any, result: Any) -> Dict[str, Any]:
+        if counting:
+            return {"total": result}
+        return aggregation.with_tribunal(tribunal, result) if plan["por_tribunal"] else result
+
+    def merge(plan: Any, results: Dict[str, Any], errors: Dict[str, str]) -> Dict[str, Any]:
+        return aggregation.merge_counts(results, errors) if counting else aggregation.merge_tables(plan, results, errors)
+
+    def targets(kwargs: Dict[str, Any]) -> List[str]:
+        return _select_fanout_targets(paths, kwargs.pop("tribunais", None)) if fanout else list(paths)
+
+    if isinstance(session, AsyncDataJudSession):
+        run_async = aggregation.acount if counting else aggregation.aaggregate
+
+        async def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            selected = targets(kwargs)
+            plan = prepare(kwargs)
+            if not fanout:
+                return single(selected[0], plan, await run_async(session, paths[selected[0]], plan))
+            return merge(plan, *await afanout_map(selected, lambda tribunal: run_async(session, paths[tribunal], plan)))
+    else:
+        run = aggregation.count if counting else aggregation.aggregate
+
+        def api_call(self, **kwargs: Any) -> Dict[str, Any]:
+            selected = targets(kwargs)
+            plan = prepare(kwargs)
+            if not fanout:
+                return single(selected[0], plan, run(session, paths[selected[0]], plan))
+            return merge(plan, *fanout_map(selected, lambda tribunal: run(session, paths[tribunal], plan)))
+
+    api_call.__doc__ = generate_docstring(label, description, input_schema, derived)
+    api_call.__name__ = f"{kind}_processos"
+    api_call.__signature__ = derived.signature(input_schema)
     return api_call
 
 
-def build_dynamic_client(api_spec: Dict[str, Any], session: DataJudSession) -> Any:
-    root = types.SimpleNamespace()
+def create_iter_method(
+    session: DataJudSession | AsyncDataJudSession,
+    http_method: str,
+    path: str,
+    tribunal: str,
+    input_schema: Dict[str, Any] | None = None,
+    method_name: str = "buscar_processos",
+    builder: str | None = None,
+    derived: SchemaDerivations | None = None,
+) -> Callable[..., Any]:
+    # Iteração preguiçosa de hits (memória constante); gerador assíncrono para a sessão async
+    derived = derived if derived is not None else SchemaDerivations()
+    filters = derived.filters(input_schema)
+    if isinstance(session, AsyncDataJudSession):
+        async def iter_call(self, **kwargs: Any) -> AsyncIterator[Any]:
+            body, controls = _build_search_body(kwargs, filters, builder)
+            hits = aiter_search_hits(session, http_method, path, body, _cursor_page_size(body), controls["usar_pit"], filter_path=controls["filter_path"])
+            async for hit in hits:
+                yield compact_hit(hit) if controls["compacto"] else hit
+    else:
+        def iter_call(self, **kwargs: Any) -> Iterator[Any]:
+            body, controls = _build_search_body(kwargs, filters, builder)
+            hits = iter_search_hits(session, http_method, path, body, _cursor_page_size(body), controls["usar_pit"], filter_path=controls["filter_path"])
+            return map(compact_hit, hits) if controls["compacto"] else hits
+
+    iter_call.__doc__ = f"Itera todos os hits do {tribunal.upper()} com search_after, página a página."
+    iter_call.__name__ = _variant_name(method_name, "iter")
+    return iter_call
+
+
+def _single_page_request(kwargs: Dict[str, Any], filters: Dict[str, Dict[str, Any]], builder: str | None = None) -> Tuple[Dict[str, Any], Dict[str, Any] | None]:
+    body, controls = _build_search_body(kwargs, filters, builder)
+    if controls["buscar_todas_paginas"]:
+        raise ValueError("Modo raw retorna uma única página; não use buscar_todas_paginas.")
+    if controls["compacto"]:
+        raise ValueError("Modo raw devolve a resposta original; use filter_path/_source em vez de compacto.")
+    return body, _query_params(controls)
+
+
+def create_raw_method(
+    session: DataJudSession | AsyncDataJudSession,
+    http_method: str,
+    path: str,
+    tribunal: str,
+    input_schema: Dict[str, Any] | None = None,
+    method_name: str = "buscar_processos",
+    builder: str | None = None,
+    derived: SchemaDerivations | None = None,
+) -> Callable[..., Any]:
+    # Página única com os bytes do DataJUD repassados sem decodificar/recodificar
+    derived = derived if derived is not None else SchemaDerivations()
+    filters = derived.filters(input_schema)
+    if isinstance(session, AsyncDataJudSession):
+        async def raw_call(self, **kwargs: Any) -> bytes:
+            body, params = _single_page_request(kwargs, filters, builder)
+            with tracing.span("datajud.page", {"url.path": path, "datajud.page": 1}):
+                return await session.request_raw(method=http_method, path=path, params=params, json_body=body)
+    else:
+        def raw_call(self, **kwargs: Any) -> bytes:
+            body, params = _single_page_request(kwargs, filters, builder)
+            with tracing.span("datajud.page", {"url.path": path, "datajud.page": 1}):
+                return session.request_raw(method=http_method, path=path, params=params, json_body=body)
+
+    raw_call.__doc__ = f"Busca uma página no {tribunal.upper()} e devolve a resposta JSON original (bytes)."
+    raw_call.__name__ = _variant_name(method_name, "raw")
+    return raw_call
 
-    for tribunal, t_spec in api_spec.get("tribunais", {}).items():
-        category_cls = type(tribunal.upper(), (object,), {})
-        category_obj = category_cls()
 
-        for method_spec in t_spec.get("methods", []):
-            api_method = create_api_method(
+def create_api_method(
+    session: DataJudSession | AsyncDataJudSession,
+    http_method: str,
+    path: str,
+    tribunal: str,
+    input_schema: Dict[str, Any],
+    description: str,
+    method_name: str = "buscar_processos",
+    builder: str | None = None,
+    derived: SchemaDerivations | None = None,
+) -> Callable[..., Any]:
+    # Sessão assíncrona gera corrotinas; a síncrona, funções bloqueantes
+    derived = derived if derived is not None else SchemaDerivations()
+    filters = derived.filters(input_schema)
+    if isinstance(session, AsyncDataJudSession):
+        api_call = _create_async_search(session, http_method, path, filters, builder)
+    else:
+        api_call = _create_sync_search(session, http_method, path, filters, builder)
+
+    api_call.__doc__ = generate_docstring(tribunal, description, input_schema, derived)
+    api_call.__name__ = method_name
+    api_call.__signature__ = derived.signature(input_schema)
+    return api_call
+
+
+def _build_category(tribunal: str, t_spec: Dict[str, Any], session: DataJudSession | AsyncDataJudSession, derived: SchemaDerivations) -> Any:
+    category_cls = type(tribunal.upper(), (object,), {})
+    category_obj = category_cls()
+
+    for method_spec in t_spec.get("methods", []):
+        if method_spec.get("batch"):
+            batch_method = create_batch_method(
+                session=session,
+                paths=method_spec.get("paths", {}),
+                input_schema=method_spec.get("parameters", {}),
+                description=method_spec.get("summary", ""),
+                derived=derived,
+            )
+            setattr(category_obj, "buscar_numeros_em_lote", types.MethodType(batch_method, category_obj))
+            continue
+        if method_spec.get("aggregation"):
+            aggregation_method = create_aggregation_method(
+                session=session,
+                kind=method_spec["aggregation"],
+                paths=method_spec.get("paths", {}),
+                input_schema=method_spec.get("parameters", {}),
+                description=method_spec.get("summary", ""),
+                label=f"segmento {t_spec['segment']}" if t_spec.get("fanout") and t_spec.get("segment") else ("todos os tribunais" if t_spec.get("fanout") else tribunal),
+                fanout=bool(t_spec.get("fanout")),
+                derived=derived,
+            )
+            setattr(category_obj, aggregation_method.__name__, types.MethodType(aggregation_method, category_obj))
+            continue
+        if t_spec.get("fanout"):
+            fanout_method = create_fanout_method(
                 session=session,
                 http_method=method_spec.get("http_method", "POST"),
-                path=method_spec.get("path"),
-                tribunal=tribunal,
+                paths=method_spec.get("paths", {}),
                 input_schema=method_spec.get("parameters", {}),
                 description=method_spec.get("summary", ""),
+                label=f"segmento {t_spec['segment']}" if t_spec.get("segment") else "todos os tribunais",
+                derived=derived,
             )
-            setattr(category_obj, "buscar_processos", types.MethodType(api_method, category_obj))
+            setattr(category_obj, "buscar_processos", types.MethodType(fanout_method, category_obj))
+            continue
+        # buscar_processos ou ferramenta de conveniência (buscar_por_*), cada uma com variantes iterar_*/…_raw
+        method_name = method_spec["tool_name"].partition(".")[2]
+        options = {
+            "session": session,
+            "http_method": method_spec.get("http_method", "POST"),
+            "path": method_spec.get("path"),
+            "tribunal": tribunal,
+            "input_schema": method_spec.get("parameters", {}),
+            "method_name": method_name,
+            "builder": method_spec.get("query_builder"),
+            "derived": derived,
+        }
+        api_method = create_api_method(description=method_spec.get("summary", ""), **options)
+        setattr(category_obj, method_name, types.MethodType(api_method, category_obj))
+        iter_method = create_iter_method(**options)
+        setattr(category_obj, iter_method.__name__, types.MethodType(iter_method, category_obj))
+        raw_method = create_raw_method(**options)
+        setattr(category_obj, raw_method.__name__, types.MethodType(raw_method, category_obj))
+
+    return category_obj
+
+
+class DynamicClient:
+    """Cliente dinâmico: cada categoria (tribunal) e seus métodos são montados no primeiro acesso.
+
+    Com ~90 índices configurados, a inicialização não paga pelos tribunais que não forem usados.
+    """
+
+    def __init__(self, api_spec: Dict[str, Any], session: DataJudSession | AsyncDataJudSession) -> None:
+        # Metadados para introspecção
+        self.__api_spec__ = api_spec
+        self._session = session
+        self._routes: Dict[str, Dict[str, str]] = api_spec.get("routes", {})
+        # (tool_name, variante) -> método já vinculado; preenchido no primeiro uso de cada ferramenta
+        self._resolved: Dict[Tuple[str, str | None], Callable[..., Any]] = {}
+        # Assinaturas/docstrings/filtros derivados dos schemas, compartilhados entre as categorias deste cliente
+        self._derived = SchemaDerivations()
+
+    def resolve(self, tool_name: str, variant: str | None = None) -> Callable[..., Any] | None:
+        """Método da ferramenta via tabela de rotas; `variant` ("iter" ou "raw") seleciona iterar_*/…_raw."""
+        method = self._resolved.get((tool_name, variant))
+        if method is not None:
+            return method
+        route = self._routes.get(tool_name)
+        if route is None:
+            return None
+        name = _variant_name(route["method"], variant) if variant else route["method"]
+        method = getattr(getattr(self, route["category"]), name, None)
+        if method is not None:
+            self._resolved[(tool_name, variant)] = method
+        return method
+
+    def invalidate(self, category: str) -> None:
+        # Spec da categoria mudou (ex.: schema enriquecido pelo mapeamento): remonta no próximo acesso
+        self.__dict__.pop(category, None)
+        self._resolved = {
+            key: method for key, method in self._resolved.items()
+            if self._routes.get(key[0], {}).get("category") != category
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        # Só é chamado para atributos ainda inexistentes (categorias não montadas)
+        if name.startswith("__") or name in ("_session", "_routes", "_resolved", "_derived"):
+            raise AttributeError(name)
+        t_spec = self.__api_spec__.get("tribunais", {}).get(name)
+        if t_spec is None:
+            raise AttributeError(name)
+        # setdefault: se duas threads montarem a mesma categoria, ambas usam a primeira
+        return self.__dict__.setdefault(name, _build_category(name, t_spec, self._session, self._derived))
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(self.__api_spec__.get("tribunais", {})))
 
-        setattr(root, tribunal, category_obj)
 
-    # Anexar metadados para introspecção
-    setattr(root, "__api_spec__", api_spec)
-    return root
+def build_dynamic_client(api_spec: Dict[str, Any], session: DataJudSession | AsyncDataJudSession) -> Any:
+    return DynamicClient(api_spec, session)
@@ -1,14 +1,235 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import math
 import time
-from typing import Any, Dict, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from .errors import APIError, APIRateLimitError, AuthenticationError, NotFoundError
+from . import json_backend, metrics, tracing
+from .cache import ResponseCache, is_idempotent_search, make_request_key
+from .errors import APIError, APIRateLimitError, AuthenticationError, CircuitOpenError, NotFoundError
 from .logging_config import get_json_logger
-from .rate_limiter import TokenBucketRateLimiter
+from .rate_limiter import RateLimiter, TokenBucketRateLimiter
+from .retry import CircuitBreaker, CircuitBreakerRegistry, RetryPolicy, remaining_budget
+from .singleflight import SingleFlight
+
+try:  # Extra opcional: pip install mcp-datajud[async]
+    import httpx
+except ImportError:  # pragma: no cover - depende do ambiente
+    httpx = None
+
+
+def is_async_available() -> bool:
+    return httpx is not None
+
+
+def _default_headers(api_key: str, user_agent: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"APIKey {api_key}",
+        "User-Agent": user_agent,
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+    }
+
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    if tracing.is_tracing_enabled():
+        with tracing.span("datajud.decode", {"datajud.response_bytes": len(payload)}):
+            return _decode(payload)
+    return _decode(payload)
+
+
+def _decode(payload: bytes) -> Dict[str, Any]:
+    try:
+        return json_backend.loads(payload)
+    except ValueError:
+        return {"raw": payload.decode("utf-8", errors="replace")}
+
+
+# Pausa aplicada ao rate limiter quando um 429 chega sem Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After aceita segundos ou data HTTP
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Custo no rate limiter: páginas grandes pesam mais para o DataJUD (1 token a cada 2500 documentos)
+DOCUMENTS_PER_TOKEN = 2500
+
+
+def request_cost(json_body: Optional[Dict[str, Any]]) -> int:
+    size = json_body.get("size") if isinstance(json_body, dict) else None
+    try:
+        requested = int(size) if size is not None else 0
+    except (TypeError, ValueError):
+        return 1
+    return max(1, math.ceil(requested / DOCUMENTS_PER_TOKEN))
+
+
+def _status_error(status_code: int, body_text: str) -> APIError:
+    # Mapear erros
+    if status_code in (401, 403):
+        return AuthenticationError("Falha na autenticação com a API DataJUD", status_code, body_text)
+    if status_code == 404:
+        return NotFoundError("Recurso não encontrado na API DataJUD", status_code, body_text)
+    if status_code == 429:
+        return APIRateLimitError("Limite de taxa da API excedido", status_code, body_text)
+    if 500 <= status_code < 600:
+        return APIError("Erro temporário do servidor DataJUD", status_code, body_text)
+    # Outros 4xx
+    return APIError(f"Erro da API DataJUD ({status_code})", status_code, body_text)
+
+
+def _check_circuit(breaker: CircuitBreaker, path: str) -> None:
+    # Falha rápida sem consumir cota enquanto o índice está marcado como indisponível
+    if breaker.should_fail_fast():
+        raise CircuitOpenError(f"Circuit breaker aberto para {path}")
+
+
+def _admit_through_circuit(breaker: CircuitBreaker, path: str) -> None:
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"Circuit breaker aberto para {path}")
+
+
+def _evaluate_failure(status_code: int, headers: Any, body_text: str, breaker: CircuitBreaker) -> Tuple[APIError, Optional[float]]:
+    retry_after = parse_retry_after(headers.get("Retry-After")) if status_code in (429, 503) else None
+    # Só falhas do servidor indicam índice doente. 429 não diz nada sobre a saúde do índice: devolve
+    # a vaga de sonda sem fechar o circuito. Os demais 4xx mostram que ele responde.
+    if status_code >= 500 or status_code == 408:
+        breaker.record_failure()
+    elif status_code == 429:
+        breaker.release()
+    else:
+        breaker.record_success()
+    return _status_error(status_code, body_text), retry_after
+
+
+def _next_retry_delay(
+    session: "DataJudSession | AsyncDataJudSession",
+    error: APIError,
+    attempt: int,
+    previous_delay: float,
+    retry_after: Optional[float],
+    method: str,
+    path: str,
+) -> float:
+    # Retorna a espera antes da próxima tentativa ou levanta o erro final
+    policy = session.retry_policy
+    retryable = error.status_code is None or policy.is_retryable_status(error.status_code)
+    delay = policy.next_delay(previous_delay, retry_after) if retryable and attempt <= policy.max_retries else None
+    if delay is not None:
+        delay = policy.sleep_budget(delay)
+    if delay is not None:
+        metrics.record_retry(path, error.status_code or "network_error")
+        return delay
+    session.logger.error(
+        "Falha de requisição DataJUD",
+        extra={
+            "tool_name": "http_client.request",
+            "params": {"method": method, "path": path, "status": error.status_code, "attempts": attempt},
+            # Falhas repetidas do mesmo endpoint/status contam como um evento (DATAJUD_LOG_REPEAT_INTERVAL)
+            "log_key": ("http_client.request", method, path, error.status_code),
+        },
+    )
+    raise error
+
+
+class _Request:
+    """Estado fixo de uma requisição ao longo das tentativas (endpoint, custo e breaker).
+
+    `endpoint` rotula breaker, métricas e logs; por padrão é o próprio `path`. Buscas com PIT vão
+    para `/_search` na raiz e passam o caminho do índice para não misturar tribunais.
+    """
+
+    __slots__ = ("method", "path", "endpoint", "url", "params", "json_body", "cost", "breaker")
+
+    def __init__(
+        self,
+        session: "DataJudSession | AsyncDataJudSession",
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        json_body: Optional[Dict[str, Any]],
+        endpoint: Optional[str] = None,
+    ) -> None:
+        self.method = method.upper()
+        self.path = path
+        self.endpoint = endpoint or path
+        self.url = f"{session.base_url}{path}"
+        self.params = params
+        self.json_body = json_body
+        self.cost = request_cost(json_body)
+        self.breaker = session.circuit_breakers.get(self.endpoint)
+
+    def span_attributes(self, attempt: int) -> Dict[str, Any]:
+        return {"http.request.method": self.method, "url.path": self.path, "datajud.endpoint": self.endpoint, "datajud.attempt": attempt}
+
+
+def _admit(request: _Request, acquired: bool, wait_start: float, attempt_span: Any) -> float:
+    # Após o rate limiter: registra a espera, falha se a cota expirou e reserva a vaga no breaker
+    attempt_span.add_event("rate_limiter.wait", {"datajud.wait_seconds": time.perf_counter() - wait_start, "datajud.tokens": request.cost})
+    if not acquired:
+        raise APIRateLimitError("Tempo de espera por cota de requisição expirou (cliente)")
+    _admit_through_circuit(request.breaker, request.endpoint)
+    metrics.track_in_flight(request.endpoint, +1)
+    return time.perf_counter()
+
+
+def _network_failure(request: _Request, exc: Exception, start: float) -> Tuple[None, APIError, Optional[float]]:
+    # Erros de rede: contam como falha do endpoint e são repetidos
+    metrics.observe_upstream(request.endpoint, "network_error", time.perf_counter() - start)
+    request.breaker.record_failure()
+    error = APIError(f"Erro de rede ao acessar DataJUD: {exc}")
+    error.__cause__ = exc
+    return None, error, None
+
+
+def _response_outcome(request: _Request, resp: Any, start: float, attempt_span: Any) -> Tuple[Optional[bytes], Optional[APIError], Optional[float]]:
+    # (payload, None, None) em 2xx; (None, erro, Retry-After) nos demais
+    metrics.observe_upstream(request.endpoint, resp.status_code, time.perf_counter() - start, len(resp.content))
+    attempt_span.set_attribute("http.response.status_code", resp.status_code)
+    if 200 <= resp.status_code < 300:
+        request.breaker.record_success()
+        return resp.content, None, None
+    error, retry_after = _evaluate_failure(resp.status_code, resp.headers, resp.text, request.breaker)
+    return None, error, retry_after
+
+
+def _penalty(error: APIError, retry_after: Optional[float]) -> Optional[float]:
+    # Pausa a aplicar no limitador (possivelmente compartilhado entre réplicas) após um 429
+    if error.status_code != 429:
+        return None
+    return retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS
+
+
+def _retry_delay(
+    session: "DataJudSession | AsyncDataJudSession",
+    request: _Request,
+    error: APIError,
+    attempt: int,
+    previous_delay: float,
+    retry_after: Optional[float],
+    attempt_span: Any,
+) -> float:
+    attempt_span.set_attribute("error.type", type(error).__name__)
+    delay = _next_retry_delay(session, error, attempt, previous_delay, retry_after, request.method, request.endpoint)
+    attempt_span.add_event("retry.sleep", {"datajud.delay_seconds": delay})
+    return delay
 
 
 class DataJudSession:
@@ -22,22 +243,32 @@ class DataJudSession:
         max_retries: int = 3,
         backoff_factor: float = 0.8,
         timeout_seconds: float = 30.0,
+        pool_maxsize: int = 32,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        singleflight: Optional[SingleFlight] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.user_agent = user_agent
-        self.max_retries = max_retries
-        self.backoff_factor = backoff_factor
         self.timeout_seconds = timeout_seconds
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries, base_delay=backoff_factor)
+        self.circuit_breakers = circuit_breakers or CircuitBreakerRegistry()
         self.logger = get_json_logger()
-        self.rate_limiter = TokenBucketRateLimiter(rate_per_second=rate_limit_per_sec, burst_capacity=burst_capacity)
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(rate_per_second=rate_limit_per_sec, burst_capacity=burst_capacity)
+        self.cache = cache
+        self.singleflight = singleflight or SingleFlight()
         self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"APIKey {self.api_key}",
-            "User-Agent": self.user_agent,
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        })
+        # Pool dimensionado para o threadpool do servidor: conexões acima do limite seriam descartadas (TLS a frio)
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(_default_headers(self.api_key, self.user_agent))
+
+    def close(self) -> None:
+        self.session.close()
 
     def request(
         self,
@@ -45,70 +276,213 @@ class DataJudSession:
         path: str,
         params: Optional[Dict[str, Any]] = None,
         json_body: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
     ) -> Dict[str, Any]:
-        url = f"{self.base_url}{path}"
-        attempt = 0
-        last_exc: Optional[Exception] = None
+        result = decode_payload(self.request_raw(method, path, params, json_body, endpoint))
+        if is_idempotent_search(method, path, json_body):
+            metrics.observe_hits(endpoint or path, result)
+        return result
+
+    def request_raw(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
+    ) -> bytes:
+        """Como `request`, mas devolve o corpo do DataJUD sem decodificar (repasse direto ao chamador)."""
+        if not is_idempotent_search(method, path, json_body):
+            return self._send(method, path, params, json_body, endpoint)
 
-        while attempt <= self.max_retries:
+        key = make_request_key(method, path, params, json_body)
+
+        def fetch() -> bytes:
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                return cached
+            payload = self._send(method, path, params, json_body, endpoint)
+            if self.cache is not None:
+                self.cache.set(key, payload)
+            return payload
+
+        # Buscas idênticas em andamento compartilham uma única chamada ao DataJUD
+        return self.singleflight.do(key, fetch)
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        json_body: Optional[Dict[str, Any]],
+        endpoint: Optional[str] = None,
+    ) -> bytes:
+        request = _Request(self, method, path, params, json_body, endpoint)
+        attempt = 0
+        delay = 0.0
+        while True:
             attempt += 1
-            acquired = self.rate_limiter.acquire(tokens=1, timeout=self.timeout_seconds)
-            if not acquired:
-                raise APIRateLimitError("Tempo de espera por cota de requisição expirou (cliente)")
+            payload, delay = self._attempt(request, attempt, delay)
+            if payload is not None:
+                return payload
+            time.sleep(delay)
+
+    def _attempt(self, request: _Request, attempt: int, previous_delay: float) -> Tuple[Optional[bytes], float]:
+        # Uma tentativa: (payload, 0) em sucesso, (None, espera) antes da próxima; erro final é levantado
+        with tracing.span("datajud.request.attempt", request.span_attributes(attempt)) as attempt_span:
+            _check_circuit(request.breaker, request.endpoint)
+            wait_start = time.perf_counter()
+            acquired = self.rate_limiter.acquire(tokens=request.cost, timeout=remaining_budget(self.timeout_seconds))
+            start = _admit(request, acquired, wait_start, attempt_span)
             try:
-                start = time.time()
                 resp = self.session.request(
-                    method=method.upper(),
-                    url=url,
-                    params=params,
-                    json=json_body,
-                    timeout=self.timeout_seconds,
-                )
-                duration_ms = int((time.time() - start) * 1000)
-
-                if 200 <= resp.status_code < 300:
-                    try:
-                        return resp.json()
-                    except Exception:
-                        return {"raw": resp.text}
-
-                # Mapear erros
-                body_text = resp.text
-                if resp.status_code in (401, 403):
-                    raise AuthenticationError("Falha na autenticação com a API DataJUD", resp.status_code, body_text)
-                if resp.status_code == 404:
-                    raise NotFoundError("Recurso não encontrado na API DataJUD", resp.status_code, body_text)
-                if resp.status_code == 429:
-                    raise APIRateLimitError("Limite de taxa da API excedido", resp.status_code, body_text)
-                if 500 <= resp.status_code < 600:
-                    raise APIError("Erro temporário do servidor DataJUD", resp.status_code, body_text)
-                # Outros 4xx
-                raise APIError(f"Erro da API DataJUD ({resp.status_code})", resp.status_code, body_text)
-
-            except (APIRateLimitError, AuthenticationError, NotFoundError) as exc:
-                self.logger.error(
-                    "Falha de requisição DataJUD",
-                    extra={"tool_name": "http_client.request", "params": {"method": method, "path": path, "status": getattr(exc, "status_code", None)}},
+                    method=request.method,
+                    url=request.url,
+                    params=request.params,
+                    json=request.json_body,
+                    timeout=remaining_budget(self.timeout_seconds),
                 )
+            except requests.RequestException as exc:
+                payload, error, retry_after = _network_failure(request, exc, start)
+            except BaseException:
+                # Cancelamento/erro local não diz nada sobre o índice: só libera a vaga de sonda
+                request.breaker.release()
                 raise
-            except APIError as exc:
-                # Retry apenas para 5xx
-                if attempt <= self.max_retries:
-                    sleep_s = self.backoff_factor * attempt
-                    time.sleep(sleep_s)
-                    last_exc = exc
-                    continue
+            else:
+                payload, error, retry_after = _response_outcome(request, resp, start, attempt_span)
+            finally:
+                metrics.track_in_flight(request.endpoint, -1)
+            if error is None:
+                return payload, 0.0
+            penalty = _penalty(error, retry_after)
+            if penalty is not None:
+                self.rate_limiter.penalize(penalty)
+            return None, _retry_delay(self, request, error, attempt, previous_delay, retry_after, attempt_span)
+
+
+class AsyncDataJudSession:
+    """Variante asyncio de `DataJudSession` (mesmos retries, mapeamento de erros e rate limiting)."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api-publica.datajud.cnj.jus.br",
+        user_agent: str = "mcp-datajud/0.1.0 (+https://github.com)",
+        rate_limit_per_sec: float = 5.0,
+        burst_capacity: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.8,
+        timeout_seconds: float = 30.0,
+        max_connections: int = 200,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        singleflight: Optional[SingleFlight] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+    ) -> None:
+        if httpx is None:
+            raise ImportError("Transporte assíncrono requer httpx. Instale com: pip install 'mcp-datajud[async]'")
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.user_agent = user_agent
+        self.timeout_seconds = timeout_seconds
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries, base_delay=backoff_factor)
+        self.circuit_breakers = circuit_breakers or CircuitBreakerRegistry()
+        self.logger = get_json_logger()
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(rate_per_second=rate_limit_per_sec, burst_capacity=burst_capacity)
+        self.cache = cache
+        self.singleflight = singleflight or SingleFlight()
+        self.session = httpx.AsyncClient(
+            headers=_default_headers(self.api_key, self.user_agent),
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        result = decode_payload(await self.request_raw(method, path, params, json_body, endpoint))
+        if is_idempotent_search(method, path, json_body):
+            metrics.observe_hits(endpoint or path, result)
+        return result
+
+    async def request_raw(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
+    ) -> bytes:
+        if not is_idempotent_search(method, path, json_body):
+            return await self._send(method, path, params, json_body, endpoint)
+
+        key = make_request_key(method, path, params, json_body)
+
+        async def fetch() -> bytes:
+            # Backend SQLite roda em thread: o event loop não bloqueia em disco
+            cached = await self.cache.get_async(key) if self.cache is not None else None
+            if cached is not None:
+                return cached
+            payload = await self._send(method, path, params, json_body, endpoint)
+            if self.cache is not None:
+                await self.cache.set_async(key, payload)
+            return payload
+
+        return await self.singleflight.do_async(key, fetch)
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        json_body: Optional[Dict[str, Any]],
+        endpoint: Optional[str] = None,
+    ) -> bytes:
+        request = _Request(self, method, path, params, json_body, endpoint)
+        attempt = 0
+        delay = 0.0
+        while True:
+            attempt += 1
+            payload, delay = await self._attempt(request, attempt, delay)
+            if payload is not None:
+                return payload
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, request: _Request, attempt: int, previous_delay: float) -> Tuple[Optional[bytes], float]:
+        with tracing.span("datajud.request.attempt", request.span_attributes(attempt)) as attempt_span:
+            _check_circuit(request.breaker, request.endpoint)
+            wait_start = time.perf_counter()
+            acquired = await self.rate_limiter.acquire_async(tokens=request.cost, timeout=remaining_budget(self.timeout_seconds))
+            start = _admit(request, acquired, wait_start, attempt_span)
+            try:
+                resp = await self.session.request(
+                    method=request.method,
+                    url=request.url,
+                    params=request.params,
+                    json=request.json_body,
+                    timeout=remaining_budget(self.timeout_seconds),
+                )
+            except httpx.HTTPError as exc:
+                payload, error, retry_after = _network_failure(request, exc, start)
+            except BaseException:
+                request.breaker.release()
                 raise
-            except requests.RequestException as exc:
-                # Erros de rede: retry
-                if attempt <= self.max_retries:
-                    sleep_s = self.backoff_factor * attempt
-                    time.sleep(sleep_s)
-                    last_exc = exc
-                    continue
-                raise APIError(f"Erro de rede ao acessar DataJUD: {exc}") from exc
-
-        # Se saiu do loop sem retorno
-        if last_exc:
-            raise APIError(f"Falha após retries: {last_exc}")
-        raise APIError("Falha desconhecida na requisição DataJUD")
+            else:
+                payload, error, retry_after = _response_outcome(request, resp, start, attempt_span)
+            finally:
+                metrics.track_in_flight(request.endpoint, -1)
+            if error is None:
+                return payload, 0.0
+            penalty = _penalty(error, retry_after)
+            if penalty is not None:
+                await self.rate_limiter.penalize_async(penalty)
+            return None, _retry_delay(self, request, error, attempt, previous_delay, retry_after, attempt_span)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+try:  # Extra opcional: pip install mcp-datajud[fastjson]
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+# Backend JSON único para sessão, servidor, CLI e logger. Funções trocadas por `set_backend`;
+# chame sempre via módulo (`json_backend.loads`) para enxergar o backend ativo.
+
+def _std_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+def _std_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _std_dumps_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _std_dumps_pretty(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2)
+
+
+def _orjson_loads(data: bytes | str) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # Casos que o orjson recusa (ex.: números fora da faixa suportada) ficam com o stdlib
+        return json.loads(data)
+
+
+def _orjson_dumps_bytes(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _orjson_dumps(value: Any) -> str:
+    return _orjson_dumps_bytes(value).decode("utf-8")
+
+
+def _orjson_dumps_pretty(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2).decode("utf-8")
+
+
+BACKEND_NAME = "json"
+loads = _std_loads
+dumps = _std_dumps
+dumps_bytes = _std_dumps_bytes
+dumps_pretty = _std_dumps_pretty
+
+
+def set_backend(name: str) -> None:
+    """Seleciona o backend: `orjson`, `json` (stdlib) ou `auto` (orjson quando instalado)."""
+    global BACKEND_NAME, loads, dumps, dumps_bytes, dumps_pretty
+    name = name.strip().lower()
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("Backend orjson requer o pacote orjson. Instale com: pip install 'mcp-datajud[fastjson]'")
+        BACKEND_NAME = "orjson"
+        loads, dumps, dumps_bytes, dumps_pretty = _orjson_loads, _orjson_dumps, _orjson_dumps_bytes, _orjson_dumps_pretty
+    elif name == "json":
+        BACKEND_NAME = "json"
+        loads, dumps, dumps_bytes, dumps_pretty = _std_loads, _std_dumps, _std_dumps_bytes, _std_dumps_pretty
+    else:
+        raise ValueError(f"Backend JSON desconhecido: {name} (use auto, orjson ou json)")
+
+
+# DATAJUD_JSON_BACKEND: auto (padrão) | orjson | json
+set_backend(os.getenv("DATAJUD_JSON_BACKEND", "auto"))
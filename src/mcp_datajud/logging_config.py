@@ -1,8 +1,36 @@
 from __future__ import annotations
 
-import json
+import atexit
+import copy
 import logging
-from typing import Any, Dict
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import json_backend
+
+
+class Lazy:
+    """Valor de `extra` calculado só na formatação, no thread escritor e apenas se o registro sair.
+
+    Ex.: `extra={"params": Lazy(lambda: {"body": body})}`. A função deve ler apenas dados
+    que não mudam depois da chamada ao logger.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[], Any]) -> None:
+        self.func = func
+
+    def resolve(self) -> Any:
+        try:
+            return self.func()
+        except Exception as exc:
+            return f"<erro ao avaliar extra: {exc!r}>"
 
 
 class JSONFormatter(logging.Formatter):
@@ -14,18 +42,175 @@ class JSONFormatter(logging.Formatter):
             "logger": record.name,
         }
         # Extras comuns
-        for key in ("tool_name", "params", "duration_ms"):
+        for key in ("tool_name", "params", "duration_ms", "suppressed"):
             value = getattr(record, key, None)
+            if isinstance(value, Lazy):
+                value = value.resolve()
             if value is not None:
                 log_record[key] = value
-        return json.dumps(log_record, ensure_ascii=False)
+        return json_backend.dumps(log_record)
+
+
+class _LogStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts = {"dropped": 0, "sampled_out": 0, "rate_limited": 0}
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+_STATS = _LogStats()
+
+
+def log_stats() -> Dict[str, int]:
+    """Registros descartados: fila cheia (`dropped`), amostragem (`sampled_out`) e limite de repetição (`rate_limited`)."""
+    return _STATS.snapshot()
+
+
+def _event_key(record: logging.LogRecord) -> str:
+    return getattr(record, "tool_name", None) or str(record.msg)
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém uma fração dos registros abaixo de WARNING, por evento (`tool_name` ou mensagem).
+
+    `rates` mapeia evento -> taxa (0 a 1); `"*"` vale para os demais.
+    """
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = rates
+        self.default = rates.get("*", 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(_event_key(record), self.default)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        _STATS.add("sampled_out")
+        return False
+
+
+class RepeatLimitFilter(logging.Filter):
+    """Emite no máximo um registro WARNING/ERROR por chave a cada `interval` segundos.
+
+    A chave é `log_key` (extra), ou então evento + mensagem. O próximo registro emitido
+    para a chave leva em `suppressed` quantos foram omitidos no intervalo.
+    """
+
+    def __init__(self, interval: float, max_keys: int = 1024) -> None:
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # chave -> (instante do último registro emitido, omitidos desde então)
+        self._seen: Dict[Any, Tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = getattr(record, "log_key", None) or (_event_key(record), record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                _STATS.add("rate_limited")
+                return False
+            if key not in self._seen and len(self._seen) >= self.max_keys:
+                # Chaves antigas saem primeiro (dict preserva a ordem de inserção)
+                self._seen.pop(next(iter(self._seen)))
+            self._seen.pop(key, None)
+            self._seen[key] = (now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler com fila limitada: fila cheia descarta o registro e conta em `dropped`, sem bloquear."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só a interpolação da mensagem fica no thread chamador; JSON e extras `Lazy` vão para o escritor
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        record.exc_info = record.exc_text = record.stack_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _STATS.add("dropped")
+
+
+_listener: Optional[QueueListener] = None
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        # Esvazia a fila antes de sair (registros já aceitos não se perdem no encerramento)
+        _listener.stop()
+        _listener = None
+
+
+def _parse_sampling(spec: str) -> Dict[str, float]:
+    # "http_client.request=0.1,*=0.5" ou só "0.5" (taxa padrão)
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        event, _, rate = item.rpartition("=")
+        rates[event.strip() or "*"] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def configure_logger_from_env(logger: logging.Logger) -> None:
+    """Handler e filtros do logger conforme o ambiente.
+
+    - `DATAJUD_LOG_ASYNC=1`: registros vão para uma fila limitada (`DATAJUD_LOG_QUEUE_SIZE`,
+      padrão 10000) e um thread escritor faz a serialização e a escrita em stderr.
+    - `DATAJUD_LOG_SAMPLING`: taxas de amostragem abaixo de WARNING (`0.1` ou `evento=taxa,*=taxa`).
+    - `DATAJUD_LOG_REPEAT_INTERVAL`: segundos entre WARNING/ERROR repetidos de mesma chave.
+    """
+    global _listener
+    if os.getenv("DATAJUD_LOG_ASYNC", "0").strip().lower() in ("1", "true", "yes", "on"):
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max(1, int(os.getenv("DATAJUD_LOG_QUEUE_SIZE", "10000"))))
+        logger.addHandler(DroppingQueueHandler(log_queue))
+        _stop_listener()
+        _listener = QueueListener(log_queue, _stream_handler(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+    else:
+        logger.addHandler(_stream_handler())
+
+    sampling = os.getenv("DATAJUD_LOG_SAMPLING", "").strip()
+    if sampling:
+        logger.addFilter(SamplingFilter(_parse_sampling(sampling)))
+    interval = float(os.getenv("DATAJUD_LOG_REPEAT_INTERVAL", "0") or 0)
+    if interval > 0:
+        logger.addFilter(RepeatLimitFilter(interval))
 
 
 def get_json_logger(name: str = "mcp_datajud", level: int = logging.INFO) -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JSONFormatter())
-        logger.addHandler(handler)
+        configure_logger_from_env(logger)
     logger.setLevel(level)
     return logger
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import query_builder
+from .cache import canonical_json
+from .http_client import DataJudSession
+from .logging_config import get_json_logger
+
+
+# Campos do DataJUD expostos como filtros tipados: (parâmetro, campo ES, tipo de filtro, descrição).
+# `term` aceita valor único ou lista (vira `terms`); `range` gera os parâmetros <nome>_inicio/<nome>_fim.
+FILTER_FIELDS: List[Tuple[str, str, str, str]] = [
+    ("numeroProcesso", "numeroProcesso", "term", "Número do processo (20 dígitos, sem pontuação)"),
+    ("classe_codigo", "classe.codigo", "term", "Código da classe processual (TPU)"),
+    ("orgaoJulgador_codigo", "orgaoJulgador.codigo", "term", "Código do órgão julgador"),
+    ("assuntos_codigo", "assuntos.codigo", "term", "Código de assunto (TPU)"),
+    ("grau", "grau", "term", "Grau de jurisdição (ex.: G1, G2, JE)"),
+    ("formato_codigo", "formato.codigo", "term", "Código do formato (1 = eletrônico, 2 = físico)"),
+    ("sistema_codigo", "sistema.codigo", "term", "Código do sistema processual"),
+    ("nivelSigilo", "nivelSigilo", "term", "Nível de sigilo"),
+    ("dataAjuizamento", "dataAjuizamento", "range", "Data de ajuizamento"),
+    ("dataHoraUltimaAtualizacao", "dataHoraUltimaAtualizacao", "range", "Data da última atualização"),
+]
+
+# Chave no schema com os metadados de compilação do filtro (ignorada por clientes JSON Schema)
+FILTER_KEY = "x-datajud-filter"
+
+_INTEGER_TYPES = {"long", "integer", "short", "byte", "unsigned_long"}
+_NUMBER_TYPES = {"double", "float", "half_float", "scaled_float"}
+
+
+def extract_field_types(mapping_response: Any) -> Dict[str, Dict[str, Any]]:
+    """Achata a resposta de `GET {index}/_mapping` em {caminho: {type, keyword, nested}}.
+
+    `keyword` indica o campo usado em `term` (o próprio campo ou o subcampo `.keyword`);
+    `nested` é o caminho do objeto `nested` mais interno que contém o campo, se houver.
+    """
+    if not isinstance(mapping_response, dict) or not mapping_response:
+        return {}
+    # A chave é o nome real do índice (o alias api_publica_* aponta para ele)
+    index_mapping = next(iter(mapping_response.values()))
+    properties = (index_mapping or {}).get("mappings", {}).get("properties", {})
+    fields: Dict[str, Dict[str, Any]] = {}
+    _walk_properties(properties, "", None, fields)
+    return fields
+
+
+def _walk_properties(properties: Dict[str, Any], prefix: str, nested: Optional[str], fields: Dict[str, Dict[str, Any]]) -> None:
+    for name, meta in properties.items():
+        if not isinstance(meta, dict):
+            continue
+        path = f"{prefix}{name}"
+        field_type = meta.get("type", "object")
+        if "properties" in meta:
+            _walk_properties(meta["properties"], f"{path}.", path if field_type == "nested" else nested, fields)
+            continue
+        term_field: Optional[str] = path
+        if field_type == "text":
+            # Texto analisado não serve para `term`; usa o subcampo keyword quando existir
+            keyword_sub = next((sub for sub, sub_meta in meta.get("fields", {}).items() if sub_meta.get("type") == "keyword"), None)
+            term_field = f"{path}.{keyword_sub}" if keyword_sub else None
+        fields[path] = {"type": field_type, "keyword": term_field, "nested": nested}
+
+
+def _json_type(es_type: str) -> str:
+    if es_type in _INTEGER_TYPES:
+        return "integer"
+    if es_type in _NUMBER_TYPES:
+        return "number"
+    if es_type == "boolean":
+        return "boolean"
+    return "string"
+
+
+def typed_filter_properties(field_types: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Propriedades de schema para os `FILTER_FIELDS` presentes no mapeamento do índice."""
+    properties: Dict[str, Any] = {}
+    for param, field, kind, description in FILTER_FIELDS:
+        info = field_types.get(field)
+        if info is None:
+            continue
+        if kind == "range":
+            if info["type"] not in ("date", "date_nanos") and _json_type(info["type"]) == "string":
+                continue
+            value_type = _json_type(info["type"])
+            value_format = {"format": "date-time"} if info["type"].startswith("date") else {}
+            for suffix, op, label in (("_inicio", "gte", "a partir de"), ("_fim", "lte", "até")):
+                properties[f"{param}{suffix}"] = {
+                    "type": [value_type, "null"],
+                    **value_format,
+                    "description": f"{description}: {label} (filtro range, sem score)",
+                    FILTER_KEY: {"field": field, "op": op, "nested": info["nested"]},
+                }
+            continue
+        if info["keyword"] is None:
+            continue
+        value_type = _json_type(info["type"])
+        properties[param] = {
+            "type": [value_type, "array", "null"],
+            "items": {"type": value_type},
+            "description": f"{description} (filtro term; lista = qualquer um dos valores)",
+            FILTER_KEY: {"field": info["keyword"], "op": "term", "nested": info["nested"]},
+        }
+    return properties
+
+
+def schema_filters(input_schema: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Parâmetro -> metadados de filtro, extraídos do schema (vazio no schema padrão)
+    return {
+        name: meta[FILTER_KEY]
+        for name, meta in input_schema.get("properties", {}).items()
+        if isinstance(meta, dict) and FILTER_KEY in meta
+    }
+
+
+def compile_filters(kwargs: Dict[str, Any], filters: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Consome de `kwargs` os parâmetros tipados e devolve cláusulas de contexto de filtro (cacheáveis, sem score)."""
+    clauses: List[Dict[str, Any]] = []
+    ranges: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+    for name, meta in filters.items():
+        value = kwargs.pop(name, None)
+        if value is None or value == []:
+            continue
+        if meta["op"] == "term":
+            clauses.append(query_builder.nested(meta["nested"], query_builder.term(meta["field"], value)))
+        else:
+            ranges.setdefault((meta["field"], meta["nested"]), {})[meta["op"]] = value
+    for (field, nested), bounds in ranges.items():
+        clauses.append(query_builder.nested(nested, query_builder.range_(field, **bounds)))
+    return clauses
+
+
+def combine_query(query: Optional[Dict[str, Any]], clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # A consulta livre continua pontuando (must); os filtros tipados não
+    return query_builder.bool_filter(clauses, must=query)
+
+
+class MappingCache:
+    """Mapeamentos em disco (um JSON por tribunal) com TTL.
+
+    O DataJUD não envia ETag em `_mapping`, então não há revalidação condicional: vencido o
+    prazo, o mapeamento é baixado de novo por inteiro (custo de uma busca a frio).
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float = 86400.0) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, tribunal: str) -> str:
+        return os.path.join(self.directory, f"{tribunal}.json")
+
+    def load(self, tribunal: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(tribunal), encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "fields" in entry else None
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl_seconds
+
+    def store(self, tribunal: str, fields: Dict[str, Any]) -> None:
+        # Escrita atômica: workers concorrentes nunca leem um arquivo pela metade
+        tmp_path = f"{self._path(tribunal)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump({"fetched_at": time.time(), "fields": fields}, handle)
+        os.replace(tmp_path, self._path(tribunal))
+
+
+class MappingIntrospector:
+    """Busca `_mapping` dos tribunais em paralelo, em segundo plano, e gera schemas tipados."""
+
+    def __init__(self, session: DataJudSession, cache: MappingCache, max_workers: int = 8) -> None:
+        self.session = session
+        self.cache = cache
+        self.max_workers = max(max_workers, 1)
+        self.logger = get_json_logger()
+        self.stats: Dict[str, int] = {"cache_hits": 0, "fetched": 0, "errors": 0}
+        self._stats_lock = threading.Lock()
+        # Índices com o mesmo mapeamento compartilham o mesmo objeto de schema
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._schemas_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def field_types(self, tribunal: str) -> Dict[str, Dict[str, Any]]:
+        entry = self.cache.load(tribunal)
+        if entry is not None and self.cache.is_fresh(entry):
+            self._count("cache_hits")
+            return entry["fields"]
+        response = self.session.request(method="GET", path=f"/api_publica_{tribunal}/_mapping")
+        self._count("fetched")
+        fields = extract_field_types(response)
+        self.cache.store(tribunal, fields)
+        return fields
+
+    def enriched_schema(self, base_schema: Dict[str, Any], fields: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        typed = typed_filter_properties(fields)
+        if not typed:
+            return None
+        key = canonical_json(typed)
+        with self._schemas_lock:
+            schema = self._schemas.get(key)
+            if schema is None:
+                schema = copy.deepcopy(base_schema)
+                schema["properties"].update(typed)
+                self._schemas[key] = schema
+            return schema
+
+    def run(self, tribunais: List[str], base_schema: Dict[str, Any], on_schema: Callable[[str, Dict[str, Any]], None]) -> None:
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(tribunais), 1))) as executor:
+            futures = {executor.submit(self.field_types, tribunal): tribunal for tribunal in tribunais}
+            for future in as_completed(futures):
+                tribunal = futures[future]
+                try:
+                    schema = self.enriched_schema(base_schema, future.result())
+                except Exception as exc:
+                    # Sem mapeamento o tribunal segue com o schema genérico
+                    self._count("errors")
+                    self.logger.warning(
+                        "Falha ao obter mapeamento DataJUD",
+                        extra={"tool_name": "mapping.introspect", "params": {"tribunal": tribunal, "error": str(exc)}},
+                    )
+                    continue
+                if schema is not None:
+                    on_schema(tribunal, schema)
+
+    def start(self, tribunais: List[str], base_schema: Dict[str, Any], on_schema: Callable[[str, Dict[str, Any]], None]) -> threading.Thread:
+        # Thread daemon: a inicialização do servidor/CLI nunca espera pela introspecção
+        thread = threading.Thread(target=self.run, args=(tribunais, base_schema, on_schema), name="datajud-mapping", daemon=True)
+        thread.start()
+        return thread
+
+
+def create_mapping_introspector_from_env(session: DataJudSession) -> Optional[MappingIntrospector]:
+    # DATAJUD_MAPPING_INTROSPECTION=1 ativa; cache em DATAJUD_MAPPING_CACHE_DIR com TTL DATAJUD_MAPPING_TTL
+    if os.getenv("DATAJUD_MAPPING_INTROSPECTION", "").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    directory = os.getenv("DATAJUD_MAPPING_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "mcp-datajud", "mappings")
+    ttl_seconds = float(os.getenv("DATAJUD_MAPPING_TTL", "86400"))
+    max_workers = int(os.getenv("DATAJUD_MAPPING_WORKERS", "8"))
+    return MappingIntrospector(session, MappingCache(directory, ttl_seconds=ttl_seconds), max_workers=max_workers)
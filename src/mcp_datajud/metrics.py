@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Any, Iterator, Optional, Tuple
+
+from .logging_config import log_stats
+
+try:  # Extra opcional: pip install mcp-datajud[metrics]
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # pragma: no cover - depende do ambiente
+    REGISTRY = None
+
+
+def is_metrics_available() -> bool:
+    return REGISTRY is not None
+
+
+# Sem prometheus_client as funções de observação viram no-ops (custo de uma comparação)
+if REGISTRY is not None:
+    _LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    UPSTREAM_LATENCY = Histogram(
+        "datajud_upstream_request_seconds",
+        "Latência das requisições ao DataJUD por endpoint e status",
+        ["endpoint", "status"],
+        buckets=_LATENCY_BUCKETS,
+    )
+    UPSTREAM_RESPONSE_BYTES = Histogram(
+        "datajud_upstream_response_bytes",
+        "Tamanho das respostas do DataJUD",
+        ["endpoint"],
+        buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 5e7, 1e8),
+    )
+    UPSTREAM_IN_FLIGHT = Gauge(
+        "datajud_upstream_in_flight_requests",
+        "Requisições ao DataJUD em andamento",
+        ["endpoint"],
+    )
+    UPSTREAM_RETRIES = Counter(
+        "datajud_upstream_retries_total",
+        "Novas tentativas de requisição ao DataJUD",
+        ["endpoint", "reason"],
+    )
+    HITS_PER_PAGE = Histogram(
+        "datajud_hits_per_page",
+        "Hits retornados por página de busca",
+        ["endpoint"],
+        buckets=(0, 1, 10, 100, 1000, 5000, 10000),
+    )
+    TOOL_LATENCY = Histogram(
+        "datajud_tool_call_seconds",
+        "Duração das chamadas de ferramenta MCP",
+        ["tool_name", "outcome"],
+        buckets=_LATENCY_BUCKETS,
+    )
+
+
+def track_in_flight(endpoint: str, delta: int) -> None:
+    if REGISTRY is not None:
+        UPSTREAM_IN_FLIGHT.labels(endpoint).inc(delta)
+
+
+def observe_upstream(endpoint: str, status: Any, seconds: float, response_bytes: Optional[int] = None) -> None:
+    if REGISTRY is None:
+        return
+    UPSTREAM_LATENCY.labels(endpoint, str(status)).observe(seconds)
+    if response_bytes is not None:
+        UPSTREAM_RESPONSE_BYTES.labels(endpoint).observe(response_bytes)
+
+
+def record_retry(endpoint: str, reason: Any) -> None:
+    if REGISTRY is not None:
+        UPSTREAM_RETRIES.labels(endpoint, str(reason)).inc()
+
+
+def observe_hits(endpoint: str, result: Any) -> None:
+    if REGISTRY is None or not isinstance(result, dict):
+        return
+    hits = result.get("hits")
+    if isinstance(hits, dict):
+        HITS_PER_PAGE.labels(endpoint).observe(len(hits.get("hits") or ()))
+
+
+def observe_tool(tool_name: str, seconds: float, outcome: str) -> None:
+    if REGISTRY is not None:
+        TOOL_LATENCY.labels(tool_name, outcome).observe(seconds)
+
+
+class ClientStatsCollector:
+    """Exporta, no momento do scrape, contadores que o cliente já mantém (sem custo no hot path)."""
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def collect(self) -> Iterator[Any]:
+        limiter = self.client.session.rate_limiter.stats()
+        yield GaugeMetricFamily("datajud_rate_limiter_queue_depth", "Chamadores aguardando cota no rate limiter", value=limiter["queue_depth"])
+        yield CounterMetricFamily("datajud_rate_limiter_wait_seconds", "Tempo total de espera no rate limiter", value=limiter["total_wait_seconds"])
+        acquisitions = CounterMetricFamily("datajud_rate_limiter_acquisitions", "Reservas de cota no rate limiter", labels=["result"])
+        acquisitions.add_metric(["acquired"], limiter["acquired"])
+        acquisitions.add_metric(["rejected"], limiter["rejected"])
+        yield acquisitions
+
+        flights = self.client.singleflight.stats()
+        coalescing = CounterMetricFamily("datajud_singleflight_requests", "Buscas executadas vs. coalescidas (single-flight)", labels=["result"])
+        coalescing.add_metric(["executed"], flights["executed"])
+        coalescing.add_metric(["deduplicated"], flights["deduplicated"])
+        yield coalescing
+
+        if self.client.cache is not None:
+            cache = self.client.cache.stats()
+            lookups = CounterMetricFamily("datajud_cache_requests", "Consultas ao cache de respostas", labels=["result"])
+            lookups.add_metric(["hit"], cache["hits"])
+            lookups.add_metric(["miss"], cache["misses"])
+            yield lookups
+            yield GaugeMetricFamily("datajud_cache_bytes", "Bytes armazenados no cache de respostas", value=cache.get("bytes", 0))
+
+        discarded = CounterMetricFamily("datajud_log_records_discarded", "Registros de log descartados (fila cheia, amostragem, repetição)", labels=["reason"])
+        for reason, count in log_stats().items():
+            discarded.add_metric([reason], count)
+        yield discarded
+
+        breakers = GaugeMetricFamily("datajud_circuit_breaker_open", "Circuit breaker aberto (1) ou não (0) por endpoint", labels=["endpoint", "state"])
+        for endpoint, snapshot in self.client.circuit_breaker_states().items():
+            breakers.add_metric([endpoint, snapshot["state"]], 1.0 if snapshot["state"] == "open" else 0.0)
+        yield breakers
+
+
+def register_client(client: Any) -> Optional[ClientStatsCollector]:
+    if REGISTRY is None:
+        return None
+    collector = ClientStatsCollector(client)
+    REGISTRY.register(collector)
+    return collector
+
+
+def unregister_client(collector: Optional[ClientStatsCollector]) -> None:
+    if REGISTRY is not None and collector is not None:
+        REGISTRY.unregister(collector)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
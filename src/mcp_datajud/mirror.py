@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import json_backend, query_builder
+from .http_client import DataJudSession
+from .logging_config import get_json_logger
+from .pagination import iter_search_pages
+from .projection import compact_hits, filter_source, source_filter_supported
+
+
+# Ferramentas atendidas pela cópia local: filtros sobre colunas extraídas do _source
+MIRRORED_METHODS = ("buscar_por_numero", "buscar_por_classe_e_periodo", "buscar_por_orgao")
+
+# Parâmetros que só o Elasticsearch resolve (cursor remoto, filtragem da resposta)
+_REMOTE_ONLY = ("search_after", "filter_path")
+
+_DATE_COLUMNS = {"dataAjuizamento": "data_ajuizamento", "dataHoraUltimaAtualizacao": "atualizado_em"}
+
+
+def _iso_date(value: Any) -> Optional[str]:
+    # O DataJUD mistura ISO 8601 e AAAAMMDDhhmmss; a cópia local guarda tudo em ISO (ordenável como texto)
+    if value is None:
+        return None
+    text = str(value)
+    if len(text) >= 8 and text[:8].isdigit() and "-" not in text:
+        text = f"{text[:4]}-{text[4:6]}-{text[6:8]}" + (f"T{text[8:10]}:{text[10:12]}:{text[12:14]}" if len(text) >= 14 else "")
+    return text
+
+
+def _codigo(source: Dict[str, Any], field: str) -> Any:
+    value = source.get(field)
+    return value.get("codigo") if isinstance(value, dict) else None
+
+
+class MirrorStore:
+    """Cópia local (SQLite, WAL) de um índice de tribunal, com upsert por id do documento.
+
+    Colunas extraídas (número, classe, órgão, datas) atendem os filtros das ferramentas
+    de conveniência; o documento completo fica em `source` (JSON).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS processos ("
+            " id TEXT PRIMARY KEY, numero_processo TEXT, classe_codigo INTEGER, orgao_codigo INTEGER,"
+            " data_ajuizamento TEXT, atualizado_em TEXT, source TEXT NOT NULL)"
+        )
+        for column in ("numero_processo", "classe_codigo", "orgao_codigo", "atualizado_em"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS processos_{column} ON processos({column})")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def get_meta(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json_backend.loads(row[0]) if row else None
+
+    def upsert(self, hits: Iterable[Any], meta: Dict[str, Any]) -> int:
+        """Grava a página e os metadados (ex.: high-water mark) na mesma transação."""
+        rows = []
+        for hit in hits:
+            source = hit.get("_source") if isinstance(hit, dict) else None
+            if not isinstance(source, dict):
+                continue
+            rows.append((
+                str(hit.get("_id") or source.get("id")),
+                source.get("numeroProcesso"),
+                _codigo(source, "classe"),
+                _codigo(source, "orgaoJulgador"),
+                _iso_date(source.get("dataAjuizamento")),
+                _iso_date(source.get("dataHoraUltimaAtualizacao")),
+                json_backend.dumps(source),
+            ))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO processos VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [(key, json_backend.dumps(value)) for key, value in meta.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def query(self, where: str, params: List[Any], limit: Optional[int], offset: int = 0) -> List[Tuple[str, str]]:
+        # Mesma ordem do sort determinístico remoto: atualização, depois id
+        sql = f"SELECT id, source FROM processos WHERE {where} ORDER BY atualizado_em, id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = [*params, limit, max(offset, 0)]
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM processos").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LocalMirror:
+    """Espelho incremental dos índices (um SQLite por tribunal) sob `directory`.
+
+    `sync` baixa só o que mudou desde o high-water mark de `dataHoraUltimaAtualizacao`;
+    `serve` responde às ferramentas de conveniência localmente enquanto a cópia tiver
+    no máximo `max_age_seconds` (0 = nunca atende; o espelho só é consultado via `sync`).
+    """
+
+    def __init__(self, directory: str, max_age_seconds: float = 0.0) -> None:
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.logger = get_json_logger()
+        self._stores: Dict[str, MirrorStore] = {}
+        self._lock = threading.Lock()
+        self._stats = {"served": 0, "bypassed": 0}
+
+    def _path(self, tribunal: str) -> str:
+        return os.path.join(self.directory, f"{tribunal}.sqlite3")
+
+    def store(self, tribunal: str, create: bool = True) -> Optional[MirrorStore]:
+        with self._lock:
+            store = self._stores.get(tribunal)
+            if store is None:
+                if not create and not os.path.exists(self._path(tribunal)):
+                    return None
+                os.makedirs(self.directory, exist_ok=True)
+                store = self._stores[tribunal] = MirrorStore(self._path(tribunal))
+            return store
+
+    def sync(self, session: DataJudSession, tribunal: str, page_size: int = 1000, full: bool = False) -> Dict[str, Any]:
+        """Baixa os documentos atualizados desde a última sincronização (tudo, na primeira ou com `full`).
+
+        O high-water mark avança a cada página gravada: uma sincronização interrompida
+        recomeça de onde parou. O intervalo usa `gte`, então o último instante é relido
+        (o upsert torna isso inofensivo).
+        """
+        store = self.store(tribunal)
+        high_water = None if full else store.get_meta("high_water_mark")
+        clauses = []
+        if high_water is not None:
+            bounds: Dict[str, Any] = {"gte": high_water}
+            if isinstance(high_water, (int, float)):
+                bounds["format"] = "epoch_millis"
+            clauses.append({"range": {"dataHoraUltimaAtualizacao": bounds}})
+        body = query_builder.filter_search(clauses)
+        started = time.perf_counter()
+        documents = pages = 0
+        for page in iter_search_pages(session, "POST", f"/api_publica_{tribunal}/_search", body, page_size):
+            last = page[-1] if isinstance(page[-1], dict) else {}
+            # Valor de sort da data (epoch millis no Elasticsearch): independe do formato do _source
+            sort_values = last.get("sort") or [(last.get("_source") or {}).get("dataHoraUltimaAtualizacao")]
+            if sort_values[0] is not None:
+                high_water = sort_values[0]
+            documents += store.upsert(page, {"high_water_mark": high_water})
+            pages += 1
+        synced_at = time.time()
+        store.upsert((), {"synced_at": synced_at})
+        result = {
+            "tribunal": tribunal,
+            "documentos": documents,
+            "paginas": pages,
+            "high_water_mark": high_water,
+            "total_local": store.count(),
+            "duracao_s": round(time.perf_counter() - started, 3),
+            "sincronizado_em": synced_at,
+        }
+        self.logger.info("Espelho DataJUD sincronizado", extra={"tool_name": "mirror.sync", "params": result})
+        return result
+
+    def is_fresh(self, tribunal: str) -> bool:
+        if self.max_age_seconds <= 0:
+            return False
+        store = self.store(tribunal, create=False)
+        synced_at = store.get_meta("synced_at") if store is not None else None
+        return synced_at is not None and time.time() - synced_at <= self.max_age_seconds
+
+    def serve(self, tool_name: str, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resposta local para ferramentas de conveniência; None = consultar a API."""
+        tribunal, _, method = tool_name.partition(".")
+        if method not in MIRRORED_METHODS or any(kwargs.get(key) is not None for key in _REMOTE_ONLY):
+            return None
+        if not source_filter_supported(kwargs.get("_source")) or not self.is_fresh(tribunal):
+            self._count("bypassed")
+            return None
+        clause = self._where(method, kwargs)
+        if clause is None:
+            # Parâmetros inválidos: a API (via query_builder) devolve o erro de validação
+            return None
+        where, params = clause
+        todas = bool(kwargs.get("buscar_todas_paginas"))
+        limit = None if todas else self._limit(method, kwargs)
+        # Com buscar_todas_paginas a API também ignora from/pagina (cursor search_after desde o início)
+        offset = 0 if limit is None else self._offset(kwargs, limit)
+        rows = self.store(tribunal).query(where, params, limit, offset)
+        source_filter = kwargs.get("_source")
+        hits = []
+        # Sem `sort` nos hits: cursores locais não valem na API (search_after vai sempre ao DataJUD)
+        for doc_id, source in rows:
+            hit: Dict[str, Any] = {"_id": doc_id}
+            projected = filter_source(json_backend.loads(source), source_filter)
+            if projected is not None:
+                hit["_source"] = projected
+            hits.append(hit)
+        self._count("served")
+        compacto = bool(kwargs.get("compacto"))
+        if todas:
+            return {"data": compact_hits(hits) if compacto else hits, "pagination": {"fetched": len(hits)}, "espelho": tribunal}
+        if compacto:
+            return {"data": compact_hits(hits), "total": None, "espelho": tribunal}
+        return {"hits": {"hits": hits}, "espelho": tribunal}
+
+    @staticmethod
+    def _limit(method: str, kwargs: Dict[str, Any]) -> int:
+        if method == "buscar_por_numero":
+            # Mesmo `size` da API: folga para um documento por grau
+            return query_builder.numero_page_size(len(query_builder.as_list(kwargs.get("numeroProcesso"))))
+        return int(kwargs.get("size") or 10)
+
+    @staticmethod
+    def _offset(kwargs: Dict[str, Any], limit: int) -> int:
+        # Como na montagem do corpo remoto: `pagina` (a partir de 1) prevalece sobre `from`
+        if kwargs.get("pagina") is not None:
+            return max(int(kwargs["pagina"]) - 1, 0) * limit
+        return int(kwargs.get("from") or 0)
+
+    @staticmethod
+    def _where(method: str, kwargs: Dict[str, Any]) -> Optional[Tuple[str, List[Any]]]:
+        if method == "buscar_por_numero":
+            numeros = [query_builder.normalize_numero_processo(n) for n in query_builder.as_list(kwargs.get("numeroProcesso"))]
+            numeros = [n for n in numeros if n]
+            if not numeros:
+                return None
+            return f"numero_processo IN ({', '.join('?' * len(numeros))})", numeros
+
+        column, field = ("classe_codigo", "classe_codigo") if method == "buscar_por_classe_e_periodo" else ("orgao_codigo", "orgaoJulgador_codigo")
+        codigos = query_builder.as_list(kwargs.get(field))
+        date_column = _DATE_COLUMNS.get(kwargs.get("campo_data") or "dataAjuizamento")
+        if not codigos or date_column is None:
+            return None
+        conditions = [f"{column} IN ({', '.join('?' * len(codigos))})"]
+        params: List[Any] = list(codigos)
+        for op, key in ((">=", "data_inicio"), ("<=", "data_fim")):
+            if kwargs.get(key) is not None:
+                conditions.append(f"{date_column} {op} ?")
+                params.append(_iso_date(kwargs[key]))
+        return " AND ".join(conditions), params
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def status(self) -> List[Dict[str, Any]]:
+        # Tribunais com arquivo no diretório (inclusive os de outros processos)
+        if not os.path.isdir(self.directory):
+            return []
+        tribunais = sorted(name[: -len(".sqlite3")] for name in os.listdir(self.directory) if name.endswith(".sqlite3"))
+        entries = []
+        for tribunal in tribunais:
+            store = self.store(tribunal)
+            synced_at = store.get_meta("synced_at")
+            entries.append({
+                "tribunal": tribunal,
+                "documentos": store.count(),
+                "high_water_mark": store.get_meta("high_water_mark"),
+                "sincronizado_em": synced_at,
+                "idade_s": round(time.time() - synced_at, 1) if synced_at else None,
+                "fresco": self.is_fresh(tribunal),
+            })
+        return entries
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        with self._lock:
+            stores, self._stores = list(self._stores.values()), {}
+        for store in stores:
+            store.close()
+
+
+def default_mirror_dir() -> str:
+    return os.getenv("DATAJUD_MIRROR_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "mcp-datajud", "mirror")
+
+
+def create_mirror_from_env() -> Optional[LocalMirror]:
+    # DATAJUD_MIRROR_MAX_AGE (segundos) > 0 ativa o atendimento local das ferramentas de conveniência
+    max_age = float(os.getenv("DATAJUD_MIRROR_MAX_AGE", "0") or 0)
+    if max_age <= 0:
+        return None
+    return LocalMirror(default_mirror_dir(), max_age_seconds=max_age)
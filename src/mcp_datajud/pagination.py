@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from . import tracing
+from .errors import APIError
+from .http_client import AsyncDataJudSession, DataJudSession
+from .projection import cursor_filter_path
+
+
+# Ordenação padrão (exemplo oficial do DataJUD) + desempate determinístico.
+# `unmapped_type` evita erro em índices cujo mapeamento não tenha o campo.
+DEFAULT_SORT: List[Dict[str, Any]] = [{"@timestamp": {"order": "asc"}}]
+TIEBREAKER_SORT: Dict[str, Any] = {"id.keyword": {"order": "asc", "unmapped_type": "keyword"}}
+PIT_TIEBREAKER_SORT: Dict[str, Any] = {"_shard_doc": "asc"}
+
+MAX_PAGE_SIZE = 10000
+
+
+def _sort_fields(sort: List[Any]) -> set[str]:
+    fields: set[str] = set()
+    for entry in sort:
+        if isinstance(entry, str):
+            fields.add(entry)
+        elif isinstance(entry, dict):
+            fields.update(entry.keys())
+    return fields
+
+
+def ensure_tiebreaker_sort(sort: Any, use_pit: bool = False) -> List[Any]:
+    """Normaliza `sort` para lista e garante um critério de desempate único (exigido por search_after)."""
+    if not sort:
+        normalized: List[Any] = list(DEFAULT_SORT)
+    elif isinstance(sort, list):
+        normalized = list(sort)
+    else:
+        normalized = [sort]
+
+    tiebreaker = PIT_TIEBREAKER_SORT if use_pit else TIEBREAKER_SORT
+    existing = _sort_fields(normalized)
+    if not existing.intersection(tiebreaker.keys()) and "id" not in existing:
+        normalized.append(tiebreaker)
+    return normalized
+
+
+def _index_path(search_path: str) -> str:
+    return search_path[: -len("/_search")] if search_path.endswith("/_search") else search_path
+
+
+def _prepare_cursor_body(body: Dict[str, Any], page_size: int, use_pit: bool) -> Dict[str, Any]:
+    cursor_body = {k: v for k, v in body.items() if k not in ("from", "size")}
+    cursor_body["size"] = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    cursor_body["sort"] = ensure_tiebreaker_sort(body.get("sort"), use_pit=use_pit)
+    return cursor_body
+
+
+def _extract_hits(resp: Any) -> List[Any]:
+    return (
+        resp.get("hits", {}).get("hits", [])
+        if isinstance(resp, dict)
+        else []
+    )
+
+
+def _next_search_after(hits: List[Any]) -> Optional[List[Any]]:
+    last_sort = hits[-1].get("sort") if hits and isinstance(hits[-1], dict) else None
+    return last_sort or None
+
+
+def iter_search_pages(
+    session: DataJudSession,
+    http_method: str,
+    path: str,
+    body: Dict[str, Any],
+    page_size: int = 1000,
+    use_pit: bool = False,
+    keep_alive: str = "1m",
+    filter_path: Optional[str] = None,
+) -> Iterator[List[Any]]:
+    """Itera páginas de hits com `search_after` (sem limite de `max_result_window`).
+
+    Memória constante: apenas a página corrente é mantida. Com `use_pit`, abre um
+    point-in-time para uma visão consistente do índice durante toda a iteração.
+    `filter_path` é estendido com os campos que o cursor exige. As páginas com PIT vão para
+    `/_search` na raiz, mas breaker e métricas continuam rotulados pelo caminho do índice.
+    """
+    cursor_body = _prepare_cursor_body(body, page_size, use_pit)
+    filter_path = cursor_filter_path(filter_path, use_pit)
+    params = {"filter_path": filter_path} if filter_path else None
+    size = cursor_body["size"]
+    pit_id: Optional[str] = None
+    search_path = path
+    if use_pit:
+        resp = session.request(method="POST", path=f"{_index_path(path)}/_pit", params={"keep_alive": keep_alive})
+        pit_id = resp.get("id") if isinstance(resp, dict) else None
+        if not pit_id:
+            raise APIError("Não foi possível abrir point-in-time (PIT) na API DataJUD")
+        search_path = "/_search"
+
+    page_number = 0
+    try:
+        while True:
+            page_number += 1
+            if pit_id:
+                cursor_body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+            with tracing.span("datajud.page", {"url.path": path, "datajud.page": page_number}) as page_span:
+                resp = session.request(method=http_method, path=search_path, params=params, json_body=cursor_body, endpoint=path)
+                hits = _extract_hits(resp)
+                page_span.set_attribute("datajud.hits", len(hits))
+            # O PIT pode ser renovado a cada resposta
+            if pit_id and isinstance(resp, dict):
+                pit_id = resp.get("pit_id", pit_id)
+            if hits:
+                yield hits
+            search_after = _next_search_after(hits)
+            if len(hits) < size or search_after is None:
+                return
+            cursor_body["search_after"] = search_after
+    finally:
+        if pit_id:
+            try:
+                session.request(method="DELETE", path="/_pit", json_body={"id": pit_id}, endpoint=f"{_index_path(path)}/_pit")
+            except APIError:
+                # PIT expira sozinho após keep_alive
+                pass
+
+
+def iter_search_hits(
+    session: DataJudSession,
+    http_method: str,
+    path: str,
+    body: Dict[str, Any],
+    page_size: int = 1000,
+    use_pit: bool = False,
+    keep_alive: str = "1m",
+    filter_path: Optional[str] = None,
+) -> Iterator[Any]:
+    for page in iter_search_pages(session, http_method, path, body, page_size, use_pit, keep_alive, filter_path):
+        yield from page
+
+
+async def aiter_search_pages(
+    session: AsyncDataJudSession,
+    http_method: str,
+    path: str,
+    body: Dict[str, Any],
+    page_size: int = 1000,
+    use_pit: bool = False,
+    keep_alive: str = "1m",
+    filter_path: Optional[str] = None,
+) -> AsyncIterator[List[Any]]:
+    """Variante assíncrona de `iter_search_pages`."""
+    cursor_body = _prepare_cursor_body(body, page_size, use_pit)
+    filter_path = cursor_filter_path(filter_path, use_pit)
+    params = {"filter_path": filter_path} if filter_path else None
+    size = cursor_body["size"]
+    pit_id: Optional[str] = None
+    search_path = path
+    if use_pit:
+        resp = await session.request(method="POST", path=f"{_index_path(path)}/_pit", params={"keep_alive": keep_alive})
+        pit_id = resp.get("id") if isinstance(resp, dict) else None
+        if not pit_id:
+            raise APIError("Não foi possível abrir point-in-time (PIT) na API DataJUD")
+        search_path = "/_search"
+
+    page_number = 0
+    try:
+        while True:
+            page_number += 1
+            if pit_id:
+                cursor_body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+            with tracing.span("datajud.page", {"url.path": path, "datajud.page": page_number}) as page_span:
+                resp = await session.request(method=http_method, path=search_path, params=params, json_body=cursor_body, endpoint=path)
+                hits = _extract_hits(resp)
+                page_span.set_attribute("datajud.hits", len(hits))
+            if pit_id and isinstance(resp, dict):
+                pit_id = resp.get("pit_id", pit_id)
+            if hits:
+                yield hits
+            search_after = _next_search_after(hits)
+            if len(hits) < size or search_after is None:
+                return
+            cursor_body["search_after"] = search_after
+    finally:
+        if pit_id:
+            try:
+                await session.request(method="DELETE", path="/_pit", json_body={"id": pit_id}, endpoint=f"{_index_path(path)}/_pit")
+            except APIError:
+                pass
+
+
+async def aiter_search_hits(
+    session: AsyncDataJudSession,
+    http_method: str,
+    path: str,
+    body: Dict[str, Any],
+    page_size: int = 1000,
+    use_pit: bool = False,
+    keep_alive: str = "1m",
+    filter_path: Optional[str] = None,
+) -> AsyncIterator[Any]:
+    async for page in aiter_search_pages(session, http_method, path, body, page_size, use_pit, keep_alive, filter_path):
+        for hit in page:
+            yield hit
@@ -1,33 +1,95 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
+from .aggregation import DEFAULT_LIMIT, DIMENSOES, INTERVALOS, PERIODO, TRIBUNAL
+from .batch import DEFAULT_CHUNK_SIZE
 from .http_client import DataJudSession
+from .query_builder import DATE_FIELDS
 
 
+# Catálogo dos índices públicos do DataJUD (api_publica_<alias>), agrupado por segmento da Justiça
+SEGMENTOS: Dict[str, List[str]] = {
+    "superiores": ["tst", "tse", "stj", "stm"],
+    "federal": [f"trf{n}" for n in range(1, 7)],
+    "estadual": [
+        "tjac", "tjal", "tjam", "tjap", "tjba", "tjce", "tjdft", "tjes", "tjgo",
+        "tjma", "tjmg", "tjms", "tjmt", "tjpa", "tjpb", "tjpe", "tjpi", "tjpr",
+        "tjrj", "tjrn", "tjro", "tjrr", "tjrs", "tjsc", "tjse", "tjsp", "tjto",
+    ],
+    "trabalho": [f"trt{n}" for n in range(1, 25)],
+    "eleitoral": [
+        "tre-ac", "tre-al", "tre-am", "tre-ap", "tre-ba", "tre-ce", "tre-dft", "tre-es", "tre-go",
+        "tre-ma", "tre-mg", "tre-ms", "tre-mt", "tre-pa", "tre-pb", "tre-pe", "tre-pi", "tre-pr",
+        "tre-rj", "tre-rn", "tre-ro", "tre-rr", "tre-rs", "tre-sc", "tre-se", "tre-sp", "tre-to",
+    ],
+    "militar": ["tjmmg", "tjmrs", "tjmsp"],
+}
+
+SEGMENTO_DESCRICOES: Dict[str, str] = {
+    "superiores": "Tribunais Superiores",
+    "federal": "Justiça Federal",
+    "estadual": "Justiça Estadual",
+    "trabalho": "Justiça do Trabalho",
+    "eleitoral": "Justiça Eleitoral",
+    "militar": "Justiça Militar Estadual",
+}
+
+CATALOGO_COMPLETO: List[str] = [tribunal for membros in SEGMENTOS.values() for tribunal in membros]
+
+# Padrão enxuto: com o catálogo inteiro, list_tools passa de 500 ferramentas e `todos.*` abre
+# ~91 requisições. DATAJUD_TRIBUNAIS escolhe aliases e/ou segmentos; `todos` = catálogo completo.
 DEFAULT_TRIBUNAIS: List[str] = [
-    # Amostra; pode ser configurado via env VAR DATAJUD_TRIBUNAIS (separados por vírgula)
     "tjsp", "tjmg", "tjrs", "tjpr", "tjba", "tjpe",
     "trt1", "trt2", "trt3", "trt4", "trt5",
 ]
 
+SEGMENTO_POR_TRIBUNAL: Dict[str, str] = {
+    tribunal: segmento for segmento, membros in SEGMENTOS.items() for tribunal in membros
+}
+
+# Categoria sintética que consulta todos os tribunais configurados
+FANOUT_CATEGORY = "todos"
+
+
+def _expand(entry: str) -> List[str]:
+    if entry == FANOUT_CATEGORY:
+        return CATALOGO_COMPLETO
+    return SEGMENTOS.get(entry, [entry] if entry else [])
+
+
+def parse_tribunais(tribunais_csv: str | None) -> List[str]:
+    # Aceita aliases (tjsp), nomes de segmento (trabalho) e `todos`, preservando a ordem e sem duplicatas
+    if not tribunais_csv:
+        return list(DEFAULT_TRIBUNAIS)
+    tribunais: List[str] = []
+    for entry in tribunais_csv.split(","):
+        for tribunal in _expand(entry.strip().lower()):
+            if tribunal not in tribunais:
+                tribunais.append(tribunal)
+    return tribunais
+
 
 class APIParser:
     def __init__(self, session: DataJudSession) -> None:
         self.session = session
 
     def load_spec(self) -> Dict[str, Any]:
-        tribunais_csv = os.getenv("DATAJUD_TRIBUNAIS")
-        tribunais = [t.strip().lower() for t in tribunais_csv.split(",") if t.strip()] if tribunais_csv else DEFAULT_TRIBUNAIS
+        tribunais = parse_tribunais(os.getenv("DATAJUD_TRIBUNAIS"))
 
         spec: Dict[str, Any] = {"tribunais": {}}
+        # Um único schema compartilhado por todos os tribunais (assinatura/docstring derivadas uma vez)
+        input_schema = self._default_input_schema()
+        builder_tools = self._query_builder_tools()
+        aggregation_schemas = self._aggregation_schemas()
         for tribunal in tribunais:
-            # Em produção, poderíamos buscar mapeamentos para enriquecer o schema.
-            # Aqui, definimos uma ferramenta canônica por tribunal: buscar_processos (POST /api_publica_{tribunal}/_search)
+            # Uma ferramenta canônica por tribunal: buscar_processos (POST /api_publica_{tribunal}/_search).
+            # Com DATAJUD_MAPPING_INTROSPECTION, o schema é enriquecido depois pelo mapeamento (mapping.py).
             spec["tribunais"][tribunal] = {
                 "name": tribunal,
                 "display_name": tribunal.upper(),
+                "segment": SEGMENTO_POR_TRIBUNAL.get(tribunal),
                 "endpoint": f"/api_publica_{tribunal}/_search",
                 "description": f"Busca processos no {tribunal.upper()} usando consulta Elasticsearch.",
                 "methods": [
@@ -36,12 +98,184 @@ class APIParser:
                         "http_method": "POST",
                         "path": f"/api_publica_{tribunal}/_search",
                         "summary": f"Buscar processos no {tribunal.upper()}",
-                        "parameters": self._default_input_schema(),
+                        "parameters": input_schema,
+                    }
+                ]
+                + [
+                    # Ferramentas de conveniência: bool.filter + sort determinístico (query_builder.py)
+                    {
+                        "tool_name": f"{tribunal}.{method_name}",
+                        "http_method": "POST",
+                        "path": f"/api_publica_{tribunal}/_search",
+                        "summary": summary.format(tribunal=tribunal.upper()),
+                        "parameters": schema,
+                        "query_builder": builder,
                     }
-                ],
+                    for method_name, builder, summary, schema in builder_tools
+                ]
+                + self._aggregation_methods(f"no {tribunal.upper()}", [tribunal], aggregation_schemas),
             }
+        # Fan-out por segmento (ex.: trabalho.buscar_processos consulta todos os TRTs configurados)
+        for segmento, membros in SEGMENTOS.items():
+            configurados = [t for t in membros if t in spec["tribunais"]]
+            if len(configurados) > 1:
+                spec["tribunais"][segmento] = self._fanout_spec(
+                    configurados,
+                    name=segmento,
+                    description=f"Busca processos em todos os tribunais do segmento {SEGMENTO_DESCRICOES[segmento]}; hits intercalados com atribuição em 'tribunal' e erros parciais por tribunal.",
+                    summary=f"Buscar processos na {SEGMENTO_DESCRICOES[segmento]}",
+                    segment=segmento,
+                )
+        if len(tribunais) > 1:
+            spec["tribunais"][FANOUT_CATEGORY] = self._fanout_spec(tribunais)
+        # Busca em lote por números CNJ (roteada pelo segmento J.TR); existe mesmo com um único tribunal
+        todos = spec["tribunais"].setdefault(FANOUT_CATEGORY, {
+            "name": FANOUT_CATEGORY,
+            "display_name": FANOUT_CATEGORY.upper(),
+            "segment": None,
+            "fanout": True,
+            "description": "Consultas em vários tribunais.",
+            "methods": [],
+        })
+        todos["methods"].append(self._batch_method_spec(tribunais))
+        spec["routes"] = self._routing_table(spec["tribunais"])
         return spec
 
+    @staticmethod
+    def apply_input_schema(spec: Dict[str, Any], tribunal: str, input_schema: Dict[str, Any]) -> None:
+        # Troca o schema do tribunal (atribuição atômica; leitores veem o antigo ou o novo).
+        # Ferramentas de conveniência e de agregação têm schema próprio e não recebem os filtros tipados.
+        for method in spec["tribunais"][tribunal].get("methods", []):
+            if "query_builder" not in method and "aggregation" not in method:
+                method["parameters"] = input_schema
+
+    @staticmethod
+    def _routing_table(tribunais: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+        # tool_name -> categoria/método: resolução O(1) sem split/getattr por chamada
+        routes: Dict[str, Dict[str, str]] = {}
+        for category, t_spec in tribunais.items():
+            for method in t_spec.get("methods", []):
+                tool_name = method["tool_name"]
+                routes[tool_name] = {"category": category, "method": tool_name.partition(".")[2]}
+        return routes
+
+    def _fanout_spec(
+        self,
+        tribunais: List[str],
+        name: str = FANOUT_CATEGORY,
+        description: str = "Busca processos em vários tribunais simultaneamente; hits intercalados com atribuição em 'tribunal' e erros parciais por tribunal.",
+        summary: str = "Buscar processos em vários tribunais",
+        segment: str | None = None,
+    ) -> Dict[str, Any]:
+        # Ferramenta de fan-out: mesma consulta em vários índices, em paralelo
+        input_schema = self._default_input_schema()
+        input_schema["properties"]["tribunais"] = {
+            "type": ["array", "null"],
+            "items": {"type": "string", "enum": list(tribunais)},
+            "description": "Tribunais consultados (padrão: todos os configurados)",
+        }
+        return {
+            "name": name,
+            "display_name": name.upper(),
+            "segment": segment,
+            "fanout": True,
+            "description": description,
+            "methods": [
+                {
+                    "tool_name": f"{name}.buscar_processos",
+                    "http_method": "POST",
+                    "paths": {t: f"/api_publica_{t}/_search" for t in tribunais},
+                    "summary": summary,
+                    "parameters": input_schema,
+                }
+            ]
+            + self._aggregation_methods(f"na {SEGMENTO_DESCRICOES[segment]}" if segment else "em vários tribunais", tribunais, self._aggregation_schemas(tribunais), name),
+        }
+
+    def _aggregation_methods(self, label: str, tribunais: List[str], schemas: Tuple[Dict[str, Any], Dict[str, Any]], category: str | None = None) -> List[Dict[str, Any]]:
+        # size 0 no DataJUD: contagem (hits.total) ou tabela de buckets (aggregation.py), sem baixar hits
+        category = category or tribunais[0]
+        contar, agregar = schemas
+        return [
+            {
+                "tool_name": f"{category}.{method_name}",
+                "http_method": "POST",
+                "paths": {t: f"/api_publica_{t}/_search" for t in tribunais},
+                "summary": summary.format(label=label),
+                "parameters": schema,
+                "aggregation": kind,
+            }
+            for method_name, kind, summary, schema in (
+                ("contar_processos", "contar", "Contar processos {label} (size 0, só o total)", contar),
+                ("agregar_processos", "agregar", "Agregar processos {label} por classe, órgão, grau, período ou campo (tabela compacta de buckets)", agregar),
+            )
+        ]
+
+    def _aggregation_schemas(self, tribunais: List[str] | None = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        # (contar, agregar); com `tribunais`, versão multi-tribunal com seleção de índices
+        codigos = {"type": ["integer", "array", "null"], "items": {"type": "integer"}}
+        filtros: Dict[str, Any] = {
+            "query": {"type": ["object", "null"], "description": "Consulta Elasticsearch adicional (combinada com os filtros)"},
+            "classe_codigo": {**codigos, "description": "Código(s) da classe processual (TPU)"},
+            "orgaoJulgador_codigo": {**codigos, "description": "Código(s) do órgão julgador"},
+            "grau": {"type": ["string", "array", "null"], "items": {"type": "string"}, "description": "Grau(s) (ex.: G1, G2, JE)"},
+            "data_inicio": {"type": ["string", "null"], "description": "Início do período (ex.: 2024-01-01)"},
+            "data_fim": {"type": ["string", "null"], "description": "Fim do período (ex.: 2024-12-31)"},
+            "campo_data": {"type": "string", "enum": list(DATE_FIELDS), "default": "dataAjuizamento", "description": "Campo de data do período e do agrupamento por período"},
+        }
+        dimensoes = [*DIMENSOES, PERIODO] + ([TRIBUNAL] if tribunais else [])
+        agregacao = {
+            "agrupar_por": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": f"Dimensões da tabela, na ordem: {', '.join(dimensoes)} ou um campo keyword/numérico (ex.: classe.nome.keyword)",
+            },
+            "intervalo": {"type": "string", "enum": list(INTERVALOS), "default": "month", "description": "Intervalo do agrupamento por período"},
+            "limite": {"type": "integer", "default": DEFAULT_LIMIT, "minimum": 1, "maximum": 10000, "description": "Buckets por dimensão (top-N por contagem)"},
+            "todos_os_buckets": {"type": "boolean", "default": False, "description": "Todos os buckets via agregação composite paginada (alta cardinalidade; ignora limite)"},
+        }
+        if tribunais:
+            filtros["tribunais"] = {
+                "type": ["array", "null"],
+                "items": {"type": "string", "enum": list(tribunais)},
+                "description": "Tribunais consultados (padrão: todos os configurados)",
+            }
+
+        def schema(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+            return {"type": "object", "properties": properties, "required": required, "additionalProperties": False}
+
+        return schema(dict(filtros), []), schema({**agregacao, **filtros}, ["agrupar_por"])
+
+    def _batch_method_spec(self, tribunais: List[str]) -> Dict[str, Any]:
+        return {
+            "tool_name": f"{FANOUT_CATEGORY}.buscar_numeros_em_lote",
+            "http_method": "POST",
+            "paths": {t: f"/api_publica_{t}/_search" for t in tribunais},
+            "summary": "Buscar muitos processos por número CNJ (roteados ao tribunal pelo segmento J.TR, em lotes `terms`)",
+            "batch": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "numerosProcesso": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Números CNJ (com ou sem pontuação); o resultado mapeia cada um a {tribunal, encontrado, hits}",
+                    },
+                    "tamanho_lote": {
+                        "type": "integer",
+                        "default": DEFAULT_CHUNK_SIZE,
+                        "minimum": 1,
+                        "maximum": 10000,
+                        "description": "Números por consulta `terms` (uma requisição por lote e tribunal)",
+                    },
+                    "_source": {"type": ["boolean", "string", "array", "object", "null"], "description": "Campos de _source retornados (numeroProcesso é sempre incluído)"},
+                    "compacto": {"type": "boolean", "default": False, "description": "Hits como linhas planas (id + _source com chaves pontuadas)"},
+                },
+                "required": ["numerosProcesso"],
+                "additionalProperties": False,
+            },
+        }
+
     def _default_input_schema(self) -> Dict[str, Any]:
         # Schema MCP-like (JSON Schema subset) aceitando corpo Elasticsearch
         return {
@@ -52,10 +286,89 @@ class APIParser:
                 "size": {"type": "integer", "default": 10, "minimum": 1, "maximum": 10000},
                 "from": {"type": "integer", "default": 0, "minimum": 0},
                 "search_after": {"type": ["array", "null"], "description": "Cursor para paginação eficiente"},
+                "_source": {
+                    "type": ["boolean", "string", "array", "object", "null"],
+                    "description": "Campos de _source retornados: lista (ex.: [\"numeroProcesso\", \"classe.nome\"]), {\"includes\": [...], \"excludes\": [\"movimentos\"]} ou false",
+                },
+                "track_total_hits": {
+                    "type": ["boolean", "integer", "null"],
+                    "description": "Contagem exata de hits (true), até um limite (inteiro) ou desativada (false, mais rápido)",
+                },
+                "filter_path": {
+                    "type": ["string", "array", "null"],
+                    "description": "Filtra a resposta no servidor (query string filter_path, ex.: hits.hits._source,hits.total)",
+                },
                 # Controles adicionais do cliente (não enviados como-is):
                 "pagina": {"type": ["integer", "null"], "minimum": 1, "description": "Página 1-based para conveniência"},
-                "buscar_todas_paginas": {"type": "boolean", "default": False},
+                "buscar_todas_paginas": {"type": "boolean", "default": False, "description": "Itera todas as páginas com search_after (ignora from/pagina)"},
+                "usar_pit": {"type": "boolean", "default": False, "description": "Com buscar_todas_paginas, usa point-in-time para visão consistente do índice"},
+                "compacto": {"type": "boolean", "default": False, "description": "Retorna linhas planas (id + _source com chaves pontuadas) em 'data'"},
             },
             "required": [],
             "additionalProperties": True,
         }
+
+    def _query_builder_tools(self) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        # (método, construtor, resumo, schema); schemas compartilhados por todos os tribunais
+        periodo = {
+            "data_inicio": {"type": ["string", "null"], "description": "Início do período (ex.: 2023-01-01)"},
+            "data_fim": {"type": ["string", "null"], "description": "Fim do período (ex.: 2023-12-31)"},
+            "campo_data": {
+                "type": "string",
+                "enum": list(DATE_FIELDS),
+                "default": "dataAjuizamento",
+                "description": "Campo de data filtrado pelo período",
+            },
+        }
+        paginacao = {
+            "size": {"type": "integer", "default": 10, "minimum": 1, "maximum": 10000},
+            "search_after": {"type": ["array", "null"], "description": "Cursor (valores de `sort` do último hit)"},
+            "buscar_todas_paginas": {"type": "boolean", "default": False, "description": "Itera todas as páginas com search_after"},
+        }
+        projecao = {
+            "_source": {"type": ["boolean", "string", "array", "object", "null"], "description": "Campos de _source retornados"},
+            "filter_path": {"type": ["string", "array", "null"], "description": "Filtra a resposta no servidor (query string filter_path)"},
+            "compacto": {"type": "boolean", "default": False, "description": "Retorna linhas planas (id + _source com chaves pontuadas) em 'data'"},
+        }
+
+        def schema(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+            return {"type": "object", "properties": properties, "required": required, "additionalProperties": False}
+
+        codigos = {"type": ["integer", "array"], "items": {"type": "integer"}}
+        return [
+            (
+                "buscar_por_numero",
+                "numero",
+                "Buscar processos por número CNJ no {tribunal}",
+                schema({
+                    "numeroProcesso": {
+                        "type": ["string", "array"],
+                        "items": {"type": "string"},
+                        "description": "Número CNJ (com ou sem pontuação) ou lista de números",
+                    },
+                    **projecao,
+                }, ["numeroProcesso"]),
+            ),
+            (
+                "buscar_por_classe_e_periodo",
+                "classe_e_periodo",
+                "Buscar processos por classe processual e período no {tribunal}",
+                schema({
+                    "classe_codigo": {**codigos, "description": "Código(s) da classe processual (TPU)"},
+                    **periodo,
+                    **paginacao,
+                    **projecao,
+                }, ["classe_codigo"]),
+            ),
+            (
+                "buscar_por_orgao",
+                "orgao",
+                "Buscar processos por órgão julgador no {tribunal}",
+                schema({
+                    "orgaoJulgador_codigo": {**codigos, "description": "Código(s) do órgão julgador"},
+                    **periodo,
+                    **paginacao,
+                    **projecao,
+                }, ["orgaoJulgador_codigo"]),
+            ),
+        ]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Optional
+
+
+# Campos da resposta que a paginação por cursor precisa mesmo com filter_path
+CURSOR_FILTER_PATHS = ("hits.hits.sort",)
+PIT_FILTER_PATHS = ("pit_id",)
+
+
+def normalize_filter_path(filter_path: Any) -> Optional[str]:
+    """Aceita string CSV ou lista e devolve o formato da query string do Elasticsearch."""
+    if not filter_path:
+        return None
+    if isinstance(filter_path, str):
+        entries = [entry.strip() for entry in filter_path.split(",")]
+    else:
+        entries = [str(entry).strip() for entry in filter_path]
+    entries = [entry for entry in entries if entry]
+    return ",".join(entries) or None
+
+
+def cursor_filter_path(filter_path: Optional[str], use_pit: bool = False) -> Optional[str]:
+    # Sem `sort` nos hits o search_after não avança; sem `pit_id`, o PIT não é renovado
+    if not filter_path:
+        return None
+    entries = filter_path.split(",")
+    required = CURSOR_FILTER_PATHS + (PIT_FILTER_PATHS if use_pit else ())
+    entries.extend(path for path in required if path not in entries)
+    return ",".join(entries)
+
+
+def flatten_source(source: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    # Objetos aninhados viram chaves pontuadas (classe.nome); listas são mantidas como estão
+    row: Dict[str, Any] = {}
+    for key, value in source.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(flatten_source(value, f"{name}."))
+        else:
+            row[name] = value
+    return row
+
+
+def compact_hit(hit: Any) -> Any:
+    """Linha plana: `id` do documento + `_source` achatado (sem _index/_score/sort)."""
+    if not isinstance(hit, dict):
+        return hit
+    row: Dict[str, Any] = {"id": hit.get("_id")}
+    source = hit.get("_source")
+    if isinstance(source, dict):
+        row.update(flatten_source(source))
+    return row
+
+
+def compact_hits(hits: List[Any]) -> List[Any]:
+    return [compact_hit(hit) for hit in hits]
+
+
+def compact_result(result: Any) -> Dict[str, Any]:
+    # Resposta ES de uma página -> { data: linhas, total }
+    if not isinstance(result, dict):
+        return {"data": [], "total": None}
+    hits = result.get("hits") or {}
+    total = hits.get("total")
+    if isinstance(total, dict):
+        total = total.get("value")
+    return {"data": compact_hits(hits.get("hits") or []), "total": total}
+
+
+def _source_paths(value: Any) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else [str(path) for path in value]
+
+
+def source_filter_supported(source_filter: Any) -> bool:
+    # Filtragem local cobre caminhos pontuados; curingas ficam a cargo do Elasticsearch
+    if source_filter is None or isinstance(source_filter, bool):
+        return True
+    if isinstance(source_filter, dict):
+        paths = _source_paths(source_filter.get("includes")) + _source_paths(source_filter.get("excludes"))
+    else:
+        paths = _source_paths(source_filter)
+    return not any("*" in path for path in paths)
+
+
+def _pick(source: Dict[str, Any], parts: List[str], target: Dict[str, Any]) -> None:
+    head, rest = parts[0], parts[1:]
+    if head not in source:
+        return
+    if not rest:
+        target[head] = source[head]
+    elif isinstance(source[head], dict):
+        _pick(source[head], rest, target.setdefault(head, {}))
+
+
+def _drop(source: Dict[str, Any], parts: List[str]) -> None:
+    head, rest = parts[0], parts[1:]
+    if not rest:
+        source.pop(head, None)
+    elif isinstance(source.get(head), dict):
+        _drop(source[head], rest)
+
+
+def filter_source(source: Dict[str, Any], source_filter: Any) -> Optional[Dict[str, Any]]:
+    """Aplica `_source` (lista, {"includes", "excludes"} ou booleano) a um documento local."""
+    if source_filter is None or source_filter is True:
+        return source
+    if source_filter is False:
+        return None
+    if isinstance(source_filter, dict):
+        includes = _source_paths(source_filter.get("includes"))
+        excludes = _source_paths(source_filter.get("excludes"))
+    else:
+        includes, excludes = _source_paths(source_filter), []
+    if includes:
+        picked: Dict[str, Any] = {}
+        for path in includes:
+            _pick(source, path.split("."), picked)
+        if excludes:
+            # _pick compartilha os subobjetos com o documento original
+            picked = copy.deepcopy(picked)
+    else:
+        picked = copy.deepcopy(source) if excludes else source
+    for path in excludes:
+        _drop(picked, path.split("."))
+    return picked
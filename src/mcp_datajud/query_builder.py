@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .pagination import MAX_PAGE_SIZE, ensure_tiebreaker_sort
+
+
+# Ordenação determinística (data de atualização + desempate único): adequada a search_after
+DETERMINISTIC_SORT: List[Any] = ensure_tiebreaker_sort([{"dataHoraUltimaAtualizacao": {"order": "asc", "unmapped_type": "date"}}])
+
+DATE_FIELDS = ("dataAjuizamento", "dataHoraUltimaAtualizacao")
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def term(field: str, value: Any) -> Dict[str, Any]:
+    """`term` para um valor; `terms` para vários (ambos em contexto de filtro, sem score)."""
+    values = as_list(value)
+    if len(values) == 1:
+        return {"term": {field: values[0]}}
+    return {"terms": {field: values}}
+
+
+def range_(field: str, gte: Any = None, lte: Any = None) -> Optional[Dict[str, Any]]:
+    bounds = {op: bound for op, bound in (("gte", gte), ("lte", lte)) if bound is not None}
+    return {"range": {field: bounds}} if bounds else None
+
+
+def nested(path: Optional[str], clause: Dict[str, Any]) -> Dict[str, Any]:
+    return {"nested": {"path": path, "query": clause}} if path else clause
+
+
+def bool_filter(clauses: Sequence[Optional[Dict[str, Any]]], must: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Filtros são cacheáveis pelo Elasticsearch; apenas a consulta livre (must) pontua
+    query: Dict[str, Any] = {"filter": [clause for clause in clauses if clause]}
+    if must:
+        query["must"] = [must]
+    return {"bool": query}
+
+
+def filter_search(clauses: Sequence[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Corpo de busca sem score: bool.filter, sort determinístico e sem contagem exata de hits."""
+    return {
+        "query": bool_filter(clauses),
+        "sort": list(DETERMINISTIC_SORT),
+        "track_total_hits": False,
+    }
+
+
+def normalize_numero_processo(numero: Any) -> str:
+    # NNNNNNN-DD.AAAA.J.TR.OOOO -> 20 dígitos (formato indexado no DataJUD)
+    return _NON_DIGITS.sub("", str(numero))
+
+
+def numero_page_size(count: int) -> int:
+    # Um número pode ter um documento por grau (G1, G2, ...): `size` = número de processos cortaria hits
+    return max(1, min(MAX_PAGE_SIZE, 2 * count))
+
+
+def _date_field(campo_data: Optional[str]) -> str:
+    field = campo_data or "dataAjuizamento"
+    if field not in DATE_FIELDS:
+        raise ValueError(f"campo_data inválido: {field} (use {' ou '.join(DATE_FIELDS)})")
+    return field
+
+
+def por_numero(params: Dict[str, Any]) -> Dict[str, Any]:
+    numeros = [normalize_numero_processo(n) for n in as_list(params.pop("numeroProcesso", None))]
+    numeros = [n for n in numeros if n]
+    if not numeros:
+        raise ValueError("Informe numeroProcesso (um número CNJ ou uma lista).")
+    body = filter_search([term("numeroProcesso", numeros)])
+    body["size"] = numero_page_size(len(numeros))
+    return body
+
+
+def por_classe_e_periodo(params: Dict[str, Any]) -> Dict[str, Any]:
+    classes = as_list(params.pop("classe_codigo", None))
+    if not classes:
+        raise ValueError("Informe classe_codigo (um código TPU ou uma lista).")
+    field = _date_field(params.pop("campo_data", None))
+    return filter_search([
+        term("classe.codigo", classes),
+        range_(field, params.pop("data_inicio", None), params.pop("data_fim", None)),
+    ])
+
+
+def por_orgao(params: Dict[str, Any]) -> Dict[str, Any]:
+    orgaos = as_list(params.pop("orgaoJulgador_codigo", None))
+    if not orgaos:
+        raise ValueError("Informe orgaoJulgador_codigo (um código ou uma lista).")
+    field = _date_field(params.pop("campo_data", None))
+    return filter_search([
+        term("orgaoJulgador.codigo", orgaos),
+        range_(field, params.pop("data_inicio", None), params.pop("data_fim", None)),
+    ])
+
+
+# Nome do construtor na spec (method_spec["query_builder"]) -> função que consome os parâmetros
+BUILDERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "numero": por_numero,
+    "classe_e_periodo": por_classe_e_periodo,
+    "orgao": por_orgao,
+}
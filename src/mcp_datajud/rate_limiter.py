@@ -1,40 +1,300 @@
 from __future__ import annotations
 
+import abc
+import asyncio
+import json
+import os
 import threading
 import time
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
-class TokenBucketRateLimiter:
+# Após um 429 a taxa efetiva cai pela metade (até MIN_RATE_FACTOR) e se recupera
+# linearmente em RATE_RECOVERY_SECONDS (AIMD).
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_SECONDS = 60.0
+
+
+# Retorno de `_reserve` quando a espera excederia o prazo (nada é reservado)
+RESERVATION_REJECTED = -1.0
+
+
+def _reserve_tokens(
+    state: Dict[str, float],
+    now: float,
+    rate_per_second: float,
+    capacity: float,
+    tokens: float,
+    penalty_seconds: float,
+    max_wait: Optional[float],
+) -> float:
+    """Reserva `tokens` e retorna a espera até o uso (0 = imediato).
+
+    O saldo pode ficar negativo: cada chamador "entra na fila" ao reservar e dorme
+    exatamente o tempo necessário para quitar a dívida, o que dá ordem FIFO sem
+    polling. Algoritmo único para todos os backends; o script Lua do Redis o replica.
+    """
+    current = state.get("tokens", capacity)
+    last = state.get("last", now)
+    blocked_until = state.get("blocked_until", 0.0)
+    factor = state.get("factor", 1.0)
+
+    elapsed = max(0.0, now - last)
+    current = min(capacity, current + elapsed * rate_per_second * factor)
+    factor = min(1.0, factor + elapsed / RATE_RECOVERY_SECONDS)
+
+    wait = 0.0
+    if penalty_seconds > 0:
+        factor = max(MIN_RATE_FACTOR, factor * 0.5)
+        blocked_until = max(blocked_until, now + penalty_seconds)
+    elif tokens > 0:
+        deficit = max(0.0, tokens - current)
+        wait = max(0.0, blocked_until - now) + deficit / (rate_per_second * factor)
+        if max_wait is not None and wait > max_wait:
+            wait = RESERVATION_REJECTED
+        else:
+            current -= tokens
+
+    state.update({"tokens": current, "last": now, "blocked_until": blocked_until, "factor": factor})
+    return wait
+
+
+class RateLimiter(abc.ABC):
+    """Interface dos limitadores: `acquire`, `acquire_async` e `penalize` (feedback de 429).
+
+    Backends implementam apenas `_reserve`; espera, fila e métricas ficam aqui.
+    """
+
+    # Backends com E/S (arquivo, Redis) rodam fora do event loop em `acquire_async`
+    blocking_io = False
+
+    def __init__(self, rate_per_second: float = 5.0, burst_capacity: int = 10) -> None:
+        self.rate_per_second = max(rate_per_second, 0.001)
+        self.capacity = max(burst_capacity, 1)
+        self._metrics_lock = threading.Lock()
+        self._queue_depth = 0
+        self._acquired = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @abc.abstractmethod
+    def _reserve(self, tokens: float, penalty_seconds: float = 0.0, max_wait: Optional[float] = None) -> float:
+        ...
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        wait = self._reserve(tokens, max_wait=timeout)
+        if not self._record_reservation(wait):
+            return False
+        if wait > 0:
+            self._set_waiting(+1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._set_waiting(-1)
+        return True
+
+    async def acquire_async(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        if self.blocking_io:
+            wait = await asyncio.to_thread(self._reserve, tokens, 0.0, timeout)
+        else:
+            wait = self._reserve(tokens, max_wait=timeout)
+        if not self._record_reservation(wait):
+            return False
+        if wait > 0:
+            self._set_waiting(+1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._set_waiting(-1)
+        return True
+
+    def penalize(self, retry_after_seconds: float) -> None:
+        # 429 do DataJUD: pausa o balde (compartilhado) e reduz a taxa efetiva
+        self._reserve(0, penalty_seconds=max(retry_after_seconds, 0.001))
+
+    async def penalize_async(self, retry_after_seconds: float) -> None:
+        if self.blocking_io:
+            await asyncio.to_thread(self.penalize, retry_after_seconds)
+        else:
+            self.penalize(retry_after_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "queue_depth": self._queue_depth,
+                "acquired": self._acquired,
+                "rejected": self._rejected,
+                "total_wait_seconds": self._total_wait,
+                "max_wait_seconds": self._max_wait,
+                "avg_wait_seconds": (self._total_wait / self._acquired) if self._acquired else 0.0,
+            }
+
+    def _record_reservation(self, wait: float) -> bool:
+        with self._metrics_lock:
+            if wait < 0:
+                self._rejected += 1
+                return False
+            self._acquired += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            return True
+
+    def _set_waiting(self, delta: int) -> None:
+        with self._metrics_lock:
+            self._queue_depth += delta
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """Balde em memória do processo (um por worker)."""
+
     def __init__(
         self,
         rate_per_second: float = 5.0,
         burst_capacity: int = 10,
     ) -> None:
-        self.rate_per_second = max(rate_per_second, 0.001)
-        self.capacity = max(burst_capacity, 1)
-        self._tokens = float(self.capacity)
-        self._last_refill = time.monotonic()
+        super().__init__(rate_per_second, burst_capacity)
+        self._state: Dict[str, float] = {"tokens": float(self.capacity), "last": time.monotonic()}
         self._lock = threading.Lock()
 
-    def acquire(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
-        deadline = time.monotonic() + timeout if timeout is not None else None
-        while True:
-            with self._lock:
-                self._refill()
-                if self._tokens >= tokens:
-                    self._tokens -= tokens
-                    return True
-            # Não há tokens suficientes
-            if deadline is not None and time.monotonic() >= deadline:
-                return False
-            time.sleep(1.0 / self.rate_per_second)
-
-    def _refill(self) -> None:
-        now = time.monotonic()
-        elapsed = now - self._last_refill
-        if elapsed <= 0:
-            return
-        add_tokens = elapsed * self.rate_per_second
-        self._tokens = min(self.capacity, self._tokens + add_tokens)
-        self._last_refill = now
+    def _reserve(self, tokens: float, penalty_seconds: float = 0.0, max_wait: Optional[float] = None) -> float:
+        with self._lock:
+            return _reserve_tokens(self._state, time.monotonic(), self.rate_per_second, self.capacity, tokens, penalty_seconds, max_wait)
+
+
+class FileRateLimiter(RateLimiter):
+    """Balde compartilhado entre workers do mesmo host via arquivo com `flock`."""
+
+    blocking_io = True
+
+    def __init__(self, path: str, rate_per_second: float = 5.0, burst_capacity: int = 10) -> None:
+        super().__init__(rate_per_second, burst_capacity)
+        # Import tardio: fcntl só existe em POSIX e os demais backends não dependem dele
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError(
+                "Backend de arquivo requer fcntl (POSIX). No Windows use DATAJUD_RATE_LIMIT_BACKEND=memory ou redis."
+            ) from None
+        self._fcntl = fcntl
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float, penalty_seconds: float = 0.0, max_wait: Optional[float] = None) -> float:
+        # Relógio de parede: o estado é compartilhado entre processos
+        with self._lock, open(self.path, "a+", encoding="utf-8") as handle:
+            self._fcntl.flock(handle, self._fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                raw = handle.read()
+                try:
+                    state: Dict[str, float] = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}
+                wait = _reserve_tokens(state, time.time(), self.rate_per_second, self.capacity, tokens, penalty_seconds, max_wait)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+                return wait
+            finally:
+                self._fcntl.flock(handle, self._fcntl.LOCK_UN)
+
+
+_REDIS_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local tokens = tonumber(ARGV[3])
+local penalty = tonumber(ARGV[4])
+local recovery = tonumber(ARGV[5])
+local min_factor = tonumber(ARGV[6])
+local max_wait = tonumber(ARGV[7])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'last', 'blocked_until', 'factor')
+local current = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+local factor = tonumber(state[4]) or 1
+local elapsed = math.max(0, now - last)
+current = math.min(capacity, current + elapsed * rate * factor)
+factor = math.min(1, factor + elapsed / recovery)
+local wait = 0
+if penalty > 0 then
+  factor = math.max(min_factor, factor * 0.5)
+  blocked_until = math.max(blocked_until, now + penalty)
+elseif tokens > 0 then
+  local deficit = math.max(0, tokens - current)
+  wait = math.max(0, blocked_until - now) + deficit / (rate * factor)
+  if max_wait >= 0 and wait > max_wait then
+    wait = -1
+  else
+    current = current - tokens
+  end
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(current), 'last', tostring(now), 'blocked_until', tostring(blocked_until), 'factor', tostring(factor))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Balde global (todas as réplicas e workers) em Redis, atualizado atomicamente via Lua."""
+
+    blocking_io = True
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        url: Optional[str] = None,
+        key: str = "mcp-datajud:rate-limit",
+        rate_per_second: float = 5.0,
+        burst_capacity: int = 10,
+    ) -> None:
+        super().__init__(rate_per_second, burst_capacity)
+        if redis_client is None:
+            # Import tardio (extra opcional: pip install mcp-datajud[redis]); o pacote é pesado e só
+            # este backend o usa
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("Backend Redis requer o pacote redis. Instale com: pip install 'mcp-datajud[redis]'") from None
+            redis_client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.redis = redis_client
+        self.key = key
+        self._script = self.redis.register_script(_REDIS_BUCKET_SCRIPT)
+
+    def _reserve(self, tokens: float, penalty_seconds: float = 0.0, max_wait: Optional[float] = None) -> float:
+        result = self._script(
+            keys=[self.key],
+            args=[
+                self.rate_per_second,
+                self.capacity,
+                tokens,
+                penalty_seconds,
+                RATE_RECOVERY_SECONDS,
+                MIN_RATE_FACTOR,
+                -1 if max_wait is None else max_wait,
+            ],
+        )
+        return float(result.decode() if isinstance(result, bytes) else result)
+
+
+def create_rate_limiter_from_env(rate_per_second: float = 5.0, burst_capacity: int = 10) -> RateLimiter:
+    # DATAJUD_RATE_LIMIT_BACKEND: memory (padrão) | file (mesmo host) | redis (todas as réplicas)
+    rate_per_second = float(os.getenv("DATAJUD_RATE_LIMIT_PER_SEC", str(rate_per_second)))
+    burst_capacity = int(os.getenv("DATAJUD_RATE_LIMIT_BURST", str(burst_capacity)))
+    backend = os.getenv("DATAJUD_RATE_LIMIT_BACKEND", "memory").strip().lower()
+    if backend == "file":
+        path = os.getenv("DATAJUD_RATE_LIMIT_FILE", "/tmp/mcp-datajud-rate-limit.json")
+        return FileRateLimiter(path, rate_per_second=rate_per_second, burst_capacity=burst_capacity)
+    if backend == "redis":
+        return RedisRateLimiter(
+            url=os.getenv("DATAJUD_REDIS_URL"),
+            key=os.getenv("DATAJUD_RATE_LIMIT_KEY", "mcp-datajud:rate-limit"),
+            rate_per_second=rate_per_second,
+            burst_capacity=burst_capacity,
+        )
+    if backend != "memory":
+        raise ValueError(f"Backend de rate limit desconhecido: {backend} (use memory, file ou redis)")
+    return TokenBucketRateLimiter(rate_per_second=rate_per_second, burst_capacity=burst_capacity)
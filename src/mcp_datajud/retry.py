@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from .errors import DeadlineExceededError
+
+
+# Status que justificam nova tentativa (429 respeita Retry-After)
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+_deadline: ContextVar[Optional[float]] = ContextVar("datajud_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Define um orçamento de tempo total (tentativas, esperas e retries) para o bloco.
+
+    Propaga via contextvars: vale para corrotinas, `asyncio.to_thread` e o fan-out.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget(default: float) -> float:
+    """Tempo disponível para a próxima etapa (limitado pelo prazo do escopo atual)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("Prazo total da chamada à ferramenta esgotado")
+    return min(default, remaining)
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter decorrelacionado e respeito a Retry-After."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        max_retry_after: float = 60.0,
+    ) -> None:
+        self.max_retries = max(max_retries, 0)
+        self.base_delay = max(base_delay, 0.001)
+        self.max_delay = max(max_delay, self.base_delay)
+        self.max_retry_after = max_retry_after
+
+    def is_retryable_status(self, status_code: Optional[int]) -> bool:
+        return status_code in RETRYABLE_STATUS
+
+    def next_delay(self, previous_delay: float, retry_after: Optional[float] = None) -> float:
+        # Jitter decorrelacionado: evita que todos os workers tentem novamente em sincronia
+        delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous_delay * 3)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    def sleep_budget(self, delay: float) -> Optional[float]:
+        """Retorna a espera permitida pelo prazo atual, ou None se não houver tempo para nova tentativa."""
+        deadline = _deadline.get()
+        if deadline is None:
+            return delay
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """Circuit breaker por endpoint: closed → open (falha rápida) → half_open (sonda) → closed."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1) -> None:
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(half_open_max_calls, 1)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_rejections = 0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    def should_fail_fast(self) -> bool:
+        # Consulta sem reservar vaga de sonda (usada antes de gastar cota no rate limiter)
+        with self._lock:
+            rejected = self.state == self.OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+            if rejected:
+                self.total_rejections += 1
+            return rejected
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.total_rejections += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._half_open_calls = 0
+            if self.state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self.total_rejections += 1
+                    return False
+                self._half_open_calls += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._half_open_calls = 0
+
+    def release(self) -> None:
+        # Tentativa abandonada sem resposta (cancelamento, erro local): devolve a vaga de sonda sem julgar o índice
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "total_rejections": self.total_rejections,
+                "retry_in_seconds": retry_in,
+            }
+
+
+class CircuitBreakerRegistry:
+    """Um breaker por endpoint de tribunal, criado sob demanda."""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is not None:
+            return breaker
+        with self._lock:
+            return self._breakers.setdefault(endpoint, CircuitBreaker(self.failure_threshold, self.recovery_timeout))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.snapshot() for endpoint, breaker in breakers.items()}
@@ -1,20 +1,89 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
+from . import json_backend, metrics, tracing
 from .client import DataJudClient
 
 
-app = FastAPI(title="MCP DataJUD", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Um cliente por worker: pool de conexões, rate limiter e spec compartilhados entre requisições
+    app.state.client = DataJudClient(api_key=os.getenv("DATAJUD_API_KEY"))
+    collector = metrics.register_client(app.state.client)
+    try:
+        yield
+    finally:
+        metrics.unregister_client(collector)
+        await app.state.client.aclose()
+
+
+class FastJSONResponse(JSONResponse):
+    """Serializa com o backend JSON do pacote (orjson quando instalado)."""
+
+    def render(self, content: Any) -> bytes:
+        return json_backend.dumps_bytes(content)
+
+
+def json_response(content: Any) -> Response:
+    # Resultados de ferramentas já são JSON puro: sem jsonable_encoder nem validação do FastAPI
+    return Response(content=json_backend.dumps_bytes(content), media_type="application/json")
+
+
+app = FastAPI(title="MCP DataJUD", version="0.1.0", lifespan=lifespan, default_response_class=FastJSONResponse)
+# Continua o trace do chamador (traceparent) quando DATAJUD_TRACING está ativo
+app.add_middleware(tracing.TraceContextMiddleware)
+
+
+def get_client(request: Request) -> DataJudClient:
+    return request.app.state.client
 
 
 class ExecuteRequest(BaseModel):
     tool_name: str
     params: Dict[str, Any] = {}
+    stream: bool = False
+    raw: bool = False
+
+
+async def stream_hits(client: DataJudClient, tool_name: str, params: Dict[str, Any]) -> StreamingResponse:
+    # NDJSON: um hit por linha, escrito à medida que as páginas chegam do DataJUD (memória constante)
+    try:
+        hits = client.aiter_hits(tool_name, **params)
+        first_hit = await hits.__anext__()
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+    except Exception as exc:
+        # Erros antes do primeiro byte ainda podem virar HTTP 400
+        raise HTTPException(status_code=400, detail=client.error_response(exc))
+
+    async def lines() -> AsyncIterator[bytes]:
+        yield json_backend.dumps_bytes(first_hit) + b"\n"
+        try:
+            async for hit in hits:
+                yield json_backend.dumps_bytes(hit) + b"\n"
+        except Exception as exc:
+            # Status já enviado: o erro vira a última linha do stream
+            yield json_backend.dumps_bytes(client.error_response(exc)) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def raw_page(client: DataJudClient, tool_name: str, params: Dict[str, Any], envelope: bytes | None = None) -> Response:
+    # Repasse dos bytes do DataJUD (uma página): sem parse nem serialização no servidor
+    try:
+        payload = await client.execute_tool_raw_async(tool_name, **params)
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=client.error_response(exc))
+    if envelope is not None:
+        payload = envelope + payload + b"}"
+    return Response(content=payload, media_type="application/json")
 
 
 class SmitheryCallRequest(BaseModel):
@@ -24,37 +93,62 @@ class SmitheryCallRequest(BaseModel):
 
 
 @app.get("/health")
-def health() -> Dict[str, str]:
+async def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/circuit-breakers")
+async def circuit_breakers(client: DataJudClient = Depends(get_client)) -> Any:
+    return {"circuit_breakers": client.circuit_breaker_states()}
+
+
+@app.get("/metrics")
+async def prometheus_metrics() -> Response:
+    if not metrics.is_metrics_available():
+        return PlainTextResponse("Métricas indisponíveis: instale o extra 'metrics' (prometheus-client).", status_code=503)
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.get("/tools")
-def tools() -> Any:
-    client = DataJudClient(api_key=os.getenv("DATAJUD_API_KEY"))
-    return client.list_tools()
+async def tools(segment: str | None = Query(default=None), client: DataJudClient = Depends(get_client)) -> Response:
+    return json_response(client.list_tools(segment=segment))
 
 
 @app.post("/execute")
-def execute(req: ExecuteRequest) -> Any:
-    client = DataJudClient(api_key=os.getenv("DATAJUD_API_KEY"))
-    result = client.execute_tool(tool_name=req.tool_name, **req.params)
+async def execute(req: ExecuteRequest, client: DataJudClient = Depends(get_client)) -> Response:
+    if req.stream:
+        return await stream_hits(client, req.tool_name, req.params)
+    if req.raw:
+        return await raw_page(client, req.tool_name, req.params)
+    result = await client.execute_tool_async(tool_name=req.tool_name, **req.params)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result)
-    return result
+    return json_response(result)
 
 
 # Smithery-compatible endpoints
 @app.get("/api/mcp/tool/list")
-def mcp_tool_list(sessionId: str | None = Query(default=None)) -> Any:  # noqa: N803 (Smithery casing)
-    client = DataJudClient(api_key=os.getenv("DATAJUD_API_KEY"))
-    tools = client.list_tools()
-    return {"tools": tools}
+async def mcp_tool_list(
+    sessionId: str | None = Query(default=None),  # noqa: N803 (Smithery casing)
+    segment: str | None = Query(default=None),
+    client: DataJudClient = Depends(get_client),
+) -> Response:
+    return json_response({"tools": client.list_tools(segment=segment)})
 
 
 @app.post("/api/mcp/tool/call")
-def mcp_tool_call(req: SmitheryCallRequest) -> Any:
-    client = DataJudClient(api_key=os.getenv("DATAJUD_API_KEY"))
-    result = client.execute_tool(tool_name=req.toolName, **(req.toolArgs or {}))
+async def mcp_tool_call(
+    req: SmitheryCallRequest,
+    stream: bool = Query(default=False),
+    raw: bool = Query(default=False),
+    client: DataJudClient = Depends(get_client),
+) -> Response:
+    if stream:
+        return await stream_hits(client, req.toolName, req.toolArgs or {})
+    if raw:
+        return await raw_page(client, req.toolName, req.toolArgs or {}, envelope=b'{"result":')
+    result = await client.execute_tool_async(tool_name=req.toolName, **(req.toolArgs or {}))
     if "error" in result:
         raise HTTPException(status_code=400, detail=result)
-    return {"result": result}
+    return json_response({"result": result})
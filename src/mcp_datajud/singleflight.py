@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _InFlightCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce chamadas idênticas em andamento: quem chega depois aguarda o resultado do primeiro.
+
+    Diferente do cache, nada é reaproveitado após a conclusão; não há risco de dado velho.
+    Suporta threads (`do`) e asyncio (`do_async`).
+    """
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.deduplicated = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        # Acessado apenas pela thread do event loop
+        self._async_calls: Dict[str, "asyncio.Future[Any]"] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._async_calls.get(key)
+        if task is not None:
+            with self._lock:
+                self.deduplicated += 1
+        else:
+            # A chamada pertence ao voo, não ao líder: cancelar quem a iniciou não afeta os seguidores
+            task = asyncio.ensure_future(fn())
+            self._async_calls[key] = task
+            task.add_done_callback(lambda done: self._finish_async(key, done))
+            with self._lock:
+                self.executed += 1
+        # shield: cancelar um chamador (líder ou seguidor) não cancela a chamada compartilhada
+        return await asyncio.shield(task)
+
+    def _finish_async(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._async_calls.get(key) is task:
+            del self._async_calls[key]
+        # Evita aviso de exceção não consumida quando todos os chamadores desistiram
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.executed + self.deduplicated
+            return {
+                "executed": self.executed,
+                "deduplicated": self.deduplicated,
+                "dedup_ratio": (self.deduplicated / total) if total else 0.0,
+            }
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, Optional
+
+try:  # Extra opcional: pip install mcp-datajud[tracing]
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # pragma: no cover - depende do ambiente
+    trace = None
+
+
+TRACER_NAME = "mcp_datajud"
+
+
+class _NoopSpan:
+    """Span descartável usado com tracing desativado (mesma interface mínima do OpenTelemetry)."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def set_status(self, status: Any) -> None:
+        pass
+
+
+# Contexto reutilizável: com tracing desativado, `span()` não aloca nada
+_NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT: ContextManager[Any] = nullcontext(_NOOP_SPAN)
+
+_tracer: Any = None
+
+
+def is_tracing_available() -> bool:
+    return trace is not None
+
+
+def is_tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+def configure_tracing(tracer_provider: Any = None) -> None:
+    """Ativa os spans do cliente; sem `tracer_provider`, usa o provider global do OpenTelemetry.
+
+    Em testes, passe um `TracerProvider` do SDK com `InMemorySpanExporter`.
+    """
+    global _tracer
+    if trace is None:
+        raise ImportError("Tracing requer opentelemetry-api. Instale com: pip install 'mcp-datajud[tracing]'")
+    _tracer = trace.get_tracer(TRACER_NAME, tracer_provider=tracer_provider)
+
+
+def disable_tracing() -> None:
+    global _tracer
+    _tracer = None
+
+
+def configure_tracing_from_env() -> None:
+    # DATAJUD_TRACING=1 ativa spans no provider global (configurado pela aplicação ou opentelemetry-instrument)
+    if os.getenv("DATAJUD_TRACING", "").strip().lower() in ("1", "true", "yes", "on") and _tracer is None:
+        configure_tracing()
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager[Any]:
+    """Span filho do span corrente; exceções são registradas e marcam o span com erro."""
+    if _tracer is None:
+        return _NOOP_CONTEXT
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def mark_error(current_span: Any, exc: BaseException) -> None:
+    # Para erros convertidos em resposta (ex.: execute_tool), que não chegam a sair do span
+    if _tracer is not None:
+        current_span.record_exception(exc)
+        current_span.set_status(Status(StatusCode.ERROR, str(exc)))
+
+
+class TraceContextMiddleware:
+    """Middleware ASGI: continua o trace do chamador (cabeçalho `traceparent`) em um span de servidor.
+
+    O span cobre a resposta inteira, inclusive o corpo NDJSON em streaming.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if _tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", ())}
+        parent = propagate.extract(carrier)
+        method = scope.get("method", "GET")
+        path = scope.get("path", "")
+        token = otel_context.attach(parent)
+        try:
+            with _tracer.start_as_current_span(
+                f"{method} {path}",
+                kind=SpanKind.SERVER,
+                attributes={"http.request.method": method, "url.path": path},
+            ) as server_span:
+
+                async def send_with_status(message: Dict[str, Any]) -> None:
+                    if message["type"] == "http.response.start":
+                        server_span.set_attribute("http.response.status_code", message["status"])
+                        if message["status"] >= 500:
+                            server_span.set_status(Status(StatusCode.ERROR))
+                    await send(message)
+
+                await self.app(scope, receive, send_with_status)
+        finally:
+            otel_context.detach(token)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from mcp_datajud.client import DataJudClient
+
+# O stub dos benchmarks serve de DataJUD local (benchmarks/ é um diretório de scripts, não um pacote)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from stub_server import StubConfig, StubDataJud  # noqa: E402
+
+STUB_DOCS = 300
+
+
+@pytest.fixture(scope="session")
+def stub() -> Iterator[StubDataJud]:
+    server = StubDataJud(StubConfig(docs=STUB_DOCS, payload_bytes=64)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def datajud_env(stub: StubDataJud, monkeypatch: pytest.MonkeyPatch) -> StubDataJud:
+    # Cliente apontado para o stub, sem cache e sem espera no rate limiter
+    monkeypatch.setenv("DATAJUD_API_KEY", "teste")
+    monkeypatch.setenv("DATAJUD_BASE_URL", stub.url)
+    monkeypatch.setenv("DATAJUD_TRIBUNAIS", "tjsp,trt2")
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_PER_SEC", "1000")
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_BURST", "1000")
+    for name in ("DATAJUD_CACHE_TTL", "DATAJUD_CACHE_PATH", "DATAJUD_RATE_LIMIT_BACKEND", "DATAJUD_MIRROR_DIR", "DATAJUD_MAPPING_INTROSPECTION", "DATAJUD_TRACING", "DATAJUD_LOG_TOOL_ERRORS"):
+        monkeypatch.delenv(name, raising=False)
+    stub.reset_calls()
+    return stub
+
+
+@pytest.fixture
+def client(datajud_env: StubDataJud) -> DataJudClient:
+    return DataJudClient()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_datajud.aggregation import COUNT_COLUMN, DEFAULT_LIMIT, TRIBUNAL, merge_tables, nested_body, nested_table, plan_aggregation
+from mcp_datajud.client import DataJudClient
+
+from .conftest import STUB_DOCS
+
+
+def _table(linhas, total, fora=0, completo=True):
+    return {"colunas": [], "linhas": linhas, "total": total, "fora_da_tabela": fora, "completo": completo}
+
+
+def test_plan_aggregation_valida_parametros():
+    with pytest.raises(ValueError, match="agrupar_por"):
+        plan_aggregation({})
+    with pytest.raises(ValueError, match="intervalo"):
+        plan_aggregation({"agrupar_por": ["periodo"], "intervalo": "hour"})
+    with pytest.raises(ValueError, match="campo_data"):
+        plan_aggregation({"agrupar_por": ["classe"], "campo_data": "dataInexistente"})
+
+
+def test_plan_aggregation_dimensoes():
+    params = {"agrupar_por": ["tribunal", "classe", "periodo", "classe.nome.keyword"], "intervalo": "year", "limite": 0, "grau": "G1"}
+    plan = plan_aggregation(params)
+    # Parâmetros consumidos; tribunal vira coluna, não dimensão do DataJUD
+    assert params == {}
+    assert plan["por_tribunal"] is True
+    assert [name for name, _ in plan["dimensions"]] == ["classe", "periodo", "classe.nome.keyword"]
+    assert plan["dimensions"][0][1] == {"terms": {"field": "classe.codigo"}}
+    assert plan["dimensions"][1][1]["date_histogram"]["format"] == "yyyy"
+    assert plan["limite"] == DEFAULT_LIMIT
+    assert plan["completo"] is False
+
+
+def test_nested_aggs_aninha_uma_dimensao_por_nivel():
+    body = nested_body(plan_aggregation({"agrupar_por": ["classe", "periodo", "orgao"], "limite": 5}))
+    assert body["size"] == 0 and body["track_total_hits"] is True
+    d0 = body["aggs"]["d0"]
+    assert d0["terms"] == {"field": "classe.codigo", "size": 5}
+    d1 = d0["aggs"]["d1"]
+    # Histograma sem size (todos os períodos) e sem buckets vazios
+    assert d1["date_histogram"] == {"field": "dataAjuizamento", "calendar_interval": "month", "format": "yyyy-MM", "min_doc_count": 1}
+    d2 = d1["aggs"]["d2"]
+    assert d2["terms"] == {"field": "orgaoJulgador.codigo", "size": 5}
+    assert "aggs" not in d2
+
+
+def test_nested_table_achata_buckets_e_soma_fora_do_top_n():
+    plan = plan_aggregation({"agrupar_por": ["classe", "periodo"]})
+    resp = {
+        "hits": {"total": {"value": 10}},
+        "aggregations": {
+            "d0": {
+                "sum_other_doc_count": 2,
+                "buckets": [
+                    {"key": 7, "doc_count": 8, "d1": {"buckets": [{"key": 1, "key_as_string": "2023-01", "doc_count": 5}, {"key": 2, "key_as_string": "2023-02", "doc_count": 3}]}},
+                ],
+            }
+        },
+    }
+    table = nested_table(plan, resp)
+    assert table["colunas"] == ["classe", "periodo", COUNT_COLUMN]
+    assert table["linhas"] == [[7, "2023-01", 5], [7, "2023-02", 3]]
+    assert table["total"] == 10
+    assert table["fora_da_tabela"] == 2
+    assert table["completo"] is False
+
+
+def test_merge_tables_soma_por_chave_ordenada_por_contagem():
+    plan = plan_aggregation({"agrupar_por": ["classe"]})
+    results = {
+        "tjsp": _table([[7, 5], [12, 2]], 7),
+        "trt2": _table([[12, 4], [156, 1]], 9, fora=4, completo=False),
+    }
+    merged = merge_tables(plan, results, {"tjmg": "timeout"})
+    assert merged["colunas"] == ["classe", COUNT_COLUMN]
+    assert merged["linhas"] == [[12, 6], [7, 5], [156, 1]]
+    assert merged["total"] == 16
+    assert merged["fora_da_tabela"] == 4
+    assert merged["completo"] is False
+    assert merged["tribunais"]["trt2"] == {"total": 9, "linhas": 2, "completo": False}
+    assert merged["errors"] == {"tjmg": "timeout"}
+
+
+def test_merge_tables_periodo_ordenado_pela_chave():
+    plan = plan_aggregation({"agrupar_por": ["periodo"]})
+    results = {
+        "tjsp": _table([["2023-02", 9], ["2023-01", 1]], 10),
+        "trt2": _table([["2023-03", 4], ["2023-01", 2]], 6),
+    }
+    merged = merge_tables(plan, results, {})
+    assert merged["linhas"] == [["2023-01", 3], ["2023-02", 9], ["2023-03", 4]]
+    assert merged["completo"] is True
+
+
+def test_merge_tables_coluna_tribunal():
+    plan = plan_aggregation({"agrupar_por": ["tribunal", "classe"], "todos_os_buckets": True})
+    results = {"tjsp": _table([[7, 5]], 5), "trt2": _table([[7, 2]], 2)}
+    merged = merge_tables(plan, results, {})
+    assert merged["colunas"] == [TRIBUNAL, "classe", COUNT_COLUMN]
+    assert merged["linhas"] == [["tjsp", 7, 5], ["trt2", 7, 2]]
+    # Composite não tem contagem fora da tabela
+    assert merged["fora_da_tabela"] is None
+
+
+def test_agregar_processos_por_periodo(client: DataJudClient):
+    result = client.execute_tool("tjsp.agregar_processos", agrupar_por=["periodo"])
+    assert result["colunas"] == ["periodo", COUNT_COLUMN]
+    # Stub: dataAjuizamento percorre os 12 meses de 2023 igualmente
+    assert result["linhas"] == [[f"2023-{month:02d}", STUB_DOCS // 12] for month in range(1, 13)]
+    assert result["total"] == STUB_DOCS
+    assert result["completo"] is True
+
+
+def test_agregar_processos_todos_os_buckets_bate_com_o_total(client: DataJudClient):
+    top = client.execute_tool("tjsp.agregar_processos", agrupar_por=["orgao", "periodo"], limite=3)
+    full = client.execute_tool("tjsp.agregar_processos", agrupar_por=["orgao", "periodo"], todos_os_buckets=True)
+    assert top["completo"] is False
+    assert sum(row[-1] for row in top["linhas"]) + top["fora_da_tabela"] == STUB_DOCS
+    assert full["completo"] is True
+    assert sum(row[-1] for row in full["linhas"]) == STUB_DOCS
+
+
+def test_contar_e_agregar_em_todos_os_tribunais(client: DataJudClient):
+    counts = client.execute_tool("todos.contar_processos", grau="G1")
+    assert counts["tribunais"] == {"tjsp": STUB_DOCS, "trt2": STUB_DOCS}
+    assert counts["total"] == 2 * STUB_DOCS
+
+    table = client.execute_tool("todos.agregar_processos", agrupar_por=["tribunal", "classe"])
+    assert table["colunas"] == [TRIBUNAL, "classe", COUNT_COLUMN]
+    assert {row[0] for row in table["linhas"]} == {"tjsp", "trt2"}
+    assert table["total"] == 2 * STUB_DOCS
+    assert table["errors"] == {}
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mcp_datajud import batch
+from mcp_datajud.batch import abatch_lookup, plan_chunks, tribunal_from_cnj
+
+
+@pytest.mark.parametrize(
+    ("numero", "tribunal"),
+    [
+        ("00000010220208260100", "tjsp"),
+        ("00000010220208070001", "tjdft"),
+        ("00000010220205020001", "trt2"),
+        ("00000010220205000001", "tst"),
+        ("00000010220206070001", "tre-dft"),
+        ("00000010220204030001", "trf3"),
+        ("00000010220203000001", "stj"),
+        ("00000010220209130001", "tjmmg"),
+        # STF (J=1) não tem índice público; TR fora da tabela e tamanho inválido
+        ("00000010220201000001", None),
+        ("00000010220208280001", None),
+        ("123", None),
+    ],
+)
+def test_tribunal_from_cnj(numero, tribunal):
+    assert tribunal_from_cnj(numero) == tribunal
+
+
+def test_plan_chunks_groups_by_tribunal_and_reports_unrouted():
+    paths = {"tjsp": "/api_publica_tjsp/_search", "trt2": "/api_publica_trt2/_search"}
+    numeros = [f"{i:07d}-02.2020.8.26.0100" for i in range(5)] + [
+        "0000001-02.2020.8.26.0100",  # repetido (outra grafia do mesmo número)
+        "00000010220205020001",
+        "00000010220208190001",  # TJRJ: não configurado
+        "xyz",
+    ]
+    chunks, unrouted = plan_chunks(numeros, paths, chunk_size=2)
+    assert [(tribunal, len(membros)) for tribunal, membros in chunks] == [("tjsp", 2), ("tjsp", 2), ("tjsp", 1), ("trt2", 1)]
+    assert unrouted["00000010220208190001"]["erro"] == "Tribunal não configurado: tjrj"
+    assert unrouted[""]["tribunal"] is None
+
+
+def test_batch_lookup_against_stub(client, datajud_env):
+    numeros = [doc["numeroProcesso"] for doc in datajud_env.docs[:7]] + ["00000010220208190001"]
+    result = client.execute_tool("todos.buscar_numeros_em_lote", numerosProcesso=numeros, tamanho_lote=3, _source=["classe.codigo"])
+    assert result["resumo"] == {"numeros": 8, "encontrados": 7, "nao_encontrados": 0, "erros": 1, "lotes": 3}
+    entry = result["data"][numeros[0]]
+    assert entry["tribunal"] == "tjsp" and entry["encontrado"]
+    # numeroProcesso volta no _source mesmo fora da projeção pedida (agrupamento)
+    assert set(entry["hits"][0]["_source"]) == {"classe", "numeroProcesso"}
+
+
+def test_abatch_lookup_bounds_concurrency(monkeypatch):
+    active = 0
+    peak = 0
+
+    async def fake_hits(session, method, path, body, page_size):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        for numero in body["query"]["bool"]["filter"][0]["terms"]["numeroProcesso"]:
+            yield {"_source": {"numeroProcesso": numero}}
+
+    monkeypatch.setattr(batch, "aiter_search_hits", fake_hits)
+    numeros = [f"{i:07d}0220208260100" for i in range(40)]
+    result = asyncio.run(abatch_lookup(None, {"tjsp": "/api_publica_tjsp/_search"}, numeros, chunk_size=2, max_workers=3))
+    assert result["resumo"]["lotes"] == 20
+    assert result["resumo"]["encontrados"] == 40
+    assert peak == 3
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_datajud import cache
+from mcp_datajud.cache import MemoryResponseCache, SQLiteResponseCache, is_idempotent_search, make_request_key
+from mcp_datajud.client import DataJudClient
+
+PATH = "/api_publica_tjsp/_search"
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    # Mesmo instante para o relógio monotônico (memória) e de parede (SQLite)
+    fake = SimpleNamespace(now=1000.0)
+    fake.monotonic = fake.time = lambda: fake.now
+    monkeypatch.setattr(cache, "time", fake)
+    return fake
+
+
+def test_chave_canonica():
+    key = make_request_key("post", PATH, None, {"size": 10, "query": {"match_all": {}}})
+    assert key == make_request_key("POST", PATH, {}, {"query": {"match_all": {}}, "size": 10})
+    # filter_path muda a resposta, então entra na chave
+    assert key != make_request_key("POST", PATH, {"filter_path": "hits.hits._id"}, {"size": 10, "query": {"match_all": {}}})
+    assert key != make_request_key("POST", "/api_publica_trt2/_search", None, {"size": 10, "query": {"match_all": {}}})
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "body", "expected"),
+    [
+        ("POST", PATH, {"size": 1}, True),
+        ("get", PATH, None, True),
+        ("DELETE", PATH, None, False),
+        ("POST", "/api_publica_tjsp/_pit", None, False),
+        ("GET", "/api_publica_tjsp/_mapping", None, False),
+        ("POST", "/_search", {"pit": {"id": "abc"}, "size": 1}, False),
+    ],
+)
+def test_is_idempotent_search(method, path, body, expected):
+    assert is_idempotent_search(method, path, body) is expected
+
+
+def test_memoria_lru_por_entradas(clock):
+    store = MemoryResponseCache(ttl_seconds=60, max_entries=2)
+    store.set("a", b"1")
+    store.set("b", b"2")
+    assert store.get("a") == b"1"
+    store.set("c", b"3")
+    assert store.get("b") is None
+    assert (store.get("a"), store.get("c")) == (b"1", b"3")
+    assert store.stats()["entries"] == 2
+
+
+def test_memoria_lru_por_bytes(clock):
+    store = MemoryResponseCache(ttl_seconds=60, max_bytes=10)
+    store.set("a", b"x" * 6)
+    store.set("b", b"y" * 6)
+    assert store.get("a") is None
+    assert store.stats()["bytes"] == 6
+    # Maior que o orçamento inteiro: não é armazenado nem expulsa ninguém
+    store.set("c", b"z" * 11)
+    assert store.get("c") is None
+    assert store.get("b") == b"y" * 6
+
+
+def test_memoria_ttl_e_stats(clock):
+    store = MemoryResponseCache(ttl_seconds=60)
+    store.set("a", b"1")
+    clock.now += 59
+    assert store.get("a") == b"1"
+    clock.now += 1
+    assert store.get("a") is None
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 0)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_sqlite_persiste_entre_instancias(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteResponseCache(path, ttl_seconds=60)
+    first.set("a", b"payload")
+    first.close()
+    second = SQLiteResponseCache(path, ttl_seconds=60)
+    assert second.get("a") == b"payload"
+    clock.now += 60
+    assert second.get("a") is None
+    assert second.stats()["entries"] == 0
+    second.close()
+
+
+def test_sqlite_lru_por_ultimo_acesso(tmp_path, clock):
+    store = SQLiteResponseCache(str(tmp_path / "cache.db"), ttl_seconds=100, max_entries=2, max_bytes=100)
+    store.set("a", b"1")
+    clock.now += 1
+    store.set("b", b"2")
+    # Leitura após TOUCH_FRACTION do TTL atualiza last_access de "a"
+    clock.now += 20
+    assert store.get("a") == b"1"
+    store.set("c", b"3")
+    assert store.get("b") is None
+    assert store.get("a") == b"1" and store.get("c") == b"3"
+    store.set("d", b"x" * 99)
+    assert store.stats()["bytes"] <= 100
+    store.close()
+
+
+def test_get_async_sqlite_fora_do_loop(tmp_path):
+    store = SQLiteResponseCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+    threads = []
+    load = store._load
+
+    def recording_load(key):
+        threads.append(threading.get_ident())
+        return load(key)
+
+    store._load = recording_load
+
+    async def run():
+        await store.set_async("a", b"1")
+        return await store.get_async("a"), threading.get_ident()
+
+    payload, loop_thread = asyncio.run(run())
+    assert payload == b"1"
+    assert threads and loop_thread not in threads
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_execute_tool_repetido_vai_ao_datajud_uma_vez(datajud_env, monkeypatch: pytest.MonkeyPatch, tmp_path, backend):
+    monkeypatch.setenv("DATAJUD_CACHE_TTL", "60")
+    if backend == "sqlite":
+        monkeypatch.setenv("DATAJUD_CACHE_PATH", str(tmp_path / "cache.db"))
+    client = DataJudClient()
+    first = client.execute_tool("tjsp.buscar_processos", classe_codigo=7, size=5)
+    second = client.execute_tool("tjsp.buscar_processos", size=5, classe_codigo=7)
+    assert first == second
+    assert datajud_env.stats() == {"_search 200": 1}
+    assert client.cache.stats()["hits"] == 1
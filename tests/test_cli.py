@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from mcp_datajud import cli, json_backend
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.errors import APIError, describe_error
+
+LATE_ERROR = APIError("Erro temporário do servidor DataJUD", 503)
+
+
+def _ndjson(content: bytes) -> list:
+    assert content.endswith(b"\n")
+    return [json_backend.loads(line) for line in content.splitlines()]
+
+
+def _run_cli(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "mcp_datajud.cli", *args], capture_output=True, env=dict(os.environ), timeout=60)
+
+
+def test_execute_stream(datajud_env):
+    proc = _run_cli("execute", "tjsp.buscar_processos", "--stream", "--params", '{"size": 120}')
+    assert proc.returncode == 0, proc.stderr
+    hits = _ndjson(proc.stdout)
+    assert [hit["_id"] for hit in hits] == [doc["id"] for doc in datajud_env.docs]
+
+
+def test_execute_stream_error_before_first_hit(datajud_env):
+    proc = _run_cli("execute", "tjsp.contar_processos", "--stream")
+    assert proc.returncode == 1
+    assert proc.stdout == b""
+    assert "error" in json_backend.loads(proc.stderr)
+
+
+def test_execute_stream_error_after_first_hit(datajud_env, monkeypatch: pytest.MonkeyPatch):
+    real = DataJudClient.iter_hits
+
+    def iter_hits(self, tool_name, **kwargs):
+        for hit in real(self, tool_name, **kwargs):
+            yield hit
+            raise LATE_ERROR
+
+    monkeypatch.setattr(DataJudClient, "iter_hits", iter_hits)
+    result = CliRunner().invoke(cli.main, ["execute", "tjsp.buscar_processos", "--stream"])
+    assert result.exit_code == 1
+    assert len(result.stdout.splitlines()) == 1
+    assert json_backend.loads(result.stderr) == {"error": describe_error(LATE_ERROR)}
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+
+from mcp_datajud.client import DataJudClient
+
+
+def _failures(caplog: pytest.LogCaptureFixture) -> list:
+    return [record for record in caplog.records if record.getMessage() == "Falha na ferramenta DataJUD"]
+
+
+def test_falha_de_ferramenta_nao_gera_log_por_padrao(client: DataJudClient, caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING, logger="mcp_datajud"):
+        result = client.execute_tool("tjsp.buscar_por_numero")
+    assert "error" in result
+    assert _failures(caplog) == []
+
+
+def test_falha_de_ferramenta_registrada_com_flag(datajud_env, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.setenv("DATAJUD_LOG_TOOL_ERRORS", "1")
+    client = DataJudClient()
+    with caplog.at_level(logging.WARNING, logger="mcp_datajud"):
+        result = client.execute_tool("tjsp.buscar_por_numero")
+    assert "error" in result
+    (record,) = _failures(caplog)
+    assert record.tool_name == "tjsp.buscar_por_numero"
+    assert record.log_key[0] == "tjsp.buscar_por_numero"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from mcp_datajud import export
+from mcp_datajud.errors import APIError
+from mcp_datajud.export import BulkExporter, plan_date_slices
+from mcp_datajud.http_client import DataJudSession
+
+
+@pytest.fixture
+def session(datajud_env):
+    session = DataJudSession(api_key="teste", base_url=datajud_env.url)
+    yield session
+    session.close()
+
+
+def _exported_ids(directory):
+    ids = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".ndjson.gz"):
+            with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as handle:
+                ids.extend(json.loads(line)["_id"] for line in handle)
+    return ids
+
+
+def test_plan_date_slices_cover_the_whole_period():
+    fatias = plan_date_slices(date(2023, 1, 1), date(2024, 1, 1), 4)
+    assert fatias[0] == {"id": 0, "lt": "2023-04-02"}
+    assert fatias[3] == {"id": 3, "gte": "2023-10-01"}
+    assert fatias[-1] == {"id": 4, "sem_data": True}
+    with pytest.raises(ValueError):
+        plan_date_slices(date(2024, 1, 1), date(2024, 1, 1), 4)
+
+
+def test_export_writes_every_document_once(session, datajud_env, tmp_path):
+    exporter = BulkExporter(session, str(tmp_path), workers=3, page_size=40, records_per_file=50)
+    (summary,) = exporter.export(["tjsp"], start=date(2023, 1, 1), end=date(2024, 1, 1), slices=6)
+    assert summary["documentos"] == len(datajud_env.docs)
+    assert summary["erros"] == {}
+    assert sorted(_exported_ids(tmp_path / "tjsp")) == sorted(doc["id"] for doc in datajud_env.docs)
+
+
+def test_resume_with_default_end_on_another_day(session, datajud_env, tmp_path, monkeypatch):
+    BulkExporter(session, str(tmp_path), workers=2, page_size=50).export(["tjsp"], start=date(2023, 1, 1))
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(export, "date", Tomorrow)
+    datajud_env.reset_calls()
+    (summary,) = BulkExporter(session, str(tmp_path), workers=2, page_size=50).export(["tjsp"], start=date(2023, 1, 1))
+    # Todas as fatias já estavam concluídas: nada é baixado de novo
+    assert summary["erros"] == {}
+    assert summary["documentos"] == len(datajud_env.docs)
+    assert datajud_env.total_calls() == 0
+
+
+def test_conflicting_plan_is_rejected(session, tmp_path):
+    exporter = BulkExporter(session, str(tmp_path), workers=2, page_size=50)
+    exporter.export(["tjsp"], start=date(2023, 1, 1), end=date(2024, 1, 1))
+    with pytest.raises(ValueError, match="outra exportação"):
+        exporter.export(["tjsp"], start=date(2023, 1, 1), end=date(2024, 1, 1), query={"term": {"grau": "G2"}})
+
+
+def test_resume_continues_from_the_last_page_of_the_open_part(session, datajud_env, tmp_path, monkeypatch):
+    pages = export.iter_search_pages
+
+    def crash_after_three_pages(*args, **kwargs):
+        for number, page in enumerate(pages(*args, **kwargs)):
+            if number == 3:
+                raise APIError("Erro temporário do servidor DataJUD", 503)
+            yield page
+
+    monkeypatch.setattr(export, "iter_search_pages", crash_after_three_pages)
+    options = {"start": date(2023, 1, 1), "end": date(2024, 1, 1), "slices": 1}
+    (summary,) = BulkExporter(session, str(tmp_path), workers=1, page_size=40).export(["tjsp"], **options)
+    assert list(summary["erros"]) == ["s000"]
+    # Sem rotação, a parte continua em .tmp e o checkpoint aponta para a 3ª página
+    assert os.path.exists(tmp_path / "tjsp" / "parte-s000-00000.ndjson.gz.tmp")
+
+    monkeypatch.setattr(export, "iter_search_pages", pages)
+    datajud_env.reset_calls()
+    (summary,) = BulkExporter(session, str(tmp_path), workers=1, page_size=40).export(["tjsp"], **options)
+    assert summary["erros"] == {}
+    assert summary["fatias_retomadas"] == 1
+    assert sorted(_exported_ids(tmp_path / "tjsp")) == sorted(doc["id"] for doc in datajud_env.docs)
+    # Só as páginas que faltavam: (300 - 120) / 40 -> 4 cheias e 1 parcial
+    assert datajud_env.stats() == {"_search 200": 5}
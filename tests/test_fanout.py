@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.errors import APIError, CircuitOpenError, describe_error
+from mcp_datajud.fanout import afanout_search, fanout_search, merge_results
+
+from .conftest import STUB_DOCS
+
+
+def _es(ids, total=None):
+    return {"hits": {"total": {"value": total if total is not None else len(ids)}, "hits": [{"_id": i} for i in ids]}}
+
+
+def test_merge_results_intercala_por_tribunal():
+    merged = merge_results(
+        {"tjsp": _es(["a1", "a2", "a3"], total=100), "trt2": _es(["b1"]), "tjmg": {"data": ["c1", "c2"], "total": 7}},
+        {},
+    )
+    assert [(hit["tribunal"], hit.get("_id") or hit.get("hit")) for hit in merged["data"]] == [
+        ("tjsp", "a1"), ("trt2", "b1"), ("tjmg", "c1"),
+        ("tjsp", "a2"), ("tjmg", "c2"),
+        ("tjsp", "a3"),
+    ]
+    assert merged["tribunais"] == {
+        "tjsp": {"total": 100, "fetched": 3},
+        "trt2": {"total": 1, "fetched": 1},
+        "tjmg": {"total": 7, "fetched": 2},
+    }
+    assert merged["errors"] == {}
+
+
+def test_fanout_search_resultado_parcial():
+    def search(tribunal):
+        if tribunal == "trt2":
+            raise APIError("Erro temporário do servidor DataJUD", 503)
+        return _es([f"{tribunal}-1"])
+
+    merged = fanout_search(["tjsp", "trt2", "tjmg"], search)
+    assert [hit["tribunal"] for hit in merged["data"]] == ["tjsp", "tjmg"]
+    assert list(merged["tribunais"]) == ["tjsp", "tjmg"]
+    assert merged["errors"] == {"trt2": describe_error(APIError("Erro temporário do servidor DataJUD", 503))}
+
+
+def test_afanout_search_resultado_parcial():
+    async def search(tribunal):
+        await asyncio.sleep(0.01 if tribunal == "tjsp" else 0)
+        if tribunal == "trt2":
+            raise ValueError("filtro inválido")
+        return _es([f"{tribunal}-1", f"{tribunal}-2"])
+
+    merged = asyncio.run(afanout_search(["tjsp", "trt2", "tjmg"], search))
+    # Ordem dos alvos, não de conclusão
+    assert [hit["_id"] for hit in merged["data"]] == ["tjsp-1", "tjmg-1", "tjsp-2", "tjmg-2"]
+    assert list(merged["errors"]) == ["trt2"]
+
+
+def test_fanout_no_stub_com_tribunal_indisponivel(datajud_env, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DATAJUD_TRIBUNAIS", "tjsp,trt2,tjmg")
+    client = DataJudClient()
+    breaker = client.session.circuit_breakers.get("/api_publica_trt2/_search")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    result = client.execute_tool("todos.buscar_processos", size=3)
+    assert [hit["tribunal"] for hit in result["data"]] == ["tjsp", "tjmg"] * 3
+    # Stub: mesmos documentos em todos os índices
+    assert [hit["_id"] for hit in result["data"][::2]] == [doc["id"] for doc in datajud_env.docs[:3]]
+    assert result["tribunais"] == {"tjsp": {"total": STUB_DOCS, "fetched": 3}, "tjmg": {"total": STUB_DOCS, "fetched": 3}}
+    assert result["errors"] == {"trt2": describe_error(CircuitOpenError("aberto"))}
+    # O tribunal com circuito aberto não chega ao DataJUD
+    assert datajud_env.stats() == {"_search 200": 2}
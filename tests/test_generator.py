@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from mcp_datajud.generator import SchemaDerivations
+
+
+def test_schema_artifacts_are_shared_within_a_client(client):
+    dynamic = client._client
+    tjsp = dynamic.tjsp.buscar_processos
+    trt2 = dynamic.trt2.buscar_processos
+    assert tjsp.__signature__ is trt2.__signature__
+    assert "Args:" in tjsp.__doc__
+
+
+def test_schema_artifacts_are_cached_per_schema_object():
+    derived = SchemaDerivations()
+    schema = {"properties": {"size": {"type": "integer"}}}
+    signature = derived.signature(schema)
+    assert derived.signature(schema) is signature
+    assert list(signature.parameters) == ["size", "_extra"]
+    # Outro cliente (outra instância) não enxerga as entradas deste
+    assert SchemaDerivations().signature(schema) is not signature
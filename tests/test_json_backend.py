@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from typing import Iterator
+
+import pytest
+
+from mcp_datajud import json_backend
+from mcp_datajud.client import DataJudClient
+
+VALUE = {"classe": {"nome": "Apelação Cível"}, "codigos": [1, 2]}
+
+
+@pytest.fixture
+def restore_backend() -> Iterator[None]:
+    name = json_backend.BACKEND_NAME
+    yield
+    json_backend.set_backend(name)
+
+
+def test_backend_stdlib(restore_backend):
+    json_backend.set_backend("json")
+    assert json_backend.BACKEND_NAME == "json"
+    assert json_backend.dumps_bytes(VALUE) == '{"classe":{"nome":"Apelação Cível"},"codigos":[1,2]}'.encode("utf-8")
+    assert json_backend.loads(json_backend.dumps(VALUE)) == VALUE
+    assert json_backend.dumps_pretty(VALUE) == json.dumps(VALUE, ensure_ascii=False, indent=2)
+
+
+def test_backend_orjson(restore_backend):
+    pytest.importorskip("orjson")
+    json_backend.set_backend("orjson")
+    assert json_backend.BACKEND_NAME == "orjson"
+    assert json_backend.dumps_bytes(VALUE) == '{"classe":{"nome":"Apelação Cível"},"codigos":[1,2]}'.encode("utf-8")
+    # Chaves não-string (ex.: buckets numéricos) e números fora da faixa do orjson
+    assert json_backend.loads(json_backend.dumps({1: "a"})) == {"1": "a"}
+    assert json_backend.loads(b"[18446744073709551616]") == [18446744073709551616]
+    json_backend.set_backend("auto")
+    assert json_backend.BACKEND_NAME == "orjson"
+
+
+def test_backend_desconhecido(restore_backend):
+    with pytest.raises(ValueError, match="ujson"):
+        json_backend.set_backend("ujson")
+
+
+def test_raw_repassa_os_bytes_do_datajud(client: DataJudClient):
+    raw = client.execute_tool_raw("tjsp.buscar_processos", size=2, _source=["classe"])
+    result = client.execute_tool("tjsp.buscar_processos", size=2, _source=["classe"])
+    assert json.loads(raw) == result
+    # Bytes como o stub os serializou (json.dumps padrão), sem passar pelo backend do cliente
+    assert raw == json.dumps(result).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    ("tool", "params", "message"),
+    [
+        ("tjsp.buscar_processos", {"buscar_todas_paginas": True}, "uma única página"),
+        ("tjsp.buscar_processos", {"compacto": True}, "compacto"),
+        ("todos.buscar_processos", {}, "não suporta modo raw"),
+        ("tjsp.contar_processos", {}, "não suporta modo raw"),
+    ],
+)
+def test_raw_recusado(client: DataJudClient, tool, params, message):
+    with pytest.raises(ValueError, match=message):
+        client.execute_tool_raw(tool, **params)
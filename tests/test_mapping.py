@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.http_client import DataJudSession
+from mcp_datajud.mapping import (
+    FILTER_KEY,
+    MappingCache,
+    MappingIntrospector,
+    combine_query,
+    compile_filters,
+    extract_field_types,
+    schema_filters,
+    typed_filter_properties,
+)
+from mcp_datajud.parser import APIParser
+
+
+def _mapping(stub):
+    session = DataJudSession(api_key="teste", base_url=stub.url)
+    try:
+        return session.request(method="GET", path="/api_publica_tjsp/_mapping")
+    finally:
+        session.close()
+
+
+def test_extract_field_types_flattens_the_stub_mapping(stub):
+    fields = extract_field_types(_mapping(stub))
+    assert fields["classe.codigo"] == {"type": "long", "keyword": "classe.codigo", "nested": None}
+    # text com subcampo keyword usa o subcampo; text puro não serve para term
+    assert fields["classe.nome"]["keyword"] == "classe.nome.keyword"
+    assert fields["orgaoJulgador.nome"]["keyword"] is None
+    assert fields["assuntos.codigo"]["nested"] == "assuntos"
+
+
+def test_typed_properties_follow_the_mapping(stub):
+    properties = typed_filter_properties(extract_field_types(_mapping(stub)))
+    assert properties["classe_codigo"]["items"] == {"type": "integer"}
+    assert properties["dataAjuizamento_inicio"][FILTER_KEY] == {"field": "dataAjuizamento", "op": "gte", "nested": None}
+    # Campos ausentes do mapeamento não viram parâmetro
+    assert "sistema_codigo" not in properties
+
+
+def test_compile_filters_builds_filter_context():
+    properties = typed_filter_properties({
+        "classe.codigo": {"type": "long", "keyword": "classe.codigo", "nested": None},
+        "assuntos.codigo": {"type": "long", "keyword": "assuntos.codigo", "nested": "assuntos"},
+        "dataAjuizamento": {"type": "date", "keyword": "dataAjuizamento", "nested": None},
+    })
+    kwargs = {"classe_codigo": [7, 12], "assuntos_codigo": 5, "dataAjuizamento_inicio": "2023-01-01", "dataAjuizamento_fim": "2023-06-30", "size": 5}
+    clauses = compile_filters(kwargs, schema_filters({"properties": properties}))
+    assert kwargs == {"size": 5}
+    assert {"terms": {"classe.codigo": [7, 12]}} in clauses
+    assert {"nested": {"path": "assuntos", "query": {"term": {"assuntos.codigo": 5}}}} in clauses
+    assert {"range": {"dataAjuizamento": {"gte": "2023-01-01", "lte": "2023-06-30"}}} in clauses
+    assert combine_query({"match": {"x": 1}}, clauses)["bool"]["must"] == [{"match": {"x": 1}}]
+
+
+def test_introspector_caches_and_refreshes(stub, tmp_path):
+    session = DataJudSession(api_key="teste", base_url=stub.url)
+    base_schema = APIParser(session)._default_input_schema()
+    schemas = {}
+    introspector = MappingIntrospector(session, MappingCache(str(tmp_path), ttl_seconds=3600))
+    introspector.run(["tjsp", "trt2"], base_schema, schemas.__setitem__)
+    assert introspector.stats["fetched"] == 2
+    # Mapeamentos iguais compartilham o mesmo schema enriquecido
+    assert schemas["tjsp"] is schemas["trt2"]
+    assert "classe_codigo" in schemas["tjsp"]["properties"]
+
+    introspector.run(["tjsp"], base_schema, schemas.__setitem__)
+    assert introspector.stats["cache_hits"] == 1
+
+    # Prazo vencido: novo download completo de _mapping
+    stub.reset_calls()
+    expired = MappingIntrospector(session, MappingCache(str(tmp_path), ttl_seconds=0))
+    expired.run(["tjsp"], base_schema, schemas.__setitem__)
+    assert expired.stats == {"cache_hits": 0, "fetched": 1, "errors": 0}
+    assert stub.stats() == {"_mapping 200": 1}
+    session.close()
+
+
+def test_client_applies_typed_filters(datajud_env, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATAJUD_MAPPING_INTROSPECTION", "1")
+    monkeypatch.setenv("DATAJUD_MAPPING_CACHE_DIR", str(tmp_path))
+    client = DataJudClient()
+    deadline = time.monotonic() + 10
+    while "classe_codigo" not in _properties(client, "tjsp.buscar_processos"):
+        assert time.monotonic() < deadline, "introspecção não terminou"
+        time.sleep(0.05)
+
+    result = client.execute_tool("tjsp.buscar_processos", classe_codigo=7, size=1000)
+    expected = sum(1 for doc in datajud_env.docs if doc["classe"]["codigo"] == 7)
+    assert len(result["hits"]["hits"]) == expected
+    assert all(hit["_source"]["classe"]["codigo"] == 7 for hit in result["hits"]["hits"])
+    client.close()
+
+
+def _properties(client, tool_name):
+    tool = next(tool for tool in client.list_tools() if tool["tool_name"] == tool_name)
+    return tool["input_schema"].get("properties", {})
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.http_client import DataJudSession
+from mcp_datajud.mirror import LocalMirror
+
+
+@pytest.fixture
+def mirrored(datajud_env, tmp_path, monkeypatch):
+    # tjsp sincronizado no espelho; o cliente atende as ferramentas de conveniência localmente
+    session = DataJudSession(api_key="teste", base_url=datajud_env.url)
+    mirror = LocalMirror(str(tmp_path), max_age_seconds=60)
+    result = mirror.sync(session, "tjsp", page_size=100)
+    assert result["documentos"] == len(datajud_env.docs)
+    mirror.close()
+    session.close()
+    monkeypatch.setenv("DATAJUD_MIRROR_DIR", str(tmp_path))
+    monkeypatch.setenv("DATAJUD_MIRROR_MAX_AGE", "60")
+    client = DataJudClient()
+    yield client
+    client.close()
+
+
+def _ids(result):
+    return [hit["_id"] for hit in result["hits"]["hits"]]
+
+
+def _remote(datajud_env, tool, **kwargs):
+    # Cliente sem espelho: a mesma chamada vai à API (referência para as páginas locais)
+    client = DataJudClient()
+    client.mirror = None
+    try:
+        return client.execute_tool(tool, **kwargs)
+    finally:
+        client.close()
+
+
+def test_serves_locally_without_calling_the_api(mirrored, datajud_env):
+    datajud_env.reset_calls()
+    result = mirrored.execute_tool("tjsp.buscar_por_orgao", orgaoJulgador_codigo=3, size=4)
+    assert result["espelho"] == "tjsp"
+    assert len(result["hits"]["hits"]) == 4
+    assert datajud_env.total_calls() == 0
+
+
+@pytest.mark.parametrize("paging", [{"pagina": 2, "size": 5}, {"from": 7, "size": 3}, {"pagina": 3}])
+def test_local_pages_match_the_api(mirrored, datajud_env, paging):
+    local = mirrored.execute_tool("tjsp.buscar_por_classe_e_periodo", classe_codigo=7, **paging)
+    remote = _remote(datajud_env, "tjsp.buscar_por_classe_e_periodo", classe_codigo=7, **paging)
+    assert local["espelho"] == "tjsp"
+    assert _ids(local) == _ids(remote)
+    assert _ids(local)
+
+
+def test_numero_lookup_pages_like_the_api(mirrored, datajud_env):
+    numeros = [doc["numeroProcesso"] for doc in datajud_env.docs[:3]]
+    local = mirrored.execute_tool("tjsp.buscar_por_numero", numeroProcesso=numeros)
+    assert sorted(_ids(local)) == sorted(doc["id"] for doc in datajud_env.docs[:3])
+    assert _ids(mirrored.execute_tool("tjsp.buscar_por_numero", numeroProcesso=numeros, pagina=2)) == []
+
+
+def test_remote_only_parameters_bypass_the_mirror(mirrored, datajud_env):
+    datajud_env.reset_calls()
+    result = mirrored.execute_tool("tjsp.buscar_por_orgao", orgaoJulgador_codigo=3, size=2, search_after=["2024-01-01T00:00:00", "TJSP_G1_0000000"])
+    assert "espelho" not in result
+    assert datajud_env.total_calls() == 1
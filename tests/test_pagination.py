@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterator
+
+import pytest
+
+from mcp_datajud.errors import APIError
+from mcp_datajud.http_client import AsyncDataJudSession, DataJudSession, is_async_available
+from mcp_datajud.pagination import (
+    DEFAULT_SORT,
+    PIT_TIEBREAKER_SORT,
+    TIEBREAKER_SORT,
+    aiter_search_pages,
+    ensure_tiebreaker_sort,
+    iter_search_hits,
+    iter_search_pages,
+)
+
+from .conftest import StubConfig, StubDataJud
+
+# Índice maior que a janela do stub: paginação por from/size não chega ao fim
+WINDOW = 1000
+DOCS = 2500
+PATH = "/api_publica_tjsp/_search"
+SORT = [{"dataHoraUltimaAtualizacao": {"order": "asc"}}]
+
+
+@pytest.fixture(scope="module")
+def big_stub() -> Iterator[StubDataJud]:
+    server = StubDataJud(StubConfig(docs=DOCS, payload_bytes=0, max_result_window=WINDOW)).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session(big_stub: StubDataJud) -> Iterator[DataJudSession]:
+    big_stub.reset_calls()
+    session = DataJudSession(api_key="teste", base_url=big_stub.url, rate_limit_per_sec=1000, burst_capacity=1000)
+    yield session
+    session.close()
+
+
+def test_ensure_tiebreaker_sort():
+    assert ensure_tiebreaker_sort(None) == [*DEFAULT_SORT, TIEBREAKER_SORT]
+    assert ensure_tiebreaker_sort(SORT[0]) == [*SORT, TIEBREAKER_SORT]
+    assert ensure_tiebreaker_sort(SORT, use_pit=True) == [*SORT, PIT_TIEBREAKER_SORT]
+    # Desempate já presente não é duplicado
+    assert ensure_tiebreaker_sort([*SORT, "id"]) == [*SORT, "id"]
+    assert ensure_tiebreaker_sort([PIT_TIEBREAKER_SORT], use_pit=True) == [PIT_TIEBREAKER_SORT]
+
+
+def test_from_size_alem_da_janela_e_rejeitado(session: DataJudSession):
+    with pytest.raises(APIError) as excinfo:
+        session.request("POST", PATH, json_body={"from": WINDOW, "size": 10})
+    assert excinfo.value.status_code == 400
+
+
+def test_search_after_passa_da_janela(session: DataJudSession, big_stub: StubDataJud):
+    hits = list(iter_search_hits(session, "POST", PATH, {"sort": SORT, "from": 50}, page_size=WINDOW))
+    ids = [hit["_id"] for hit in hits]
+    assert ids == [doc["id"] for doc in big_stub.docs]
+    # 1000 + 1000 + 500: a última página curta encerra sem requisição extra
+    assert big_stub.stats() == {"_search 200": 3}
+
+
+def test_pit_fechado_ao_interromper_iteracao(session: DataJudSession, big_stub: StubDataJud):
+    pages = iter_search_pages(session, "POST", PATH, {"sort": SORT}, page_size=500, use_pit=True)
+    first = next(pages)
+    assert len(first) == 500
+    assert big_stub._pits
+    pages.close()
+    assert big_stub._pits == {}
+    assert big_stub.stats() == {"/_pit 200": 1, "/_search 200": 1, "_pit 200": 1}
+    # Páginas com PIT vão para /_search, mas o breaker é o do índice
+    breakers = session.circuit_breakers.snapshot()
+    assert PATH in breakers
+    assert "/_search" not in breakers
+
+
+def test_pit_percorre_todas_as_paginas(session: DataJudSession, big_stub: StubDataJud):
+    hits = list(iter_search_hits(session, "POST", PATH, {"sort": SORT}, page_size=WINDOW, use_pit=True))
+    assert len(hits) == DOCS
+    assert big_stub._pits == {}
+
+
+@pytest.mark.skipif(not is_async_available(), reason="httpx não instalado")
+def test_aiter_search_pages_com_pit(big_stub: StubDataJud):
+    big_stub.reset_calls()
+
+    async def run() -> list:
+        session = AsyncDataJudSession(api_key="teste", base_url=big_stub.url, rate_limit_per_sec=1000, burst_capacity=1000)
+        try:
+            sizes = []
+            pages = aiter_search_pages(session, "POST", PATH, {"sort": SORT}, page_size=WINDOW, use_pit=True)
+            async for page in pages:
+                sizes.append(len(page))
+                if len(sizes) == 2:
+                    break
+            await pages.aclose()
+            return sizes
+        finally:
+            await session.aclose()
+
+    assert asyncio.run(run()) == [WINDOW, WINDOW]
+    assert big_stub._pits == {}
+    assert big_stub.stats()["/_pit 200"] == 1
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.parser import CATALOGO_COMPLETO, DEFAULT_TRIBUNAIS, SEGMENTOS, parse_tribunais
+
+
+def test_default_catalog_is_the_small_sample():
+    assert parse_tribunais(None) == DEFAULT_TRIBUNAIS
+    assert len(DEFAULT_TRIBUNAIS) < len(CATALOGO_COMPLETO)
+
+
+def test_todos_opts_into_the_full_catalog():
+    assert parse_tribunais("todos") == CATALOGO_COMPLETO
+    assert len(parse_tribunais("tjsp, TODOS")) == len(CATALOGO_COMPLETO)
+
+
+def test_segments_and_aliases_keep_order_without_duplicates():
+    tribunais = parse_tribunais("trt2,trabalho,tjsp")
+    assert tribunais[0] == "trt2"
+    assert tribunais[-1] == "tjsp"
+    assert len(tribunais) == len(SEGMENTOS["trabalho"]) + 1
+
+
+def test_default_tool_list_stays_small(datajud_env, monkeypatch):
+    monkeypatch.delenv("DATAJUD_TRIBUNAIS")
+    names = [tool["tool_name"] for tool in DataJudClient().list_tools()]
+    assert len(names) < 100
+    assert "todos.buscar_processos" in names
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.projection import (
+    compact_hit,
+    compact_result,
+    cursor_filter_path,
+    filter_source,
+    flatten_source,
+    normalize_filter_path,
+    source_filter_supported,
+)
+
+from .conftest import STUB_DOCS
+
+DOC = {"numeroProcesso": "1", "classe": {"codigo": 7, "nome": "Apelação"}, "orgaoJulgador": {"codigo": 3}, "movimentos": [{"codigo": 1}]}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (None, None),
+        ("", None),
+        (" hits.hits._id , hits.total ", "hits.hits._id,hits.total"),
+        (["hits.hits._id", "", "took"], "hits.hits._id,took"),
+        ([" "], None),
+    ],
+)
+def test_normalize_filter_path(value, expected):
+    assert normalize_filter_path(value) == expected
+
+
+def test_cursor_filter_path_inclui_campos_do_cursor():
+    assert cursor_filter_path(None) is None
+    assert cursor_filter_path("hits.hits._id") == "hits.hits._id,hits.hits.sort"
+    assert cursor_filter_path("hits.hits._id", use_pit=True) == "hits.hits._id,hits.hits.sort,pit_id"
+    # Sem duplicar o que já foi pedido
+    assert cursor_filter_path("hits.hits.sort,pit_id", use_pit=True) == "hits.hits.sort,pit_id"
+
+
+def test_flatten_e_compact_hit():
+    assert flatten_source(DOC) == {"numeroProcesso": "1", "classe.codigo": 7, "classe.nome": "Apelação", "orgaoJulgador.codigo": 3, "movimentos": [{"codigo": 1}]}
+    hit = {"_index": "x", "_id": "abc", "_score": None, "_source": {"classe": {"codigo": 7}}, "sort": [1]}
+    assert compact_hit(hit) == {"id": "abc", "classe.codigo": 7}
+    assert compact_hit({"_id": "abc"}) == {"id": "abc"}
+    assert compact_hit("abc") == "abc"
+
+
+def test_compact_result():
+    result = {"hits": {"total": {"value": 9}, "hits": [{"_id": "a", "_source": {"grau": "G1"}}]}}
+    assert compact_result(result) == {"data": [{"id": "a", "grau": "G1"}], "total": 9}
+    assert compact_result({"hits": {"total": 4}}) == {"data": [], "total": 4}
+    assert compact_result(None) == {"data": [], "total": None}
+
+
+def test_filter_source():
+    assert filter_source(DOC, None) is DOC
+    assert filter_source(DOC, False) is None
+    assert filter_source(DOC, ["classe.nome", "orgaoJulgador", "inexistente.campo"]) == {"classe": {"nome": "Apelação"}, "orgaoJulgador": {"codigo": 3}}
+    assert filter_source(DOC, {"includes": "classe", "excludes": ["classe.nome"]}) == {"classe": {"codigo": 7}}
+    excluded = filter_source(DOC, {"excludes": ["classe.codigo", "movimentos"]})
+    assert excluded == {"numeroProcesso": "1", "classe": {"nome": "Apelação"}, "orgaoJulgador": {"codigo": 3}}
+    # O documento original não é alterado
+    assert DOC["classe"] == {"codigo": 7, "nome": "Apelação"}
+
+
+def test_source_filter_supported():
+    assert source_filter_supported(["classe.nome"])
+    assert source_filter_supported({"excludes": "movimentos"})
+    assert not source_filter_supported(["classe.*"])
+    assert not source_filter_supported({"includes": ["*.codigo"]})
+
+
+def test_compacto_no_stub(client: DataJudClient):
+    result = client.execute_tool("tjsp.buscar_processos", size=2, compacto=True, _source=["classe.codigo", "grau"])
+    assert result["total"] == STUB_DOCS
+    # O stub projeta só o primeiro nível do _source (classe inteira)
+    for row in result["data"]:
+        assert {"id", "classe.codigo", "grau"} <= set(row)
+        assert not {"_source", "_index", "sort", "classe"} & set(row)
+
+
+def test_filter_path_estreito_ainda_pagina(client: DataJudClient, datajud_env):
+    # Só _id pedido: sem hits.hits.sort o search_after pararia na primeira página
+    hits = list(client.iter_hits("tjsp.buscar_processos", size=100, filter_path="hits.hits._id"))
+    assert [hit["_id"] for hit in hits] == [doc["id"] for doc in datajud_env.docs]
+    assert set(hits[0]) == {"_id", "sort"}
+    assert datajud_env.stats() == {"_search 200": STUB_DOCS // 100 + 1}
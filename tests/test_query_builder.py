@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from mcp_datajud import query_builder
+from mcp_datajud.client import DataJudClient
+from mcp_datajud.pagination import MAX_PAGE_SIZE
+
+from stub_server import StubConfig, StubDataJud
+
+
+def test_term_switches_to_terms_for_lists():
+    assert query_builder.term("grau", "G1") == {"term": {"grau": "G1"}}
+    assert query_builder.term("grau", ["G1"]) == {"term": {"grau": "G1"}}
+    assert query_builder.term("grau", ("G1", "G2")) == {"terms": {"grau": ["G1", "G2"]}}
+
+
+def test_range_drops_missing_bounds():
+    assert query_builder.range_("dataAjuizamento") is None
+    assert query_builder.range_("dataAjuizamento", gte="2023-01-01") == {"range": {"dataAjuizamento": {"gte": "2023-01-01"}}}
+    assert query_builder.range_("dataAjuizamento", "2023-01-01", "2023-12-31") == {"range": {"dataAjuizamento": {"gte": "2023-01-01", "lte": "2023-12-31"}}}
+
+
+def test_bool_filter_skips_empty_clauses_and_scores_only_must():
+    query = query_builder.bool_filter([query_builder.term("grau", "G1"), None], must={"match": {"x": "y"}})
+    assert query == {"bool": {"filter": [{"term": {"grau": "G1"}}], "must": [{"match": {"x": "y"}}]}}
+    assert query_builder.bool_filter([]) == {"bool": {"filter": []}}
+
+
+def test_normalize_numero_processo():
+    assert query_builder.normalize_numero_processo("0000001-02.2020.8.26.0100") == "00000010220208260100"
+    assert query_builder.normalize_numero_processo(123) == "123"
+
+
+def test_por_numero_leaves_room_for_one_document_per_grau():
+    params = {"numeroProcesso": ["0000001-02.2020.8.26.0100", "00000020220208260100"], "size": 1}
+    body = query_builder.por_numero(params)
+    assert params == {"size": 1}
+    assert body["query"]["bool"]["filter"] == [{"terms": {"numeroProcesso": ["00000010220208260100", "00000020220208260100"]}}]
+    assert body["size"] == 4
+    assert body["track_total_hits"] is False
+    assert body["sort"][-1] == query_builder.DETERMINISTIC_SORT[-1]
+    assert query_builder.numero_page_size(MAX_PAGE_SIZE) == MAX_PAGE_SIZE
+
+
+def test_por_numero_requires_a_number():
+    with pytest.raises(ValueError):
+        query_builder.por_numero({"numeroProcesso": ["--"]})
+
+
+def test_por_classe_e_periodo_and_por_orgao():
+    body = query_builder.por_classe_e_periodo({"classe_codigo": [7, 12], "data_inicio": "2023-01-01", "campo_data": "dataHoraUltimaAtualizacao"})
+    assert body["query"]["bool"]["filter"] == [
+        {"terms": {"classe.codigo": [7, 12]}},
+        {"range": {"dataHoraUltimaAtualizacao": {"gte": "2023-01-01"}}},
+    ]
+    body = query_builder.por_orgao({"orgaoJulgador_codigo": 5})
+    assert body["query"]["bool"]["filter"] == [{"term": {"orgaoJulgador.codigo": 5}}]
+    with pytest.raises(ValueError):
+        query_builder.por_orgao({"orgaoJulgador_codigo": 5, "campo_data": "dataBaixa"})
+    with pytest.raises(ValueError):
+        query_builder.por_classe_e_periodo({})
+
+
+def test_buscar_por_numero_returns_every_grau(datajud_env, monkeypatch):
+    # Stub próprio: os mesmos números em G1 e G2
+    server = StubDataJud(StubConfig(docs=3, payload_bytes=16))
+    server.docs += [{**doc, "id": doc["id"].replace("_G1_", "_G2_"), "grau": "G2"} for doc in server.docs]
+    server.start()
+    monkeypatch.setenv("DATAJUD_BASE_URL", server.url)
+    try:
+        client = DataJudClient()
+        numeros = [doc["numeroProcesso"] for doc in server.docs[:3]]
+        hits = client.execute_tool("tjsp.buscar_por_numero", numeroProcesso=numeros)["hits"]["hits"]
+        assert sorted(hit["_source"]["grau"] for hit in hits) == ["G1", "G1", "G1", "G2", "G2", "G2"]
+        client.close()
+    finally:
+        server.stop()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_datajud import rate_limiter
+from mcp_datajud.http_client import request_cost
+from mcp_datajud.rate_limiter import (
+    MIN_RATE_FACTOR,
+    RESERVATION_REJECTED,
+    FileRateLimiter,
+    RedisRateLimiter,
+    TokenBucketRateLimiter,
+    _reserve_tokens,
+    create_rate_limiter_from_env,
+)
+
+try:  # Backend Redis testado contra o fakeredis (opcional)
+    import fakeredis
+except ImportError:  # pragma: no cover - depende do ambiente
+    fakeredis = None
+
+needs_fakeredis = pytest.mark.skipif(fakeredis is None, reason="fakeredis não instalado")
+
+
+@pytest.fixture
+def file_pair(tmp_path):
+    path = str(tmp_path / "bucket.json")
+    return FileRateLimiter(path, rate_per_second=1, burst_capacity=2), FileRateLimiter(path, rate_per_second=1, burst_capacity=2)
+
+
+@pytest.fixture
+def redis_pair():
+    if fakeredis is None:
+        pytest.skip("fakeredis não instalado")
+    server = fakeredis.FakeRedis()
+    return RedisRateLimiter(server, rate_per_second=1, burst_capacity=2), RedisRateLimiter(server, rate_per_second=1, burst_capacity=2)
+
+
+@pytest.fixture(params=["file", "redis"])
+def shared_pair(request):
+    return request.getfixturevalue(f"{request.param}_pair")
+
+
+def test_backends_compartilhados_dividem_o_orcamento(shared_pair):
+    first, second = shared_pair
+    assert first.acquire(timeout=0)
+    assert second.acquire(timeout=0)
+    # Saldo do balde esgotado pelas duas instâncias juntas
+    assert not first.acquire(timeout=0)
+    assert not second.acquire(timeout=0)
+    assert first.stats()["rejected"] == 1 and second.stats()["rejected"] == 1
+
+
+def test_penalize_pausa_todas_as_instancias(shared_pair):
+    first, second = shared_pair
+    first.penalize(5)
+    assert not second.acquire(timeout=1)
+    # Sem prazo, a reserva espera o fim da pausa
+    assert second._reserve(1) >= 4.9
+
+
+@needs_fakeredis
+def test_penalize_redis_reduz_a_taxa(redis_pair):
+    first, second = redis_pair
+    first.penalize(1)
+    second.penalize(1)
+    assert float(first.redis.hget(first.key, "factor")) == pytest.approx(0.25, abs=1e-3)
+
+
+def test_aimd_reduz_pela_metade_e_recupera():
+    state = {}
+    _reserve_tokens(state, 0.0, 10, 10, 0, 1.0, None)
+    assert state["factor"] == 0.5
+    for _ in range(10):
+        _reserve_tokens(state, 0.0, 10, 10, 0, 1.0, None)
+    assert state["factor"] == MIN_RATE_FACTOR
+    # Recuperação linear: RATE_RECOVERY_SECONDS (60 s) para voltar de 0 a 1
+    _reserve_tokens(state, 30.0, 10, 10, 0, 0.0, None)
+    assert state["factor"] == pytest.approx(MIN_RATE_FACTOR + 0.5)
+    _reserve_tokens(state, 90.0, 10, 10, 0, 0.0, None)
+    assert state["factor"] == 1.0
+
+
+def test_factory_por_backend(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_PER_SEC", "3")
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_BURST", "7")
+    monkeypatch.delenv("DATAJUD_RATE_LIMIT_BACKEND", raising=False)
+    limiter = create_rate_limiter_from_env()
+    assert isinstance(limiter, TokenBucketRateLimiter)
+    assert (limiter.rate_per_second, limiter.capacity) == (3.0, 7)
+
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_BACKEND", "file")
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_FILE", str(tmp_path / "bucket.json"))
+    limiter = create_rate_limiter_from_env()
+    assert isinstance(limiter, FileRateLimiter)
+    assert limiter.path == str(tmp_path / "bucket.json")
+
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_BACKEND", "memcached")
+    with pytest.raises(ValueError, match="memcached"):
+        create_rate_limiter_from_env()
+
+
+@needs_fakeredis
+def test_factory_redis(monkeypatch: pytest.MonkeyPatch):
+    import redis
+
+    urls = []
+
+    def from_url(url, **kwargs):
+        urls.append(url)
+        return fakeredis.FakeRedis()
+
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_BACKEND", "Redis")
+    monkeypatch.setenv("DATAJUD_REDIS_URL", "redis://cache:6379/1")
+    monkeypatch.setenv("DATAJUD_RATE_LIMIT_KEY", "teste:bucket")
+    limiter = create_rate_limiter_from_env()
+    assert isinstance(limiter, RedisRateLimiter)
+    assert urls == ["redis://cache:6379/1"]
+    assert limiter.key == "teste:bucket"
+    assert limiter.acquire(timeout=0)
+
+
+def test_reserva_fifo_com_espera_exata():
+    state = {}
+    waits = [_reserve_tokens(state, 0.0, 10, 2, 1, 0.0, None) for _ in range(5)]
+    # Burst de 2, depois cada chamador espera a própria dívida (ordem de chegada)
+    assert waits == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3])
+
+
+def test_reserva_rejeitada_nao_consome_tokens():
+    state = {}
+    _reserve_tokens(state, 0.0, 10, 1, 1, 0.0, None)
+    before = dict(state)
+    assert _reserve_tokens(state, 0.0, 10, 1, 1, 0.0, 0.05) == RESERVATION_REJECTED
+    assert state == before
+    assert _reserve_tokens(state, 0.0, 10, 1, 1, 0.0, None) == pytest.approx(0.1)
+
+
+def test_pausa_soma_a_espera():
+    state = {}
+    _reserve_tokens(state, 0.0, 10, 1, 0, 2.0, None)
+    # Pausa de 2 s; o saldo (1 token) cobre a reserva, mas a taxa caiu pela metade
+    assert _reserve_tokens(state, 0.0, 10, 1, 1, 0.0, None) == pytest.approx(2.0)
+    assert _reserve_tokens(state, 0.0, 10, 1, 1, 0.0, None) == pytest.approx(2.2)
+
+
+@pytest.mark.parametrize(("body", "cost"), [(None, 1), ({}, 1), ({"size": 10}, 1), ({"size": 2501}, 2), ({"size": 10000}, 4), ({"size": "x"}, 1)])
+def test_request_cost(body, cost):
+    assert request_cost(body) == cost
+
+
+def test_acquire_dorme_uma_vez_e_registra_stats(monkeypatch: pytest.MonkeyPatch):
+    sleeps = []
+    depths = []
+    clock = SimpleNamespace(monotonic=lambda: 100.0)
+
+    def sleep(seconds: float) -> None:
+        depths.append(limiter.stats()["queue_depth"])
+        sleeps.append(seconds)
+
+    clock.sleep = sleep
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    limiter = TokenBucketRateLimiter(rate_per_second=10, burst_capacity=1)
+
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert limiter.acquire(tokens=4)
+    assert not limiter.acquire(timeout=0.1)
+    assert sleeps == pytest.approx([0.1, 0.5])
+    assert depths == [1, 1]
+    stats = limiter.stats()
+    assert stats["queue_depth"] == 0
+    assert (stats["acquired"], stats["rejected"]) == (3, 1)
+    assert stats["total_wait_seconds"] == pytest.approx(0.6)
+    assert stats["max_wait_seconds"] == pytest.approx(0.5)
+    assert stats["avg_wait_seconds"] == pytest.approx(0.2)
+
+
+def test_acquire_async_nao_bloqueia_o_loop():
+    limiter = TokenBucketRateLimiter(rate_per_second=10, burst_capacity=1)
+
+    async def run() -> tuple:
+        ticks = 0
+        assert await limiter.acquire_async()
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        while not waiter.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+            if ticks == 2:
+                depth = limiter.stats()["queue_depth"]
+        return await waiter, ticks, depth
+
+    acquired, ticks, depth = asyncio.run(run())
+    assert acquired
+    assert depth == 1
+    # ~0.1 s de espera com o loop livre para outras tarefas
+    assert ticks >= 5
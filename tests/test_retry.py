@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import time
+from typing import Iterator
+
+import pytest
+
+from mcp_datajud.errors import APIError, CircuitOpenError, DeadlineExceededError
+from mcp_datajud.http_client import DataJudSession, _evaluate_failure
+from mcp_datajud.retry import CircuitBreaker, CircuitBreakerRegistry, RetryPolicy, deadline_scope, remaining_budget
+
+from .conftest import StubConfig, StubDataJud
+
+PATH = "/api_publica_tjsp/_search"
+
+
+def _half_open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    time.sleep(breaker.recovery_timeout + 0.01)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_next_delay_limites():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for _ in range(200):
+        delay = policy.next_delay(1.0)
+        assert 0.5 <= delay <= 3.0
+        assert policy.base_delay <= policy.next_delay(100.0) <= policy.max_delay
+
+
+def test_next_delay_retry_after_prevalece():
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0, max_retry_after=30.0)
+    assert policy.next_delay(0.1, retry_after=10.0) == 10.0
+    # Retry-After acima do teto é limitado
+    assert policy.next_delay(0.1, retry_after=3600.0) == 30.0
+    # Retry-After menor que o backoff não encurta a espera
+    assert policy.next_delay(0.1, retry_after=0.0) >= 0.1
+
+
+def test_deadline_scope_limita_esperas():
+    policy = RetryPolicy()
+    assert policy.sleep_budget(10.0) == 10.0
+    with deadline_scope(0.2):
+        assert policy.sleep_budget(10.0) is None
+        assert policy.sleep_budget(0.01) == 0.01
+        assert remaining_budget(30.0) <= 0.2
+        # Escopo interno não estende o prazo externo
+        with deadline_scope(60):
+            assert remaining_budget(30.0) <= 0.2
+        time.sleep(0.21)
+        with pytest.raises(DeadlineExceededError):
+            remaining_budget(30.0)
+    assert remaining_budget(30.0) == 30.0
+
+
+def test_circuit_breaker_abre_falha_rapido_e_fecha():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.should_fail_fast()
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert not breaker.should_fail_fast()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Uma sonda por vez
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+
+def test_circuit_breaker_sonda_com_falha_reabre():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    _half_open(breaker)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_release_devolve_vaga_de_sonda():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    _half_open(breaker)
+    assert not breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+@pytest.mark.parametrize(
+    ("status", "state"),
+    [(429, CircuitBreaker.HALF_OPEN), (404, CircuitBreaker.CLOSED), (503, CircuitBreaker.OPEN), (408, CircuitBreaker.OPEN)],
+)
+def test_evaluate_failure_na_sonda(status, state):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    _half_open(breaker)
+    error, retry_after = _evaluate_failure(status, {"Retry-After": "2"}, "", breaker)
+    assert error.status_code == status
+    assert retry_after == (2.0 if status in (429, 503) else None)
+    assert breaker.state == state
+    if status == 429:
+        # Vaga devolvida: a próxima sonda pode sair
+        assert breaker.allow_request()
+
+
+def _session(stub: StubDataJud, **kwargs) -> DataJudSession:
+    return DataJudSession(
+        api_key="teste",
+        base_url=stub.url,
+        rate_limit_per_sec=1000,
+        burst_capacity=1000,
+        retry_policy=RetryPolicy(max_retries=2, base_delay=0.001, max_delay=0.002),
+        **kwargs,
+    )
+
+
+def test_tentativa_abortada_libera_sonda(stub: StubDataJud, monkeypatch: pytest.MonkeyPatch):
+    session = _session(stub, circuit_breakers=CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=0.05))
+    breaker = session.circuit_breakers.get(PATH)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    def interrupted(*args, **kwargs):
+        raise RuntimeError("cancelado")
+
+    monkeypatch.setattr(session.session, "request", interrupted)
+    with pytest.raises(RuntimeError):
+        session.request("POST", PATH, json_body={"size": 1})
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+@pytest.fixture
+def failing_stub() -> Iterator[StubDataJud]:
+    server = StubDataJud(StubConfig(docs=10, payload_bytes=0, error_5xx_rate=1.0)).start()
+    yield server
+    server.stop()
+
+
+def test_503_repetido_e_circuito_aberto(failing_stub: StubDataJud):
+    session = _session(failing_stub, circuit_breakers=CircuitBreakerRegistry(failure_threshold=3, recovery_timeout=60))
+    with pytest.raises(APIError) as excinfo:
+        session.request("POST", PATH, json_body={"size": 1})
+    assert excinfo.value.status_code == 503
+    # Primeira tentativa + max_retries
+    assert failing_stub.stats() == {"_search 503": 3}
+    assert session.circuit_breakers.get(PATH).state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        session.request("POST", PATH, json_body={"size": 2})
+    assert failing_stub.total_calls() == 3
+    # Outro índice tem o próprio breaker
+    with pytest.raises(APIError) as excinfo:
+        session.request("POST", "/api_publica_trt2/_search", json_body={"size": 1})
+    assert not isinstance(excinfo.value, CircuitOpenError)
+
+
+def test_deadline_interrompe_retries(failing_stub: StubDataJud):
+    session = DataJudSession(
+        api_key="teste",
+        base_url=failing_stub.url,
+        rate_limit_per_sec=1000,
+        burst_capacity=1000,
+        retry_policy=RetryPolicy(max_retries=10, base_delay=0.5, max_delay=1.0),
+    )
+    started = time.monotonic()
+    with deadline_scope(0.3), pytest.raises(APIError):
+        session.request("POST", PATH, json_body={"size": 1})
+    assert time.monotonic() - started < 0.3
+    assert failing_stub.total_calls() == 1
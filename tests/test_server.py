@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from mcp_datajud import json_backend  # noqa: E402
+from mcp_datajud.client import DataJudClient  # noqa: E402
+from mcp_datajud.errors import APIError, describe_error  # noqa: E402
+from mcp_datajud.server import app  # noqa: E402
+
+from .conftest import STUB_DOCS  # noqa: E402
+
+LATE_ERROR = APIError("Erro temporário do servidor DataJUD", 503)
+
+
+@pytest.fixture
+def http(datajud_env):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_execute_returns_tool_result_as_json(http):
+    resp = http.post("/execute", json={"tool_name": "tjsp.buscar_processos", "params": {"size": 3}})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    assert len(json_backend.loads(resp.content)["hits"]["hits"]) == 3
+
+
+def test_execute_error_is_http_400(http):
+    resp = http.post("/execute", json={"tool_name": "xx.buscar_processos", "params": {}})
+    assert resp.status_code == 400
+    assert "error" in resp.json()["detail"]
+
+
+def test_smithery_call_wraps_result(http):
+    resp = http.post("/api/mcp/tool/call", json={"toolName": "tjsp.contar_processos", "toolArgs": {}})
+    assert resp.status_code == 200
+    assert resp.json() == {"result": {"total": 300}}
+
+
+def test_smithery_tool_list(http):
+    names = {tool["tool_name"] for tool in http.get("/api/mcp/tool/list").json()["tools"]}
+    assert {"tjsp.buscar_processos", "trt2.buscar_processos"} <= names
+
+
+def _ndjson(content: bytes) -> list:
+    assert content.endswith(b"\n")
+    return [json_backend.loads(line) for line in content.splitlines()]
+
+
+def _fail_after_first_hit(client: DataJudClient):
+    real = client.aiter_hits
+
+    async def aiter_hits(tool_name, **kwargs):
+        async for hit in real(tool_name, **kwargs):
+            yield hit
+            raise LATE_ERROR
+
+    return aiter_hits
+
+
+def test_stream_is_ndjson_one_hit_per_line(http, datajud_env):
+    resp = http.post("/execute", json={"tool_name": "tjsp.buscar_processos", "params": {"size": 100}, "stream": True})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    hits = _ndjson(resp.content)
+    assert [hit["_id"] for hit in hits] == [doc["id"] for doc in datajud_env.docs]
+    # Páginas de 100 + a última vazia
+    assert datajud_env.stats() == {"_search 200": STUB_DOCS // 100 + 1}
+
+
+def test_smithery_stream(http):
+    resp = http.post("/api/mcp/tool/call?stream=true", json={"toolName": "tjsp.buscar_processos", "toolArgs": {"size": 150}})
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    assert len(_ndjson(resp.content)) == STUB_DOCS
+
+
+def test_stream_error_before_first_hit_is_http_400(http):
+    resp = http.post("/execute", json={"tool_name": "tjsp.contar_processos", "params": {}, "stream": True})
+    assert resp.status_code == 400
+    assert "error" in resp.json()["detail"]
+
+
+def test_stream_error_after_first_hit_is_last_line(http, monkeypatch: pytest.MonkeyPatch):
+    client = http.app.state.client
+    monkeypatch.setattr(client, "aiter_hits", _fail_after_first_hit(client))
+    resp = http.post("/execute", json={"tool_name": "tjsp.buscar_processos", "params": {"size": 10}, "stream": True})
+    assert resp.status_code == 200
+    lines = _ndjson(resp.content)
+    assert len(lines) == 2
+    assert "_id" in lines[0]
+    assert lines[1] == {"error": describe_error(LATE_ERROR)}
+
+
+def test_raw_page_is_passed_through(http):
+    client = http.app.state.client
+    expected = client.execute_tool_raw("tjsp.buscar_processos", size=2)
+    resp = http.post("/execute", json={"tool_name": "tjsp.buscar_processos", "params": {"size": 2}, "raw": True})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.content == expected
+    resp = http.post("/api/mcp/tool/call?raw=true", json={"toolName": "tjsp.buscar_processos", "toolArgs": {"size": 2}})
+    assert resp.content == b'{"result":' + expected + b"}"
+
+
+def test_raw_rejects_multi_page(http):
+    resp = http.post("/execute", json={"tool_name": "tjsp.buscar_processos", "params": {"buscar_todas_paginas": True}, "raw": True})
+    assert resp.status_code == 400
+    assert "error" in resp.json()["detail"]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mcp_datajud.singleflight import SingleFlight
+
+FOLLOWERS = 4
+
+
+def test_do_deduplica_chamadas_concorrentes():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "resultado"
+
+    with ThreadPoolExecutor(max_workers=FOLLOWERS + 1) as pool:
+        leader = pool.submit(flight.do, "k", fn)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "k", fn) for _ in range(FOLLOWERS)]
+        while flight.stats()["deduplicated"] < FOLLOWERS:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result(5)] + [future.result(5) for future in followers]
+
+    assert results == ["resultado"] * (FOLLOWERS + 1)
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "deduplicated": FOLLOWERS, "dedup_ratio": FOLLOWERS / (FOLLOWERS + 1)}
+    # Concluído o voo, nada é reaproveitado
+    assert flight.do("k", lambda: "novo") == "novo"
+
+
+def test_do_propaga_excecao_aos_seguidores():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("falhou")
+
+    with ThreadPoolExecutor(max_workers=FOLLOWERS + 1) as pool:
+        leader = pool.submit(flight.do, "k", fn)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "k", fn) for _ in range(FOLLOWERS)]
+        while flight.stats()["deduplicated"] < FOLLOWERS:
+            time.sleep(0.001)
+        release.set()
+        for future in [leader, *followers]:
+            with pytest.raises(ValueError, match="falhou"):
+                future.result(5)
+
+
+def test_do_async_deduplica_e_sobrevive_ao_cancelamento_do_lider():
+    flight = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do_async("k", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do_async("k", fn)) for _ in range(FOLLOWERS)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    assert asyncio.run(run()) == ["resultado"] * FOLLOWERS
+    assert len(calls) == 1
+    assert flight.stats()["deduplicated"] == FOLLOWERS
+    assert flight._async_calls == {}
+
+
+def test_do_async_propaga_excecao():
+    flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def run():
+        return await asyncio.gather(*(flight.do_async("k", fn) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert flight.stats()["executed"] == 1
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Iterator
+
+import pytest
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+from opentelemetry.trace import StatusCode  # noqa: E402
+
+from mcp_datajud import tracing  # noqa: E402
+
+
+@pytest.fixture
+def exporter() -> Iterator[InMemorySpanExporter]:
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    tracing.configure_tracing(provider)
+    yield memory
+    tracing.disable_tracing()
+
+
+def _by_name(exporter: InMemorySpanExporter) -> dict:
+    spans: dict = {}
+    for span in exporter.get_finished_spans():
+        spans.setdefault(span.name, []).append(span)
+    return spans
+
+
+def test_tool_call_produces_nested_spans(client, exporter):
+    result = client.execute_tool("tjsp.buscar_processos", size=20, buscar_todas_paginas=True)
+    assert len(result["data"]) == 300
+
+    spans = _by_name(exporter)
+    (root,) = spans["mcp.execute_tool"]
+    assert root.attributes["mcp.tool_name"] == "tjsp.buscar_processos"
+    assert root.parent is None
+    pages = spans["datajud.page"]
+    assert len(pages) >= 300 // 20
+    assert all(page.parent.span_id == root.context.span_id for page in pages)
+    attempts = spans["datajud.request.attempt"]
+    assert {attempt.parent.span_id for attempt in attempts} <= {page.context.span_id for page in pages}
+    assert all(attempt.attributes["http.response.status_code"] == 200 for attempt in attempts)
+    assert all(attempt.context.trace_id == root.context.trace_id for attempt in attempts)
+
+
+def test_tool_error_marks_root_span(client, exporter):
+    result = client.execute_tool("tjsp.buscar_por_numero")
+    assert "error" in result
+    (root,) = _by_name(exporter)["mcp.execute_tool"]
+    assert root.status.status_code == StatusCode.ERROR
+
+
+def test_async_tool_call_is_traced(client, exporter):
+    result = asyncio.run(client.execute_tool_async("tjsp.buscar_processos", size=2))
+    assert len(result["hits"]["hits"]) == 2
+    names = {span.name for span in exporter.get_finished_spans()}
+    assert {"mcp.execute_tool", "datajud.request.attempt"} <= names
+
+
+def test_disabled_tracing_records_nothing(client, exporter):
+    tracing.disable_tracing()
+    client.execute_tool("tjsp.buscar_processos", size=2)
+    assert exporter.get_finished_spans() == ()